@@ -1,10 +1,31 @@
+import os
+import sys
+import time
+_START = time.perf_counter()    #taken before the remaining imports, so they are part of the startup report
+
 import tkinter as tk
+from Theme import STARTUP_REPORT
 from SetupWizard import SetupWizard
 
 def main():
+    marks = [("imports", time.perf_counter())]
     root = tk.Tk()
+    marks.append(("tk", time.perf_counter()))
     SetupWizard(root)
+    marks.append(("setup wizard", time.perf_counter()))
+    if STARTUP_REPORT or os.environ.get("GUI_BUILDER_STARTUP_REPORT") == "1":
+        _report_first_window(root, marks)
     root.mainloop()
 
+#print the time from start to each startup phase and to the first mapped window (on stderr)
+def _report_first_window(root: tk.Tk, marks):
+    def _on_map(event):
+        if event.widget is not root:
+            return
+        root.unbind("<Map>", binding)
+        marks.append(("first window", time.perf_counter()))
+        print("startup: " + ", ".join(f"{name} {(t - _START) * 1000:.1f} ms" for name, t in marks), file=sys.stderr)
+    binding = root.bind("<Map>", _on_map, add="+")
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
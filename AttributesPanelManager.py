@@ -1,40 +1,74 @@
 import tkinter as tk
 from Theme import *
+from Tracing import traced
+from FrameScheduler import FrameScheduler, ALL
 
 class AttributesPanelManager:
-    def __init__(self, root, frame, theme, canvas_width, canvas_height, window_height, panel_width, panel_height, selection_manager, widget_manager):
+    def __init__(self, root, frame, theme, canvas_width, canvas_height, window_height, panel_width, panel_height, selection_manager, widget_manager, write_delay=ATTRIBUTE_WRITE_DELAY, tracer=None, window_width=None, scheduler=None):
         self.root = root
         self.frame = frame
         self.theme = theme
         self.canvas_width = canvas_width
         self.canvas_height = canvas_height
         self.window_height = window_height
+        self.window_width = window_width if window_width is not None else canvas_width     #canvas window, smaller than the design when it is panned
         self.panel_width = panel_width
         self.panel_height = panel_height
         self.selection_manager = selection_manager
         self.widget_manager = widget_manager
         self._visible = False
         self.frame.columnconfigure(0, minsize=50)
-        self._spinboxes = {}
-        self._variables = {}    #{attribute_name: tk.Variable}
         self._silent_update = False
 
-    def show(self, model):
+        #one panel per widget type, built on first use and rebound to the selected model afterwards
+        self._panels = {}       #{widget_type or tuple of widget types (multi-selection): panel dict, see _build_panel}
+        self._panel = None      #panel that is currently shown
+        self._model = None      #model the current panel is bound to
+        self._models = ()       #models of a multi-selection the current panel is bound to
+        self._item_ids = ()     #window_ids of the bound model(s), captured when the panel is bound
+        self._spinboxes = {}    #spinboxes of the current panel
+        self._variables = {}    #{attribute_name: tk.Variable} of the current panel
+
+        #panel edits are collected per attribute and applied once per idle cycle (or after write_delay ms)
+        self.write_delay = write_delay
+        self._pending_writes = {}       #{attribute: latest value}
+        self._pending_item_ids = ()     #window_ids the pending writes belong to
+        self._write_id = None           #scheduled after/after_idle callback
+
+        #tracing of panel traces, rebinding and scheduled writes (EventTracer or None)
+        self.tracer = tracer
+        self._populate = traced(tracer, "AttributesPanel._populate", self._populate)
+        self._traced_flush_writes = traced(tracer, "AttributesPanel._flush_writes", self._flush_writes)
+
+        #model changes from moves and edits reach the fields once per frame (see schedule_update)
+        self.scheduler = scheduler or FrameScheduler(root, tracer)
+        self.scheduler.register("panel", self._flush_fields, FRAME_PRIORITY_PANEL)
+        self.scheduler.register("limits", self._flush_limits, FRAME_PRIORITY_LIMITS)
+
+    #item_id: window_id of the model, edits in the panel are applied to it
+    def show(self, model, item_id):
+        self._open()
+        self._populate(model, item_id)
+
+    #one panel for several selected widgets: the attributes they have in common, mixed values are left blank
+    #and an edit is applied to every widget (item_ids: window_ids of the models, in the same order)
+    def show_many(self, models, item_ids):
+        self._open()
+        self._populate_many(models, item_ids)
+
+    def _open(self):
         if self._visible:
-            #already visible → refresh contents
-            self._populate(model)
+            #already visible → only the contents are refreshed
             return
 
         #resize window
         if self.panel_height > self.window_height:
-            self.root.geometry(f"{self.canvas_width + self.panel_width}x{self.panel_height}")
+            self.root.geometry(f"{self.window_width + self.panel_width}x{self.panel_height}")
         else:
-            self.root.geometry(f"{self.canvas_width + self.panel_width}x{self.window_height}")
+            self.root.geometry(f"{self.window_width + self.panel_width}x{self.window_height}")
 
         #pack attributes panel
         self.frame.pack(side="right", fill="y")
-
-        self._populate(model)
         self._visible = True
 
     def hide(self):
@@ -43,38 +77,141 @@ class AttributesPanelManager:
             return
 
         #resize window
-        self.root.geometry(f"{self.canvas_width}x{self.window_height}")
+        self.root.geometry(f"{self.window_width}x{self.window_height}")
 
         #remove attributes panel
         self.frame.pack_forget()
 
-        #clear panel contents
-        self._clear_panel()
+        #apply edits that are still waiting, then unbind model (the panel itself is kept for the next selection)
+        self._flush_writes()
+        self._model = None
+        self._models = ()
+        self._item_ids = ()
 
         self._visible = False
 
-    def _populate(self, model):
-        #clear previous widgets
-        self._clear_panel()
+    #remove all traces and Tcl commands of the pooled panels and destroy them
+    def destroy(self):
+        if self._write_id is not None:
+            self.root.after_cancel(self._write_id)
+            self._write_id = None
+        self._pending_writes.clear()
+        for panel in self._panels.values():
+            for variable, trace_name in panel["traces"]:
+                variable.trace_remove("write", trace_name)
+            for command_name in panel["commands"]:
+                panel["frame"].deletecommand(command_name)
+            panel["frame"].destroy()
+        self._panels.clear()
+        self._panel = None
+        self._model = None
+        self._models = ()
+        self._item_ids = ()
+        self._spinboxes = {}
+        self._variables = {}
+
+    def _populate(self, model, item_id):
+        self._show_panel(model.type, ATTRIBUTE_CONFIG[model.type])
+        self._bind_model(model, item_id)
+
+    def _populate_many(self, models, item_ids):
+        widget_types = tuple(sorted({model.type for model in models}))
+        self._show_panel(widget_types, _common_attributes(widget_types))
+        self._bind_models(models, item_ids)
+
+    #show the pooled panel for a key (built on first use)
+    def _show_panel(self, key, attribute_config: dict):
+        panel = self._panels.get(key)
+        if panel is None:
+            panel = self._build_panel(attribute_config)
+            self._panels[key] = panel
+
+        #swap panels only when the widget type changed
+        if panel is not self._panel:
+            if self._panel is not None:
+                self._panel["frame"].grid_remove()
+            panel["frame"].grid(column=0, row=0, sticky="NW")
+            self._panel = panel
+            self._spinboxes = panel["spinboxes"]
+            self._variables = panel["variables"]
+
+    #build the rows of a panel for {attribute: input widget type}, values are filled in by _bind_model(s)
+    def _build_panel(self, attribute_config: dict):
+        frame = tk.Frame(self.frame, bg=self.theme.get("background_color"))
+        frame.columnconfigure(0, minsize=50)
+        panel = {
+            "frame": frame,
+            "config": attribute_config,
+            "variables": {},    #{attribute: tk.StringVar}
+            "spinboxes": {},    #{attribute: tk.Spinbox}
+            "limits": {},       #{attribute: [min_value, max_value]} read by the spinbox validation
+            "displays": {},     #{attribute: tk.Label} for read-only values and color previews
+            "entries": {},      #{attribute: tk.Entry} of the text fields
+            "traces": [],       #[(variable, trace_name)]
+            "commands": []      #names of registered Tcl commands
+        }
 
         row_index = 0
 
-        for attribute, widget_type in ATTRIBUTE_CONFIG[model.type].items():
+        for attribute, attribute_widget in attribute_config.items():
             #create displayname for each attribute
-            self._create_displayname_label(attribute, row_index)
-            #create the correct widget based on widget_type
-            getattr(self, f"_create_{widget_type}")(model, attribute, row_index)
+            self._create_displayname_label(frame, attribute, row_index)
+            #create the correct widget based on attribute_widget
+            getattr(self, f"_create_{attribute_widget}")(panel, attribute, row_index)
             row_index += 1
 
-    def _clear_panel(self):
-        for widget in self.frame.winfo_children():
-            widget.destroy()
-        self._variables.clear()
-        self._spinboxes.clear()
+        return panel
+
+    #show the values of a model in the current panel without triggering writes
+    def _bind_model(self, model, item_id):
+        #edits of the previous model must not end up on the new one
+        self._flush_writes()
+        self._model = model
+        self._models = ()
+        self._item_ids = (item_id,)
+        panel = self._panel
+
+        self._silent_update = True
+        #adjust limits before setting values (spinboxes clamp their current value to new limits)
+        self._update_spinbox_limits(model)
+        for attribute, variable in panel["variables"].items():
+            variable.set(_format_value(getattr(model, attribute)))
+        for entry in panel["entries"].values():
+            entry.config(bg=ENTRY_COLOR)
+        for attribute, display in panel["displays"].items():
+            if panel["config"][attribute] == "colorpicker":
+                display.config(bg=getattr(model, attribute))
+            else:
+                display.config(text=getattr(model, attribute))
+        self._silent_update = False
 
-    def _bind_variables(self, attribute: str, variable: tk.Variable, model):
+    #show the values shared by several models, mixed values are left blank
+    def _bind_models(self, models, item_ids):
+        self._flush_writes()
+        self._model = None
+        self._models = models
+        #edits apply to these widgets, so a keystroke does not have to collect the selection again
+        self._item_ids = tuple(item_ids)
+        panel = self._panel
+        #one pass over the models per attribute (fields and displays share the values)
+        values = {attribute: _common_value(models, attribute) for attribute in panel["config"]}
+
+        self._silent_update = True
+        for attribute, variable in panel["variables"].items():
+            variable.set(values[attribute])
+        for entry in panel["entries"].values():
+            entry.config(bg=ENTRY_COLOR)
+        for attribute, display in panel["displays"].items():
+            value = values[attribute]
+            if panel["config"][attribute] == "colorpicker":
+                display.config(bg=value or self.theme.get("background_color"))
+            else:
+                display.config(text=value)
+        self._silent_update = False
+
+    def _bind_variables(self, panel, attribute: str, variable: tk.Variable):
         def _on_write(*_):
-            if self._silent_update:
+            if self._silent_update or (self._model is None and not self._models):
                 return
 
             value = variable.get()
@@ -84,82 +221,127 @@ class AttributesPanelManager:
                     value = int(value)
                 except ValueError:
                     return
+            elif attribute == "tags":
+                value = tuple(value.replace(",", " ").split())
+            elif attribute == "id":
+                #names are unique, a taken (or empty) name is marked and not applied
+                valid = self.widget_manager.name_available(value, self._item_ids[0])
+                panel["entries"][attribute].config(bg=ENTRY_COLOR if valid else INVALID_ENTRY_COLOR)
+                if not valid:
+                    self._pending_writes.pop(attribute, None)
+                    return
 
-            #update widget
-            item_id = self.selection_manager.last_selected_id()
-            self.widget_manager.update_widget_attribute(item_id, attribute, value)
+            #only the latest value per attribute is applied (to every selected widget of a multi-selection)
+            self._pending_item_ids = self._item_ids
+            self._pending_writes[attribute] = value
+            self._schedule_writes()
+
+        panel["variables"][attribute] = variable
+        panel["traces"].append((variable, variable.trace_add("write", traced(self.tracer, f"AttributesPanel._on_write {attribute}", _on_write))))
+
+    def _schedule_writes(self):
+        if self.write_delay > 0:
+            #debounce: restart the timer on every edit
+            if self._write_id is not None:
+                self.root.after_cancel(self._write_id)
+            self._write_id = self.root.after(self.write_delay, self._traced_flush_writes)
+        elif self._write_id is None:
+            self._write_id = self.root.after_idle(self._traced_flush_writes)
+
+    #apply all collected edits at once (also called directly on Enter and focus-out)
+    def _flush_writes(self, event=None):
+        if self._write_id is not None:
+            self.root.after_cancel(self._write_id)
+            self._write_id = None
+        if not self._pending_writes:
+            return
 
-            #update model
-            setattr(model, attribute, value)
+        pending, self._pending_writes = self._pending_writes, {}
+        if self._model is None and not self._models:
+            return
+
+        #update models and widgets in one batch (one undo step per flush)
+        self.widget_manager.apply_attributes(self._pending_item_ids, pending)
+
+        #update max_value for spinboxes (the outline is refreshed by the WidgetManager)
+        if any(attribute in pending for attribute in ["anchor", "width", "height"]):
+            self.scheduler.mark("limits")
 
-            #update max_value for spinboxes
-            if attribute in ["anchor", "width", "height"]:
-                self._update_spinbox_limits(model)
+    #commit immediately when the user confirms or leaves a field
+    def _bind_commit_events(self, widget):
+        widget.bind("<Return>", self._traced_flush_writes)
+        widget.bind("<FocusOut>", self._traced_flush_writes)
 
-            #refresh outline
-            self.selection_manager.refresh(item_id)
+    #show changed model values (e.g. x and y during a move) in the next frame, however often the model changes until then
+    def schedule_update(self, model, attributes=()):
+        if model == self._model:
+            self.scheduler.mark("panel", *attributes)
 
-        self._variables[attribute] = variable
-        variable.trace_add("write", _on_write)
+    def _flush_fields(self, attributes):
+        if self._model is not None:
+            self.update_variable_from_model(self._model, None if ALL in attributes else attributes)
+
+    def _flush_limits(self, _):
+        if self._model is not None:
+            self._update_spinbox_limits(self._model)
 
     def update_variable_from_model(self, model, attributes=None):
+        if model != self._model:
+            return
         self._silent_update = True
         for attribute, variable in self._variables.items():
             if attributes and attribute not in attributes:
                 continue
-            try:
-                variable.set(getattr(model, attribute))
-            except Exception:
-                variable.set(str(getattr(model, attribute)))
+            variable.set(_format_value(getattr(model, attribute)))
         self._silent_update = False
 
-    def _create_displayname_label(self, attribute, row):
+    def _create_displayname_label(self, frame, attribute, row):
         tk.Label(
-            self.frame,
+            frame,
             text=DISPLAY_NAMES.get(attribute),
             bg=self.theme.get("background_color"),
             fg=self.theme.get("text_color"),
             pady=3
         ).grid(column=0, row=row, sticky="E")
 
-    def _create_label(self, model, attribute, row):
-        tk.Label(
-            self.frame,
-            text=getattr(model, attribute),
+    def _create_label(self, panel, attribute, row):
+        label = tk.Label(
+            panel["frame"],
             bg=self.theme.get("background_color"),
             fg=self.theme.get("text_color")
-        ).grid(column=1, row=row, sticky="W")
+        )
+        label.grid(column=1, row=row, sticky="W")
+        panel["displays"][attribute] = label
 
-    def _create_entry(self, model, attribute, row):
-        variable = tk.StringVar(value=str(getattr(model, attribute)))
+    def _create_entry(self, panel, attribute, row):
+        variable = tk.StringVar()
         entry = tk.Entry(
-            self.frame,
+            panel["frame"],
             bg=ENTRY_COLOR,
             fg=TEXT_COLOR,
             width=18,
             textvariable=variable
         )
         entry.grid(column=1, row=row)
-        self._bind_variables(attribute, variable, model)
+        panel["entries"][attribute] = entry
+        self._bind_commit_events(entry)
+        self._bind_variables(panel, attribute, variable)
 
-    def _create_spinbox(self, model, attribute, row):
+    def _create_spinbox(self, panel, attribute, row):
         min_value = 0
         max_value = 0
 
-        if attribute == "x":
-            min_value = self._compute_minimum_x(model)
-            max_value = self._compute_maximum_x(model)
-        elif attribute == "y":
-            min_value = self._compute_minimum_y(model)
-            max_value = self._compute_maximum_y(model)
-        elif attribute == "width":
+        #position limits depend on the bound model and are set in _update_spinbox_limits
+        if attribute == "width":
             min_value = 1
             max_value = self.canvas_width // 2
         elif attribute == "height":
             min_value = 1
             max_value = self.canvas_height // 2
 
-        variable = tk.StringVar(value=str(getattr(model, attribute)))
+        limits = [min_value, max_value]
+        panel["limits"][attribute] = limits
+        variable = tk.StringVar()
 
         #validate user input so spinbox limits are enforced even with manual input
         def _validate_spinbox(proposed: str, action: str, inserted: str):
@@ -169,17 +351,19 @@ class AttributesPanelManager:
             #only allow digits
             if not proposed.isdigit():
                 return False
-            #only allow in range of the spinbox limit
+            #only allow in range of the current spinbox limit
             try:
                 value = int(proposed)
             except ValueError:
                 return False
-            return min_value <= value <= max_value
+            return limits[0] <= value <= limits[1]
 
-        validation_command = (self.frame.register(_validate_spinbox), "%P", "%d", "%S")
+        command_name = panel["frame"].register(_validate_spinbox)
+        panel["commands"].append(command_name)
+        validation_command = (command_name, "%P", "%d", "%S")
 
         spinbox = tk.Spinbox(
-            self.frame,
+            panel["frame"],
             from_=min_value,
             to=max_value,
             width=5,
@@ -193,25 +377,27 @@ class AttributesPanelManager:
             wrap=False
         )
         spinbox.grid(column=1, row=row, sticky="W")
+        self._bind_commit_events(spinbox)
 
-        #store spinbox so the max value can be adjusted later if size or anchor change
-        self._spinboxes[attribute] = spinbox
+        #store spinbox so the limits can be adjusted later if size or anchor change
+        panel["spinboxes"][attribute] = spinbox
 
-        self._bind_variables(attribute, variable, model)
+        self._bind_variables(panel, attribute, variable)
 
-    def _create_colorpicker(self, model, attribute, row):
-        tk.Label(
-            self.frame,
-            bg=getattr(model, attribute),
+    def _create_colorpicker(self, panel, attribute, row):
+        label = tk.Label(
+            panel["frame"],
             width=5,
             relief="raised"
-        ).grid(column=1, row=row, sticky="W")
+        )
+        label.grid(column=1, row=row, sticky="W")
+        panel["displays"][attribute] = label
 
-    def _create_combobox(self, model, attribute, row):
+    def _create_combobox(self, panel, attribute, row):
         if attribute == "anchor":
-            variable = tk.StringVar(value=str(getattr(model, attribute)))
+            variable = tk.StringVar()
             spinbox = tk.Spinbox(
-                self.frame,
+                panel["frame"],
                 values=("n", "ne", "e", "se", "s", "sw", "w", "nw", "center"),
                 width=6,
                 bg=ENTRY_COLOR,
@@ -220,56 +406,40 @@ class AttributesPanelManager:
                 textvariable=variable
             )
             spinbox.grid(column=1, row=row, sticky="W")
+            self._bind_commit_events(spinbox)
+            self._bind_variables(panel, attribute, variable)
 
-            #force-sync after widget exists
-            self._silent_update = True
-            variable.set(str(getattr(model, attribute)))
-            self._silent_update = False
-
-            self._bind_variables(attribute, variable, model)
-
-    def _compute_maximum_x(self, model):
-        if model.anchor in ["sw", "w", "nw"]:
-            return self.canvas_width - model.width
-        elif model.anchor in ["ne", "e", "se"]:
-            return self.canvas_width
-        elif model.anchor in ["n", "s", "center"]:
-            return self.canvas_width - (model.width // 2)
-        return self.canvas_width
-
-    def _compute_minimum_x(self, model):
-        if model.anchor in ["sw", "w", "nw"]:
-            return 0
-        elif model.anchor in ["ne", "e", "se"]:
-            return model.width
-        elif model.anchor in ["n", "s", "center"]:
-            return model.width // 2
-        return 0
-
-    def _compute_maximum_y(self, model):
-        if model.anchor in ["sw", "s", "se"]:
-            return self.canvas_height
-        elif model.anchor in ["nw", "n", "ne"]:
-            return self.canvas_height - model.height
-        elif model.anchor in ["w", "e", "center"]:
-            return self.canvas_height - (model.height // 2)
-        return self.canvas_height
-
-    def _compute_minimum_y(self, model):
-        if model.anchor in ["sw", "s", "se"]:
-            return model.height
-        elif model.anchor in ["nw", "n", "ne"]:
-            return 0
-        elif model.anchor in ["w", "e", "center"]:
-            return model.height // 2
-        return 0
+    #limits for model.x / model.y that keep the widget inside the canvas, derived from the cached selection bounding box
+    def _compute_position_limits(self, model, attribute):
+        bbox = self.selection_manager.group_bbox() or model.bbox()
+        if attribute == "x":
+            return model.x - bbox[0], model.x + (self.canvas_width - bbox[2])
+        return model.y - bbox[1], model.y + (self.canvas_height - bbox[3])
 
     def _update_spinbox_limits(self, model):
-        if "x" in self._spinboxes:
-            new_min_value = self._compute_minimum_x(model)
-            new_max_value = self._compute_maximum_x(model)
-            self._spinboxes["x"].config(from_=new_min_value, to=new_max_value)
-        if "y" in self._spinboxes:
-            new_min_value = self._compute_minimum_y(model)
-            new_max_value = self._compute_maximum_y(model)
-            self._spinboxes["y"].config(from_=new_min_value, to=new_max_value)
\ No newline at end of file
+        for attribute in ("x", "y"):
+            if attribute in self._spinboxes:
+                new_min_value, new_max_value = self._compute_position_limits(model, attribute)
+                self._panel["limits"][attribute][:] = [new_min_value, new_max_value]
+                self._spinboxes[attribute].config(from_=new_min_value, to=new_max_value)
+
+#attributes shown for a multi-selection: the ones every selected widget type has
+def _common_attributes(widget_types) -> dict:
+    configs = [ATTRIBUTE_CONFIG[widget_type] for widget_type in widget_types]
+    return {
+        attribute: attribute_widget for attribute, attribute_widget in configs[0].items()
+        if attribute not in MULTI_SELECTION_EXCLUDED and all(attribute in config for config in configs[1:])
+    }
+
+#panel text of a value all models share, empty when the values are mixed
+def _common_value(models, attribute: str) -> str:
+    value = getattr(models[0], attribute)
+    if any(getattr(model, attribute) != value for model in models):
+        return ""
+    return _format_value(value)
+
+#text of a model value in the panel (tags are shown space separated)
+def _format_value(value) -> str:
+    if isinstance(value, tuple):
+        return " ".join(value)
+    return str(value)
\ No newline at end of file
@@ -0,0 +1,245 @@
+import itertools
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+from ProjectFile import BINARY_EXTENSION, widget_spec, save_project_specs, read_project_header, load_project
+from Theme import AUTOSAVE_CHECK_INTERVAL, AUTOSAVE_SNAPSHOT_INTERVAL, AUTOSAVE_JOURNAL_LIMIT
+
+#one directory per designer session: the latest snapshot (a binary project file), the journal of the changes made
+#after it and a heartbeat file. the directory is removed when the designer is closed, a leftover one can be recovered
+AUTOSAVE_DIR = os.path.join(os.environ.get("XDG_STATE_HOME") or os.path.join(os.path.expanduser("~"), ".local", "state"), "gui_builder", "autosave")
+SNAPSHOT_NAME = f"snapshot{BINARY_EXTENSION}"
+HEARTBEAT_NAME = "heartbeat"
+
+#sessions without a heartbeat for this long belong to a designer that is no longer running
+STALE_AFTER = 3 * AUTOSAVE_CHECK_INTERVAL / 1000
+
+_session_numbers = itertools.count(1)
+
+#journals every model change of a designer (add, delete, move, attribute change) without blocking the Tk loop:
+#changes are taken from the CommandHistory listener and written as JSON lines by a background thread.
+#snapshots are collected on the Tk thread (as widget specs) and written by the same thread; every snapshot
+#starts a new journal, so snapshot + journal always describe the design even if the process dies mid-write
+class Autosave:
+    def __init__(self, top, history, widget_map, project_settings, theme: dict, directory: str = AUTOSAVE_DIR,
+                 check_interval: int = AUTOSAVE_CHECK_INTERVAL, snapshot_interval: int = AUTOSAVE_SNAPSHOT_INTERVAL, journal_limit: int = AUTOSAVE_JOURNAL_LIMIT,
+                 on_error=None):
+        self.top = top
+        self.history = history              #no snapshot while a transaction is open (its changes are journaled at commit)
+        self.widget_map = widget_map
+        self.project_settings = project_settings    #() -> settings dict of the designer
+        self.theme = theme
+        self.path = os.path.join(directory, f"{os.getpid()}-{next(_session_numbers)}")
+        self.check_interval = check_interval
+        self.snapshot_interval = snapshot_interval
+        self.journal_limit = journal_limit
+        self.on_error = on_error            #(exception) called once on the Tk thread when autosave stopped
+        self.error = None                   #exception of the writer thread, autosave stops writing after it
+
+        self._queue = queue.Queue()         #("entry", entry), ("snapshot", ...), ("heartbeat",), ("close", discard)
+        self._generation = 0                #number of the latest snapshot, its journal has the same number
+        self._changes = 0                   #entries journaled since the latest snapshot
+        self._last_snapshot = time.monotonic()
+        self._compact = threading.Event()   #set by the writer once the journal exceeds journal_limit
+        self._thread = threading.Thread(target=self._write, name="Autosave", daemon=True)
+        self._thread.start()
+
+        history.add_listener(self._record)
+        #the first snapshot stores settings and theme, so even a session without further snapshots can be recovered
+        self.snapshot()
+        self._check_id = top.after(check_interval, self._check)
+
+    #CommandHistory listener (Tk thread): the entry is serialized by the writer thread
+    def _record(self, entry):
+        if self.error is not None:
+            return
+        self._changes += 1
+        self._queue.put(("entry", entry))
+
+    #collect the whole design as widget specs, the writer thread saves it and starts a new journal
+    def snapshot(self):
+        if self.error is not None:
+            return
+        self._generation += 1
+        window_ids, specs = [], []
+        for window_id, model in self.widget_map.items():
+            window_ids.append(window_id)
+            specs.append(widget_spec(model))
+        self._queue.put(("snapshot", self._generation, self.project_settings(), self.theme, specs, window_ids))
+        self._changes = 0
+        self._last_snapshot = time.monotonic()
+        self._compact.clear()
+
+    def _check(self):
+        if self.error is not None:
+            #report once and stop checking, changes after the error are not autosaved
+            self._check_id = None
+            if self.on_error:
+                self.on_error(self.error)
+            return
+        elapsed = (time.monotonic() - self._last_snapshot) * 1000
+        #a snapshot in the middle of a drag would already contain the move the commit journals afterwards
+        due = self._compact.is_set() or (self._changes and elapsed >= self.snapshot_interval)
+        if due and not self.history.in_transaction:
+            self.snapshot()
+        self._queue.put(("heartbeat",))
+        self._check_id = self.top.after(self.check_interval, self._check)
+
+    #stop autosaving; a discarded session is deleted once the queued writes are done
+    def close(self, discard: bool = True, timeout: float = 5.0):
+        if self._check_id is not None:
+            self.top.after_cancel(self._check_id)
+            self._check_id = None
+        self._queue.put(("close", discard))
+        self._thread.join(timeout)
+
+    #----- writer thread -----
+    #after an error the queue is still drained (nothing is written), so close() keeps working
+    def _write(self):
+        journal = None
+        journal_bytes = 0
+        while True:
+            message = self._queue.get()
+            kind = message[0]
+            try:
+                if kind == "close":
+                    if journal is not None:
+                        journal.close()
+                    if message[1]:
+                        shutil.rmtree(self.path, ignore_errors=True)
+                    return
+                if self.error is not None:
+                    continue
+                if kind == "entry":
+                    if journal is not None:
+                        line = json.dumps(_encode(message[1])) + "\n"
+                        journal.write(line)
+                        journal_bytes += len(line)
+                        if journal_bytes > self.journal_limit:
+                            self._compact.set()
+                elif kind == "snapshot":
+                    _, generation, settings, theme, specs, window_ids = message
+                    os.makedirs(self.path, exist_ok=True)
+                    #the previous snapshot and journal stay valid until the new snapshot is complete
+                    snapshot_path = os.path.join(self.path, SNAPSHOT_NAME)
+                    temporary_path = f"{snapshot_path}.tmp"
+                    save_project_specs(temporary_path, settings, theme, specs, binary=True, extra_header={"journal": generation, "window_ids": window_ids})
+                    os.replace(temporary_path, snapshot_path)
+                    if journal is not None:
+                        journal.close()
+                    journal = open(_journal_path(self.path, generation), "w", encoding="utf-8")
+                    journal_bytes = 0
+                    _remove_old_journals(self.path, generation)
+                    _touch(os.path.join(self.path, HEARTBEAT_NAME))
+                elif kind == "heartbeat":
+                    _touch(os.path.join(self.path, HEARTBEAT_NAME))
+                #write in batches: flush once the queue is drained
+                if journal is not None and self._queue.empty():
+                    journal.flush()
+            except Exception as e:
+                self.error = e
+
+#CommandHistory entry as JSON (window_ids refer to the session that wrote the journal)
+def _encode(entry):
+    kind = entry[0]
+    if kind == "move":
+        _, window_ids, dx, dy = entry
+        return ["move", list(window_ids), dx if isinstance(dx, int) else list(dx), dy if isinstance(dy, int) else list(dy)]
+    if kind == "attributes":
+        return ["attributes", [[window_id, attribute, _json_value(new)] for window_id, attribute, _, new in entry[1]]]
+    if kind == "add":
+        return ["add", list(entry[1]), entry[2]]
+    return ["delete", list(entry[1])]
+
+def _json_value(value):
+    return list(value) if isinstance(value, tuple) else value
+
+def _journal_path(path: str, generation: int) -> str:
+    return os.path.join(path, f"journal-{generation}.jsonl")
+
+def _remove_old_journals(path: str, generation: int):
+    current = os.path.basename(_journal_path(path, generation))
+    for name in os.listdir(path):
+        if name.startswith("journal-") and name != current:
+            os.remove(os.path.join(path, name))
+
+def _touch(path: str):
+    with open(path, "a"):
+        pass
+    os.utime(path)
+
+#----- recovery -----
+#sessions of designers that ended without being closed, newest first (running sessions keep their heartbeat fresh)
+def find_sessions(directory: str = AUTOSAVE_DIR) -> list[str]:
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return []
+    now = time.time()
+    sessions = []
+    for name in names:
+        path = os.path.join(directory, name)
+        if os.path.isfile(os.path.join(path, SNAPSHOT_NAME)) and now - session_time(path) > STALE_AFTER:
+            sessions.append(path)
+    return sorted(sessions, key=session_time, reverse=True)
+
+#time of the last write of a session (snapshot, journal or heartbeat)
+def session_time(path: str) -> float:
+    try:
+        return max(os.path.getmtime(os.path.join(path, name)) for name in os.listdir(path))
+    except (OSError, ValueError):
+        return 0.0
+
+#settings and theme of a session (header of its snapshot)
+def read_session_header(path: str) -> dict:
+    return read_project_header(os.path.join(path, SNAPSHOT_NAME))
+
+def discard_session(path: str):
+    shutil.rmtree(path, ignore_errors=True)
+
+#rebuild a session in an empty designer: load the snapshot, then replay the journal written after it
+#returns the number of replayed journal entries
+def recover_session(path: str, widget_manager) -> int:
+    snapshot_path = os.path.join(path, SNAPSHOT_NAME)
+    header = read_project_header(snapshot_path)
+    #window_ids of the old session -> window_ids of the recovered widgets
+    aliases = dict(zip(header.get("window_ids", ()), load_project(snapshot_path, widget_manager)))
+    try:
+        journal = open(_journal_path(path, header.get("journal", 0)), encoding="utf-8")
+    except FileNotFoundError:
+        return 0
+    replayed = 0
+    with journal:
+        for line in journal:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                break   #the last line can be cut off when the process died while writing it
+            _replay(entry, widget_manager, aliases)
+            replayed += 1
+    return replayed
+
+def _replay(entry, widget_manager, aliases: dict):
+    kind = entry[0]
+    if kind == "add":
+        _, window_ids, specs = entry
+        for old_id, new_id in zip(window_ids, widget_manager.add_widgets(specs)):
+            aliases[old_id] = new_id
+    elif kind == "delete":
+        widget_manager.delete_widgets([aliases[i] for i in entry[1] if i in aliases])
+    elif kind == "move":
+        _, window_ids, dx, dy = entry
+        indexes = [index for index, window_id in enumerate(window_ids) if window_id in aliases]
+        widget_manager.move_widgets(
+            [aliases[window_ids[index]] for index in indexes],
+            dx if isinstance(dx, int) else [dx[index] for index in indexes],
+            dy if isinstance(dy, int) else [dy[index] for index in indexes]
+        )
+    elif kind == "attributes":
+        widget_manager.set_attributes([
+            (aliases[window_id], attribute, tuple(value) if isinstance(value, list) else value)
+            for window_id, attribute, value in entry[1] if window_id in aliases
+        ])
\ No newline at end of file
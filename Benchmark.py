@@ -0,0 +1,415 @@
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from SpatialIndex import SpatialIndex
+from DataModels import compute_bbox, LabelWidgetData, EntryWidgetData, ButtonWidgetData
+from ProjectFile import save_project, iter_project_widgets, read_project_header
+from CodeExporter import CodeExporter
+from WidgetStore import WidgetStore
+from HeadlessCanvas import HeadlessCanvas, headless_widget_factory
+from CanvasManager import CanvasManager
+from SelectionManager import SelectionManager
+from FrameScheduler import FrameScheduler
+from WidgetManager import WidgetManager
+from History import CommandHistory
+
+#number of widgets per benchmark run
+WIDGET_COUNTS = (1000, 10000, 50000)
+
+#number of widgets per project file benchmark run
+PROJECT_WIDGET_COUNTS = (1000, 20000)
+
+#number of widgets per widget store memory benchmark run
+STORE_WIDGET_COUNTS = (1000, 10000, 50000)
+
+#number of widgets per code export benchmark run
+EXPORT_WIDGET_COUNTS = (1000, 10000)
+
+#number of widgets per manager benchmark run (headless canvas)
+MANAGER_WIDGET_COUNTS = (100, 1000, 10000, 50000)
+
+#design area the random widgets are scattered on (scaled with the widget count so density stays comparable)
+AREA_PER_WIDGET = 40 * 40
+
+def _time(function, repeat: int = 1) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat
+
+def _random_bboxes(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    side = int((count * AREA_PER_WIDGET) ** 0.5)
+    bboxes = {}
+    for window_id in range(1, count + 1):
+        x, y = rng.randrange(side), rng.randrange(side)
+        width, height = rng.randrange(30, 120), rng.randrange(18, 30)
+        anchor = rng.choice(("nw", "sw", "center"))
+        bboxes[window_id] = compute_bbox(x, y, width, height, anchor)
+    return side, bboxes
+
+#reference implementation: linear scan over every widget (what a canvas query without an index boils down to)
+def _scan_at(bboxes, x, y):
+    topmost = None
+    for window_id, (x0, y0, x1, y1) in bboxes.items():
+        if x0 <= x <= x1 and y0 <= y <= y1:
+            topmost = window_id
+    return topmost
+
+def _scan_enclosed(bboxes, x0, y0, x1, y1):
+    return [i for i, b in bboxes.items() if x0 <= b[0] and y0 <= b[1] and b[2] <= x1 and b[3] <= y1]
+
+def benchmark_spatial_index(counts=WIDGET_COUNTS, queries: int = 1000):
+    results = []
+    for count in counts:
+        side, bboxes = _random_bboxes(count)
+        rng = random.Random(1)
+        points = [(rng.randrange(side), rng.randrange(side)) for _ in range(queries)]
+        rectangles = []
+        for _ in range(queries):
+            x, y = rng.randrange(side), rng.randrange(side)
+            rectangles.append((x, y, x + 300, y + 200))    #typical rubber-band size
+
+        index = SpatialIndex()
+        build = _time(lambda: [index.insert(i, b) for i, b in bboxes.items()])
+
+        #same answers as the linear scan
+        for x, y in points[:50]:
+            assert index.find_at(x, y) == _scan_at(bboxes, x, y)
+        for rectangle in rectangles[:50]:
+            assert index.find_enclosed(*rectangle) == _scan_enclosed(bboxes, *rectangle)
+
+        point = _time(lambda: [index.find_at(x, y) for x, y in points]) / queries
+        enclosed = _time(lambda: [index.find_enclosed(*r) for r in rectangles]) / queries
+        moved = {i: (b[0] + 5, b[1] + 5, b[2] + 5, b[3] + 5) for i, b in bboxes.items()}
+        move = _time(lambda: [index.update(i, b) for i, b in moved.items()]) / count
+        scan_point = _time(lambda: [_scan_at(bboxes, x, y) for x, y in points[:20]]) / 20
+        scan_enclosed = _time(lambda: [_scan_enclosed(bboxes, *r) for r in rectangles[:20]]) / 20
+
+        results.append({
+            "widgets": count,
+            "build_ms": build * 1000,
+            "point_us": point * 1e6,
+            "enclosed_us": enclosed * 1e6,
+            "move_us": move * 1e6,
+            "scan_point_us": scan_point * 1e6,
+            "scan_enclosed_us": scan_enclosed * 1e6
+        })
+    return results
+
+def _random_models(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    models = []
+    for i in range(count):
+        model_class = rng.choice((LabelWidgetData, EntryWidgetData, ButtonWidgetData))
+        model = model_class(x=rng.randrange(2000), y=rng.randrange(2000), bg="#404040", fg="#FFFFFF", width=rng.randrange(30, 120), height=rng.randrange(18, 30))
+        model.id = f"{model.type.lower()}{i}"
+        if hasattr(model, "text"):
+            model.text = f"Text {i}"
+        models.append(model)
+    return models
+
+#save and stream-load project files in both forms (reading only, the Tk side is not part of this benchmark)
+def benchmark_project_io(counts=PROJECT_WIDGET_COUNTS):
+    results = []
+    settings = {"title": "Benchmark", "width": 2000, "height": 2000, "grid_size": 10}
+    theme = {"background": {"bg": "#404040"}}
+    with tempfile.TemporaryDirectory() as directory:
+        for count in counts:
+            models = _random_models(count)
+            for form, extension in (("json", ".json"), ("binary", ".gbp")):
+                path = os.path.join(directory, f"project{count}{extension}")
+                save = _time(lambda: save_project(path, settings, theme, models))
+
+                load = _time(lambda: (read_project_header(path), sum(1 for _ in iter_project_widgets(path))))
+
+                #peak memory while streaming stays independent of the file size
+                tracemalloc.start()
+                loaded = sum(1 for _ in iter_project_widgets(path))
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                assert loaded == count
+
+                results.append({
+                    "widgets": count,
+                    "form": form,
+                    "size_kb": os.path.getsize(path) / 1024,
+                    "save_ms": save * 1000,
+                    "load_ms": load * 1000,
+                    "load_peak_kb": peak / 1024
+                })
+    return results
+
+def _traced_bytes(build) -> int:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return after - before
+
+#memory per widget: dataclass models wrapped in {"model", "widget"} dicts vs. the columnar WidgetStore with views
+def benchmark_widget_store(counts=STORE_WIDGET_COUNTS):
+    results = []
+    for count in counts:
+        models = _random_models(count)
+        specs = [(m.type, m.id, m.x, m.y, m.width, m.height, m.anchor, m.bg, m.fg, getattr(m, "text", "")) for m in models]
+        del models
+
+        def build_dicts():
+            widget_map = {}
+            for window_id, (widget_type, widget_id, x, y, width, height, anchor, bg, fg, text) in enumerate(specs, start=1):
+                model_class = {"Label": LabelWidgetData, "Entry": EntryWidgetData, "Button": ButtonWidgetData}[widget_type]
+                model = model_class(id=widget_id, x=x, y=y, width=width, height=height, anchor=anchor, bg=bg, fg=fg)
+                if widget_type != "Entry":
+                    model.text = text
+                widget_map[window_id] = {"model": model, "widget": None}
+            return widget_map
+
+        def build_store():
+            store = WidgetStore()
+            for window_id, (widget_type, widget_id, x, y, width, height, anchor, bg, fg, text) in enumerate(specs, start=1):
+                model_class = {"Label": LabelWidgetData, "Entry": EntryWidgetData, "Button": ButtonWidgetData}[widget_type]
+                model = model_class(id=widget_id, x=x, y=y, width=width, height=height, anchor=anchor, bg=bg, fg=fg)
+                if widget_type != "Entry":
+                    model.text = text
+                store.add(window_id, model, None)
+            return store
+
+        dict_bytes = _traced_bytes(build_dicts)
+        store_bytes = _traced_bytes(build_store)
+
+        #geometry walk over all widgets: model attributes vs. store columns
+        widget_map, store = build_dicts(), build_store()
+        walk_dicts = _time(lambda: sum(entry["model"].x + entry["model"].width for entry in widget_map.values()))
+        walk_columns = _time(lambda: sum(store.xs) + sum(store.widths))
+
+        results.append({
+            "widgets": count,
+            "dicts_b_per_widget": dict_bytes / count,
+            "store_b_per_widget": store_bytes / count,
+            "walk_dicts_ms": walk_dicts * 1000,
+            "walk_columns_ms": walk_columns * 1000
+        })
+    return results
+
+#full export vs. re-export after editing a single widget
+def benchmark_code_export(counts=EXPORT_WIDGET_COUNTS):
+    results = []
+    settings = {"title": "Benchmark", "width": 2000, "height": 2000}
+    theme = {"background": {"bg": "#404040"}}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "export.py")
+        for count in counts:
+            widget_map = WidgetStore()
+            for window_id, model in enumerate(_random_models(count), start=1):
+                widget_map.add(window_id, model, None)
+            exporter = CodeExporter()
+            full = _time(lambda: exporter.export(path, settings, theme, widget_map))
+            compile(open(path, encoding="utf-8").read(), path, "exec")
+
+            widget_map.model(count // 2).x += 1
+            incremental = _time(lambda: exporter.export(path, settings, theme, widget_map))
+            regenerated = exporter.last_generated
+            unchanged = _time(lambda: exporter.export(path, settings, theme, widget_map))
+            results.append({
+                "widgets": count,
+                "full_ms": full * 1000,
+                "one_edit_ms": incremental * 1000,
+                "unchanged_ms": unchanged * 1000,
+                "regenerated": regenerated
+            })
+    return results
+
+#the core managers wired to a HeadlessCanvas the same way Designer wires them to a tk.Canvas
+def _headless_designer(side: int):
+    canvas_manager = CanvasManager(None, side, side, "#404040", 10, "#808080", canvas_factory=HeadlessCanvas)
+    canvas = canvas_manager.create_canvas()
+    spatial_index = SpatialIndex()
+    history = CommandHistory()
+    viewport = canvas_manager.viewport
+    scheduler = FrameScheduler(canvas)
+    selection_manager = SelectionManager(canvas, spatial_index, history, viewport=viewport, scheduler=scheduler)
+    clamped_delta = lambda dx, dy: selection_manager.clamped_delta(dx, dy, side, side)
+    widget_manager = WidgetManager(
+        canvas, canvas, {"label": {"bg": "#404040", "fg": "#FFFFFF"}, "entry": {"bg": "#FFFFFF", "fg": "#000000"}, "button": {"bg": "#404040", "fg": "#FFFFFF"}},
+        selection_manager, spatial_index, lambda: None, clamped_delta,
+        history=history, canvas_width=side, canvas_height=side, widget_factory=headless_widget_factory, viewport=viewport
+    )
+    viewport.add_listener(lambda: (selection_manager.schedule_refresh(), widget_manager.materializer.schedule()))
+
+    def _move_selection(dx, dy):
+        dx, dy = clamped_delta(dx, dy)
+        selection_manager.move_selected(dx, dy, widget_manager.widget_map)
+
+    canvas_manager.bind_events(
+        lambda e: None,
+        {
+            "press": selection_manager.handle_canvas_press,
+            "drag": selection_manager.handle_canvas_drag,
+            "release": lambda e: selection_manager.handle_canvas_release(e, widget_manager.materializer.schedule)
+        },
+        _move_selection, widget_manager.delete_selected_widgets, widget_manager.undo, widget_manager.redo
+    )
+    return canvas, selection_manager, widget_manager
+
+#run one scenario, returns its time and the canvas calls it caused
+def _scenario(canvas, function) -> dict:
+    canvas.reset_counts()
+    duration = _time(function)
+    return {
+        "ms": duration * 1000,
+        "canvas_calls": sum(canvas.calls.values()),
+        "batched_commands": sum(canvas.batched_commands.values()),
+        "calls": dict(canvas.calls)
+    }
+
+#add, rubber-band select, drag, nudge, snap, align, batch edit, zoom, paste (and its undo) and delete on the headless canvas
+def benchmark_managers(counts=MANAGER_WIDGET_COUNTS, drag_motions: int = 60, nudges: int = 20):
+    results = []
+    for count in counts:
+        rng = random.Random(0)
+        side = int((count * AREA_PER_WIDGET) ** 0.5)
+        specs = [
+            {"type": rng.choice(("label", "entry", "button")), "x": rng.randrange(side - 160), "y": rng.randrange(30, side), "text": f"Text {i}"}
+            for i in range(count)
+        ]
+        canvas, selection_manager, widget_manager = _headless_designer(side)
+        scenarios = {}
+
+        def _add():
+            widget_manager.add_widgets(specs)
+            canvas.run_idle()    #measurement pass
+        scenarios["add"] = _scenario(canvas, _add)
+
+        #rubber band over the whole design
+        def _rubber_band():
+            canvas.event_generate("<ButtonPress-1>", x=0, y=0)
+            for step in range(1, 11):
+                canvas.event_generate("<B1-Motion>", x=side * step // 10, y=side * step // 10)
+            canvas.event_generate("<ButtonRelease-1>", x=side, y=side)
+            canvas.run_idle()    #materialize the selection
+        scenarios["rubber_band"] = _scenario(canvas, _rubber_band)
+        selected = len(selection_manager.selected_ids())
+        real_widgets = widget_manager.materializer.real_count()
+
+        #drag the selection by one of its widgets, one frame per two motion events
+        def _drag():
+            widget = widget_manager.widget_map.widget(selection_manager.last_selected_id())
+            widget.event_generate("<Button-1>", x_root=0, y_root=0)
+            for motion in range(1, drag_motions + 1):
+                widget.event_generate("<B1-Motion>", x_root=-(motion % 3), y_root=motion % 2)
+                if motion % 2 == 0:
+                    canvas.run_idle()
+            widget.event_generate("<ButtonRelease-1>")
+        scenarios["drag"] = _scenario(canvas, _drag)
+
+        def _nudge():
+            for nudge in range(nudges):
+                canvas.event_generate("<Right>" if nudge % 2 else "<Left>")
+                canvas.run_idle()
+        scenarios["nudge"] = _scenario(canvas, _nudge)
+
+        #the outlines are redrawn in the next frame, run_idle includes it in the measurement
+        scenarios["snap"] = _scenario(canvas, lambda: (widget_manager.snap_to_grid(10), canvas.run_idle()))
+        scenarios["align"] = _scenario(canvas, lambda: (widget_manager.align("left"), canvas.run_idle()))
+
+        #one attributes panel edit applied to the whole selection
+        def _edit():
+            widget_manager.apply_attributes(sorted(selection_manager.selected_ids()), {"height": 30, "bg": "#202020"})
+            canvas.run_idle()
+        scenarios["edit"] = _scenario(canvas, _edit)
+
+        #zoom out (every widget becomes a proxy) and back to 100%
+        def _zoom():
+            widget_manager.viewport.zoom_to(0.5)
+            canvas.run_idle()
+            widget_manager.viewport.zoom_to(1.0)
+            canvas.run_idle()
+        scenarios["zoom"] = _scenario(canvas, _zoom)
+
+        #copy the selection and paste it once (one bulk add and one undo step), the clones are selected afterwards
+        def _paste():
+            widget_manager.copy_selected()
+            widget_manager.paste()
+            canvas.run_idle()
+        scenarios["paste"] = _scenario(canvas, _paste)
+        #the paste is a single undo step
+        scenarios["undo_paste"] = _scenario(canvas, lambda: (widget_manager.undo(), canvas.run_idle()))
+        selection_manager.select_items(sorted(widget_manager.widget_map))
+        canvas.run_idle()
+
+        def _delete():
+            widget_manager.delete_widgets(sorted(selection_manager.selected_ids()))
+            selection_manager.clear()
+        scenarios["delete"] = _scenario(canvas, _delete)
+        assert not widget_manager.widget_map
+
+        results.append({"widgets": count, "selected": selected, "real_widgets": real_widgets, "scenarios": scenarios})
+    return results
+
+#one row per (widget count, scenario) for the console table
+def _manager_rows(results):
+    return [
+        {"widgets": result["widgets"], "scenario": name, "ms": scenario["ms"], "canvas_calls": scenario["canvas_calls"], "batched_commands": scenario["batched_commands"]}
+        for result in results for name, scenario in result["scenarios"].items()
+    ]
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _print_table(title: str, rows):
+    print(title)
+    columns = list(rows[0])
+    print("  ".join(f"{column:>16}" for column in columns))
+    for row in rows:
+        print("  ".join(f"{row[column]:>16.2f}" if isinstance(row[column], float) else f"{row[column]:>16}" for column in columns))
+    print()
+
+#benchmark name -> (title, function, table rows of the results)
+BENCHMARKS = {
+    "spatial_index": ("Spatial index (hit-testing and rectangle selection)", benchmark_spatial_index, None),
+    "project_io": ("Project files (save and streaming load)", benchmark_project_io, None),
+    "code_export": ("Code export (full, after one edit and unchanged)", benchmark_code_export, None),
+    "widget_store": ("Widget store (memory per widget and geometry walk)", benchmark_widget_store, None),
+    "managers": ("Managers on the headless canvas (time and canvas calls per scenario)", benchmark_managers, _manager_rows)
+}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks for the GUI Builder data structures and managers")
+    parser.add_argument("benchmarks", nargs="*", help=f"benchmarks to run: {', '.join(BENCHMARKS)} (default: all)")
+    parser.add_argument("--json", metavar="PATH", help="also write timings and call counts to a JSON file")
+    arguments = parser.parse_args(argv)
+    for name in arguments.benchmarks:
+        if name not in BENCHMARKS:
+            parser.error(f"unknown benchmark: {name}")
+
+    report = {
+        "commit": _git_commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "results": {}
+    }
+    for name in arguments.benchmarks or BENCHMARKS:
+        title, function, rows = BENCHMARKS[name]
+        results = function()
+        report["results"][name] = results
+        _print_table(title, rows(results) if rows else results)
+
+    if arguments.json:
+        with open(arguments.json, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,24 @@
+import re
+from functools import lru_cache
+
+_PLAIN_WORD = re.compile(r"[\w.#-]+")
+_SPECIAL_CHARACTERS = re.compile(r'([\\"$\[\]{};])')
+
+#send many canvas commands to Tcl in one round trip instead of one tkinter call per item
+#commands: iterable of tuples like ("coords", item_id, x, y) or ("itemconfigure", item_id, "-outline", color)
+def run_batch(canvas, commands):
+    prefix = canvas._w + " "
+    script = "\n".join(prefix + " ".join([str(a) if type(a) is int else _tcl_word(a) for a in command]) for command in commands)
+    if script:
+        canvas.tk.eval(script)
+
+#numbers and plain words are passed as they are, everything else is quoted so spaces and $[]{} stay literal
+#(the same few strings, like command names and colors, repeat in every batch)
+@lru_cache(maxsize=1024)
+def _tcl_word(value) -> str:
+    if isinstance(value, (int, float)):
+        return str(value)
+    value = str(value)
+    if _PLAIN_WORD.fullmatch(value):
+        return value
+    return '"' + _SPECIAL_CHARACTERS.sub(r"\\\1", value) + '"'
\ No newline at end of file
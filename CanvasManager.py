@@ -1,20 +1,37 @@
+import math
 import tkinter as tk
-from Theme import NUDGE_SMALL, NUDGE_BIG
+from fractions import Fraction
+from Theme import NUDGE_SMALL, NUDGE_BIG, GRID_TAG, GRID_MIN_SPACING, GRID_MAX_TILE_CELLS, SCROLL_STEP
+from Tracing import traced
+from Viewport import Viewport
 
 class CanvasManager:
-    def __init__(self, parent: tk.Frame, width: int, height: int, bg_color: str, grid_size: int, grid_color: str):
+    def __init__(self, parent: tk.Frame, width: int, height: int, bg_color: str, grid_size: int, grid_color: str, canvas_factory=tk.Canvas, tracer=None, design_width: int = None, design_height: int = None):
         self.parent  = parent
-        self.width = width
+        self.width = width      #size of the canvas window
         self.height = height
+        self.design_width = design_width if design_width is not None else width     #size of the designed window (scroll region at 100%)
+        self.design_height = design_height if design_height is not None else height
         self.bg_color = bg_color
         self.grid_size = grid_size
         self.grid_color = grid_color
+        self.canvas_factory = canvas_factory    #tk.Canvas or a stand-in backend such as HeadlessCanvas
+        self.tracer = tracer                    #EventTracer or None (handlers are bound untraced)
         self.canvas = None
-        self.grid_lines = []
+        self.viewport = None
         self.show_grid = False
 
+        #the grid is a single image item that is hidden instead of deleted
+        self._grid_item = None
+        self._grid_images = {}      #(grid spacing in pixels as a Fraction, grid_color, width, height) -> tk.PhotoImage
+
+        #last pointer position of a pan gesture (middle mouse button)
+        self._pan_last = None
+
     def create_canvas(self):
-        self.canvas = tk.Canvas(self.parent, width=self.width, height=self.height, bg=self.bg_color, highlightthickness=0)
+        self.canvas = self.canvas_factory(self.parent, width=self.width, height=self.height, bg=self.bg_color, highlightthickness=0, xscrollincrement=1, yscrollincrement=1)
+        self.viewport = Viewport(self.canvas, self.design_width, self.design_height)
+        self.viewport.add_listener(self.update_grid)
         return self.canvas
 
     def pack_canvas(self):
@@ -27,39 +44,129 @@ class CanvasManager:
         else:
             self.clear_grid()
 
+    #the grid is drawn in screen space: one window-sized image that is placed on the grid tile under the top left corner of the view
+    #the spacing is kept exact (e.g. 7.5 px at 75%), so the drawn grid stays on the design grid that snap_to_grid uses:
+    #a tile spans as many cells as it takes to end on a whole pixel (2 cells of 7.5 px), lines inside it are rounded
     def draw_grid(self):
-        for x in range(0, self.width, self.grid_size):
-            line = self.canvas.create_line(x, 0, x, self.height, fill=self.grid_color)
-            self.grid_lines.append(line)
-        for y in range(0, self.height, self.grid_size):
-            line = self.canvas.create_line(0, y, self.width, y, fill=self.grid_color)
-            self.grid_lines.append(line)
+        spacing = Fraction(self.grid_size) * Fraction(self.viewport.scale)
+        if spacing < GRID_MIN_SPACING or spacing.denominator > GRID_MAX_TILE_CELLS:
+            #too dense to be useful when zoomed out this far (or a scale that gives no whole-pixel tile)
+            self.clear_grid()
+            return
+        image = self._get_grid_image(spacing)
+        period = spacing.numerator     #tile size in pixels, a whole number of cells
+        x = math.floor(self.canvas.canvasx(0) / period) * period
+        y = math.floor(self.canvas.canvasy(0) / period) * period
+        if self._grid_item is None:
+            self._grid_item = self.canvas.create_image(x, y, image=image, anchor="nw", tags=(GRID_TAG,))
+        else:
+            self.canvas.coords(self._grid_item, x, y)
+            self.canvas.itemconfig(self._grid_item, image=image, state="normal")
+        #keep grid below every widget and outline
+        self.canvas.tag_lower(self._grid_item)
+
+    #follow pan and zoom
+    def update_grid(self):
+        if self.show_grid:
+            self.draw_grid()
 
     def clear_grid(self):
-        for line in self.grid_lines:
-            self.canvas.delete(line)
-        self.grid_lines.clear()
+        if self._grid_item is not None:
+            self.canvas.itemconfig(self._grid_item, state="hidden")
+
+    #render the grid once per (spacing, color, canvas size) by tiling a single grid tile
+    #the image is one tile larger than the window, so it still covers the window when it is aligned to the grid
+    def _get_grid_image(self, spacing: Fraction):
+        period = spacing.numerator
+        width, height = self.width + period, self.height + period
+        key = (spacing, self.grid_color, width, height)
+        image = self._grid_images.get(key)
+        if image is None:
+            #grid lines on the top and left edge of every cell of the tile, everything else stays transparent
+            tile = tk.PhotoImage(master=self.canvas, width=period, height=period)
+            for cell in range(spacing.denominator):
+                offset = round(cell * spacing)
+                tile.put(self.grid_color, to=(0, offset, period, offset + 1))
+                tile.put(self.grid_color, to=(offset, 0, offset + 1, period))
 
-    def bind_events(self, context_menu_callback, selection_callbacks, move_callback, delete_callback):
+            #copy with a target region larger than the source tiles the source
+            image = tk.PhotoImage(master=self.canvas, width=width, height=height)
+            image.tk.call(image, "copy", tile, "-to", 0, 0, width, height)
+            self._grid_images[key] = image
+        return image
+
+    def bind_events(self, context_menu_callback, selection_callbacks, move_callback, delete_callback, undo_callback, redo_callback, clipboard_callbacks=None):
         #set focus on canvas when user clicks anywhere on canvas
-        self.canvas.bind("<Button-1>", lambda e: self.canvas.focus_set())
+        self._bind("<Button-1>", lambda e: self.canvas.focus_set())
         #bind context menu to right click
-        self.canvas.bind("<Button-3>", context_menu_callback)
+        self._bind("<Button-3>", context_menu_callback)
 
         #bind rectangle selection events
-        self.canvas.bind("<ButtonPress-1>", selection_callbacks["press"])
-        self.canvas.bind("<B1-Motion>", selection_callbacks["drag"])
-        self.canvas.bind("<ButtonRelease-1>", selection_callbacks["release"])
+        self._bind("<ButtonPress-1>", selection_callbacks["press"])
+        self._bind("<B1-Motion>", selection_callbacks["drag"])
+        self._bind("<ButtonRelease-1>", selection_callbacks["release"])
 
         #binds events to move selected widgets
-        self.canvas.bind("<Left>", lambda e: move_callback(-NUDGE_SMALL, 0))
-        self.canvas.bind("<Right>", lambda e: move_callback(NUDGE_SMALL, 0))
-        self.canvas.bind("<Up>", lambda e: move_callback(0, -NUDGE_SMALL))
-        self.canvas.bind("<Down>", lambda e: move_callback(0, NUDGE_SMALL))
-        self.canvas.bind("<Shift-Left>", lambda e: move_callback(-NUDGE_BIG, 0))
-        self.canvas.bind("<Shift-Right>", lambda e: move_callback(NUDGE_BIG, 0))
-        self.canvas.bind("<Shift-Up>", lambda e: move_callback(0, -NUDGE_BIG))
-        self.canvas.bind("<Shift-Down>", lambda e: move_callback(0, NUDGE_BIG))
+        self._bind("<Left>", lambda e: move_callback(-NUDGE_SMALL, 0))
+        self._bind("<Right>", lambda e: move_callback(NUDGE_SMALL, 0))
+        self._bind("<Up>", lambda e: move_callback(0, -NUDGE_SMALL))
+        self._bind("<Down>", lambda e: move_callback(0, NUDGE_SMALL))
+        self._bind("<Shift-Left>", lambda e: move_callback(-NUDGE_BIG, 0))
+        self._bind("<Shift-Right>", lambda e: move_callback(NUDGE_BIG, 0))
+        self._bind("<Shift-Up>", lambda e: move_callback(0, -NUDGE_BIG))
+        self._bind("<Shift-Down>", lambda e: move_callback(0, NUDGE_BIG))
 
         #delete selected widgets
-        self.canvas.bind("<Delete>", lambda e: delete_callback())
\ No newline at end of file
+        self._bind("<Delete>", lambda e: delete_callback())
+
+        #undo / redo
+        self._bind("<Control-z>", lambda e: undo_callback())
+        self._bind("<Control-y>", lambda e: redo_callback())
+        self._bind("<Control-Z>", lambda e: redo_callback())     #Ctrl+Shift+Z
+
+        #copy / paste / duplicate the selection
+        if clipboard_callbacks:
+            self._bind("<Control-c>", lambda e: clipboard_callbacks["copy"]())
+            self._bind("<Control-v>", lambda e: clipboard_callbacks["paste"]())
+            self._bind("<Control-d>", lambda e: clipboard_callbacks["duplicate"]())
+
+        #pan with the middle mouse button or the mouse wheel (Shift = horizontal), zoom with Ctrl + mouse wheel
+        self._bind("<ButtonPress-2>", self._start_pan)
+        self._bind("<B2-Motion>", self._pan)
+        self._bind("<ButtonRelease-2>", self._end_pan)
+        self._bind("<MouseWheel>", lambda e: self.viewport.pan(0, -SCROLL_STEP * _wheel_steps(e)))
+        self._bind("<Shift-MouseWheel>", lambda e: self.viewport.pan(-SCROLL_STEP * _wheel_steps(e), 0))
+        self._bind("<Control-MouseWheel>", lambda e: self.viewport.zoom_step(_wheel_steps(e), e.x, e.y))
+        #X11 reports the mouse wheel as buttons 4 and 5
+        self._bind("<Button-4>", lambda e: self.viewport.pan(0, -SCROLL_STEP))
+        self._bind("<Button-5>", lambda e: self.viewport.pan(0, SCROLL_STEP))
+        self._bind("<Shift-Button-4>", lambda e: self.viewport.pan(-SCROLL_STEP, 0))
+        self._bind("<Shift-Button-5>", lambda e: self.viewport.pan(SCROLL_STEP, 0))
+        self._bind("<Control-Button-4>", lambda e: self.viewport.zoom_step(1, e.x, e.y))
+        self._bind("<Control-Button-5>", lambda e: self.viewport.zoom_step(-1, e.x, e.y))
+        #keyboard zoom around the top left corner of the view
+        self._bind("<Control-plus>", lambda e: self.viewport.zoom_step(1))
+        self._bind("<Control-minus>", lambda e: self.viewport.zoom_step(-1))
+        self._bind("<Control-0>", lambda e: self.viewport.zoom_to(1.0))
+
+    def _start_pan(self, event):
+        self._pan_last = (event.x, event.y)
+
+    def _pan(self, event):
+        if self._pan_last is None:
+            return
+        x, y = self._pan_last
+        self._pan_last = (event.x, event.y)
+        self.viewport.pan(x - event.x, y - event.y)
+
+    def _end_pan(self, event):
+        self._pan_last = None
+
+    #bind a canvas event, traced when a tracer is set
+    def _bind(self, sequence: str, handler):
+        self.canvas.bind(sequence, traced(self.tracer, f"canvas {sequence}", handler))
+#number of mouse wheel notches of an event (positive = away from the user); Windows reports multiples of 120
+def _wheel_steps(event) -> int:
+    if abs(event.delta) >= 120:
+        return event.delta // 120
+    return 1 if event.delta > 0 else -1
\ No newline at end of file
@@ -0,0 +1,103 @@
+import keyword
+import os
+import re
+from ProjectFile import widget_spec
+
+#Tkinter class used in the generated code for each widget type
+EXPORT_CLASSES = {"label": "tk.Label", "entry": "tk.Entry", "button": "tk.Button"}
+
+#turns the widget models into a runnable Tkinter module using place(); generated fragments are
+#cached per widget and only regenerated when the widget changed (its WidgetStore revision) since the last export
+class CodeExporter:
+    def __init__(self):
+        self._fragments = {}    #window_id -> ((revision, variable name), generated code)
+        self._written = None    #(path, header, file stat) of the last export, an unchanged design is not written again
+        self.last_generated = 0
+        self.last_reused = 0
+
+    #write the module to path, widget_map: WidgetStore
+    def export(self, path: str, settings: dict, theme: dict, widget_map):
+        names = set()
+        generated = reused = 0
+        fragments = {}
+        ids = widget_map.ids
+
+        for window_id in widget_map:
+            slot = widget_map.slot(window_id)
+            key = (widget_map.revisions[slot], self._variable_name(ids[slot], names))
+            cached = self._fragments.get(window_id)
+            if cached and cached[0] == key:
+                reused += 1
+            else:
+                model = widget_map.model(window_id)
+                #the generated code places every widget with its current (also measured) size
+                cached = (key, self._widget_fragment(key[1], dict(widget_spec(model), width=model.width, height=model.height)))
+                generated += 1
+            fragments[window_id] = cached
+
+        header = self._header(settings, theme)
+        #same widgets in the same order, nothing regenerated and the file is still the one written last time
+        unchanged = (
+            not generated and list(fragments) == list(self._fragments)
+            and self._written == (path, header, _file_stat(path))
+        )
+        #fragments of deleted widgets are dropped with the old cache
+        self._fragments = fragments
+        self.last_generated, self.last_reused = generated, reused
+        if unchanged:
+            return
+
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(header)
+            file.writelines(fragment for _, fragment in fragments.values())
+            file.write(self._footer())
+        self._written = (path, header, _file_stat(path))
+
+    @staticmethod
+    def _header(settings: dict, theme: dict) -> str:
+        return (
+            "import tkinter as tk\n"
+            "\n"
+            "root = tk.Tk()\n"
+            f"root.title({settings.get('title', '')!r})\n"
+            f"root.geometry('{settings['width']}x{settings['height']}')\n"
+            f"root.configure(bg={theme['background']['bg']!r})\n"
+            "\n"
+        )
+
+    @staticmethod
+    def _footer() -> str:
+        return "\nroot.mainloop()\n"
+
+    @staticmethod
+    def _widget_fragment(name: str, spec: dict) -> str:
+        options = ""
+        if "text" in spec:
+            options += f", text={spec['text']!r}"
+        options += f", bg={spec['bg']!r}, fg={spec['fg']!r}"
+        return (
+            f"{name} = {EXPORT_CLASSES[spec['type']]}(root{options})\n"
+            f"{name}.place(x={spec['x']}, y={spec['y']}, anchor={spec['anchor']!r}, width={spec['width']}, height={spec['height']})\n"
+        )
+
+    #valid and unique Python identifier for a widget name
+    @staticmethod
+    def _variable_name(widget_id: str, names: set) -> str:
+        #generated names (label1, button2, ...) are valid identifiers already
+        name = widget_id if widget_id and widget_id.isidentifier() else re.sub(r"\W", "_", widget_id or "widget")
+        if name[0].isdigit() or keyword.iskeyword(name) or name in ("tk", "root"):
+            name = f"_{name}"
+        unique_name, suffix = name, 2
+        while unique_name in names:
+            unique_name = f"{name}_{suffix}"
+            suffix += 1
+        names.add(unique_name)
+        return unique_name
+
+#size and modification time of a file (None if it does not exist)
+def _file_stat(path: str):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
\ No newline at end of file
@@ -1,6 +1,25 @@
 from dataclasses import dataclass, field
 from typing import List, Optional
 
+#all anchor values (their index is used as compact anchor code in the widget store and binary project files)
+ANCHORS = ("nw", "n", "ne", "w", "center", "e", "sw", "s", "se")
+
+#horizontal and vertical offset of the anchor point in half widths/heights (0 = left/top, 1 = center, 2 = right/bottom)
+ANCHOR_OFFSETS = {
+    "nw": (0, 0), "n": (1, 0), "ne": (2, 0),
+    "w": (0, 1), "center": (1, 1), "e": (2, 1),
+    "sw": (0, 2), "s": (1, 2), "se": (2, 2)
+}
+ANCHOR_CODE_OFFSETS = tuple(ANCHOR_OFFSETS[anchor] for anchor in ANCHORS)    #same offsets, indexed by anchor code
+
+#compute the bounding box of a window item the same way the canvas does, without asking Tcl
+def compute_bbox(x: int, y: int, width: int, height: int, anchor: str) -> tuple[int, int, int, int]:
+    width, height = width or 0, height or 0
+    offset_x, offset_y = ANCHOR_OFFSETS.get(anchor, (1, 1))
+    x0 = x - (width * offset_x) // 2
+    y0 = y - (height * offset_y) // 2
+    return x0, y0, x0 + width, y0 + height
+
 class IdCounters:
     label = 1
     entry = 1
@@ -16,6 +35,11 @@ class BaseWidgetData:
     width: int = None
     height: int = None
     anchor: str = "sw"
+    tags: tuple = ()    #user tags for query-based selection
+    sized: tuple = ()   #"width" and/or "height" when set explicitly, otherwise the size follows the text
+
+    def bbox(self) -> tuple[int, int, int, int]:
+        return compute_bbox(self.x, self.y, self.width, self.height, self.anchor)
 
 @dataclass
 class LabelWidgetData(BaseWidgetData):
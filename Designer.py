@@ -1,15 +1,24 @@
+import os
+import re
 import tkinter as tk
+from tkinter import filedialog, messagebox, simpledialog
 from CanvasManager import CanvasManager
 from SelectionManager import SelectionManager
 from ToolbarManager import ToolbarManager
 from WidgetManager import WidgetManager
 from AttributesPanelManager import AttributesPanelManager
+from SpatialIndex import SpatialIndex
+from History import CommandHistory
+from CodeExporter import CodeExporter
+from Tracing import EventTracer
+from FrameScheduler import FrameScheduler
+from Autosave import Autosave, read_session_header, recover_session, discard_session
+from ProjectFile import PROJECT_FILETYPES, ProjectFileError, save_project, load_project, read_project_header
 from DataModels import *
 from Theme import *
-from PIL import ImageTk
 
 class Designer:
-    def __init__(self, parent: tk.Tk, title: str, canvas_width: int, canvas_height: int, title_bar_height: int, toolbar_height: int, theme: dict, icon: ImageTk.PhotoImage):
+    def __init__(self, parent: tk.Tk, title: str, canvas_width: int, canvas_height: int, title_bar_height: int, toolbar_height: int, theme: dict, icon: tk.PhotoImage):
         self.parent = parent
         self.title = title
         self.canvas_width = canvas_width
@@ -32,7 +41,11 @@ class Designer:
 
         #create window
         self.top = tk.Toplevel(parent)
-        self.top.geometry(f"{self.canvas_width}x{(self.canvas_height + self.title_bar_height + self.toolbar_height)}")
+
+        #size of the canvas window, designs larger than the screen are panned and zoomed (see Viewport)
+        self.view_width = min(self.canvas_width, self.top.winfo_screenwidth() - ATTRIBUTES_PANEL_WIDTH - VIEWPORT_SCREEN_MARGIN)
+        self.view_height = min(self.canvas_height, self.top.winfo_screenheight() - self.title_bar_height - self.toolbar_height - VIEWPORT_SCREEN_MARGIN)
+        self.top.geometry(f"{self.view_width}x{(self.view_height + self.title_bar_height + self.toolbar_height)}")
 
         #create title bar
         self._create_title_bar()
@@ -41,7 +54,7 @@ class Designer:
         self.main_frame = tk.Frame(self.top, bg=self.theme["background"]["bg"])
 
         #create canvas frame
-        self.canvas_frame = tk.Frame(self.main_frame, width=self.canvas_width, height=self.canvas_height, bg=self.theme["background"]["bg"])
+        self.canvas_frame = tk.Frame(self.main_frame, width=self.view_width, height=self.view_height, bg=self.theme["background"]["bg"])
         self.canvas_frame.pack(side="left", anchor="nw")
         self.canvas_frame.pack_propagate(False) #keep fixed size
 
@@ -50,20 +63,39 @@ class Designer:
         self.attributes_panel_frame.pack_propagate(False)
         self.attributes_panel_frame.grid_propagate(False)
 
+        #opt-in latency tracing of the event handlers
+        self.tracer = EventTracer() if EVENT_TRACING or os.environ.get("GUI_BUILDER_TRACE") == "1" else None
+
         #create instance of CanvasManager
         self.canvas_manager = CanvasManager(
             parent=self.canvas_frame,
-            width=canvas_width,
-            height=canvas_height,
+            width=self.view_width,
+            height=self.view_height,
             bg_color=self.theme["background"]["bg"],
             grid_size=GRID_SIZE,
-            grid_color=GRID_COLOR
+            grid_color=GRID_COLOR,
+            tracer=self.tracer,
+            design_width=canvas_width,
+            design_height=canvas_height
         )
 
         self.canvas = self.canvas_manager.create_canvas()
+        #view transform between design and canvas coordinates, shared by all managers
+        self.viewport = self.canvas_manager.viewport
+        if self.tracer:
+            self.tracer.attach(self.canvas)
+
+        #model-side index of widget bounding boxes used for hit-testing and rectangle selection
+        self.spatial_index = SpatialIndex()
+
+        #undo/redo log shared by all managers that change the design
+        self.history = CommandHistory()
+
+        #outlines and panel fields marked dirty by the managers are updated once per frame
+        self.scheduler = FrameScheduler(self.top, self.tracer)
 
         #create instance of SelectionManager to store selected widgets
-        self.selection_manager = SelectionManager(self.canvas)
+        self.selection_manager = SelectionManager(self.canvas, self.spatial_index, self.history, tracer=self.tracer, viewport=self.viewport, scheduler=self.scheduler)
 
         #create instance of WidgetManager to store created widgets
         self.widget_manager = WidgetManager(
@@ -71,21 +103,35 @@ class Designer:
             self.canvas,
             self.theme,
             self.selection_manager,
+            self.spatial_index,
             self._on_selection_changed,
             self._group_clamped_delta,
             panel_update=lambda model:
-            self.attributes_panel_manager.update_variable_from_model(model, ["x", "y"])
+            self.attributes_panel_manager.schedule_update(model, ("x", "y")),
+            history=self.history,
+            canvas_width=self.canvas_width,
+            canvas_height=self.canvas_height,
+            tracer=self.tracer,
+            viewport=self.viewport
         )
+        self.viewport.add_listener(self._on_view_changed)
 
         self.canvas_manager.bind_events(
             self._show_menu,
             {
-                "press": self.selection_manager.handle_canvas_press,
+                "press": lambda e: self.selection_manager.handle_canvas_press(e, self._on_selection_changed),
                 "drag": self.selection_manager.handle_canvas_drag,
                 "release": lambda e: self.selection_manager.handle_canvas_release(e, self._on_selection_changed)
             },
             self._move_selection,
-            self.widget_manager.delete_selected_widgets
+            self.widget_manager.delete_selected_widgets,
+            self.widget_manager.undo,
+            self.widget_manager.redo,
+            {
+                "copy": self.widget_manager.copy_selected,
+                "paste": self.widget_manager.paste,
+                "duplicate": self.widget_manager.duplicate_selected
+            }
         )
 
         #create instance of ToolbarManager to store theme and function callbacks
@@ -99,12 +145,25 @@ class Designer:
                 "menu_color": MENU_COLOR
             },
             callbacks={
+                "open_project": self.open_project,
+                "save_project": self.save_project,
+                "undo": self.widget_manager.undo,
+                "redo": self.widget_manager.redo,
+                "copy": self.widget_manager.copy_selected,
+                "paste": self.widget_manager.paste,
+                "duplicate": self.widget_manager.duplicate_selected,
+                "export_code": self.export_code,
                 "snap_to_grid": lambda: self.widget_manager.snap_to_grid(self.grid_size),
                 "align_left": lambda: self.widget_manager.align("left"),
                 "align_right": lambda: self.widget_manager.align("right"),
                 "align_top": lambda: self.widget_manager.align("top"),
                 "align_bottom": lambda: self.widget_manager.align("bottom"),
-                "toggle_grid": self.canvas_manager.toggle_grid
+                "toggle_grid": self.canvas_manager.toggle_grid,
+                "select_all": self.select_where,
+                "select_type": lambda widget_type: self.select_where(type=widget_type),
+                "select_by_name": self.select_by_name,
+                "select_by_tag": self.select_by_tag,
+                **self._trace_callbacks()
             }
         )
 
@@ -126,15 +185,29 @@ class Designer:
             },
             canvas_width=self.canvas_width,
             canvas_height=self.canvas_height,
-            window_height=self.canvas_height + self.title_bar_height + self.toolbar_height,
+            window_height=self.view_height + self.title_bar_height + self.toolbar_height,
+            window_width=self.view_width,
             panel_width=ATTRIBUTES_PANEL_WIDTH,
             panel_height=ATTRIBUTES_PANEL_HEIGHT,
             selection_manager=self.selection_manager,
-            widget_manager=self.widget_manager
+            widget_manager=self.widget_manager,
+            tracer=self.tracer,
+            scheduler=self.scheduler
         )
 
+        #keeps generated code fragments between exports
+        self.code_exporter = CodeExporter()
+
+        #journal of all model changes, written in the background (recoverable after a crash)
+        self.autosave = Autosave(
+            self.top, self.history, self.widget_manager.widget_map, self.project_settings, self.theme, on_error=self._on_autosave_error
+        ) if AUTOSAVE else None
+
         self._add_widget_menu()
 
+        if self.tracer:
+            self._update_trace_overlay()
+
     #create title bar
     def _create_title_bar(self):
         def start_move(event):
@@ -169,9 +242,116 @@ class Designer:
         title_label.bind("<B1-Motion>", do_move)
 
         #add close button
-        close_button = tk.Button(title_bar, text=" X ", bg=TITLE_BAR_COLOR, fg=TITLE_BAR_TEXT_COLOR, relief="flat", command=lambda: self.top.destroy())
+        close_button = tk.Button(title_bar, text=" X ", bg=TITLE_BAR_COLOR, fg=TITLE_BAR_TEXT_COLOR, relief="flat", command=self._close)
         close_button.pack(side="right")
 
+    #settings of the designed window that are stored in project files
+    def project_settings(self) -> dict:
+        return {
+            "title": self.title,
+            "width": self.canvas_width,
+            "height": self.canvas_height,
+            "grid_size": self.grid_size
+        }
+
+    def save_project(self):
+        path = filedialog.asksaveasfilename(parent=self.top, defaultextension=".json", filetypes=PROJECT_FILETYPES)
+        if not path:
+            return
+        models = self.widget_manager.widget_map.models()
+        try:
+            save_project(path, self.project_settings(), self.theme, models)
+        except (OSError, ProjectFileError) as e:
+            messagebox.showerror("File error", f"Could not save project: {e}", parent=self.top)
+
+    #open a project in a new designer window
+    def open_project(self):
+        path = filedialog.askopenfilename(parent=self.top, filetypes=PROJECT_FILETYPES)
+        if path:
+            open_project_window(self.parent, path, self.icon)
+
+    #export the design as a runnable Tkinter module
+    def export_code(self):
+        path = filedialog.asksaveasfilename(parent=self.top, defaultextension=".py", filetypes=[("Python files", "*.py")])
+        if not path:
+            return
+        try:
+            self.code_exporter.export(path, self.project_settings(), self.theme, self.widget_manager.widget_map)
+        except OSError as e:
+            messagebox.showerror("File error", f"Could not export code: {e}", parent=self.top)
+
+    def _on_autosave_error(self, error: Exception):
+        messagebox.showwarning("Autosave", f"Autosave stopped, later changes cannot be recovered after a crash: {error}", parent=self.top)
+
+    #stream the widgets of a project file into this designer
+    #the loaded design is the starting point: it cannot be undone and becomes the first autosave snapshot
+    def load_project(self, path: str):
+        load_project(path, self.widget_manager)
+        self.history.clear()
+        if self.autosave:
+            self.autosave.snapshot()
+
+    #select the widgets matching a query (see WidgetStore.query), answered from the widget indexes
+    def select_where(self, **criteria):
+        self.selection_manager.select_items(self.widget_manager.widget_map.query(**criteria))
+        self._on_selection_changed()
+
+    #select by exact name, glob pattern (button*) or regular expression (re:^ok_)
+    def select_by_name(self):
+        pattern = simpledialog.askstring("Select by name", "Name, glob pattern (button*) or re:<regular expression>:", parent=self.top)
+        if not pattern:
+            return
+        try:
+            if pattern.startswith("re:"):
+                self.select_where(name_regex=pattern[3:])
+            else:
+                self.select_where(name=pattern)
+        except re.error as e:
+            messagebox.showerror("Select by name", f"Invalid regular expression: {e}", parent=self.top)
+
+    def select_by_tag(self):
+        tags = ", ".join(self.widget_manager.widget_map.all_tags()) or "none"
+        tag = simpledialog.askstring("Select by tag", f"Tag (used tags: {tags}):", parent=self.top)
+        if tag:
+            self.select_where(tag=tag.strip())
+
+    #toolbar callbacks of the trace menu (empty when tracing is off, so the menu is not created)
+    def _trace_callbacks(self) -> dict:
+        if not self.tracer:
+            return {}
+        return {
+            "toggle_trace": self._set_tracing,
+            "reset_trace": self.tracer.reset,
+            "export_trace": self.export_trace
+        }
+
+    def _set_tracing(self, enabled: bool):
+        self.tracer.enabled = enabled
+
+    #export the traced events as a Chrome trace_event file
+    def export_trace(self):
+        path = filedialog.asksaveasfilename(parent=self.top, defaultextension=".json", filetypes=[("Chrome trace", "*.json")])
+        if not path:
+            return
+        try:
+            self.tracer.export_chrome_trace(path)
+        except OSError as e:
+            messagebox.showerror("File error", f"Could not export trace: {e}", parent=self.top)
+
+    def _update_trace_overlay(self):
+        self.toolbar_manger.set_trace_text(self.tracer.summary())
+        self._trace_overlay_id = self.top.after(TRACE_OVERLAY_INTERVAL, self._update_trace_overlay)
+
+    #release panel traces and Tcl commands before closing the designer window
+    def _close(self):
+        if self.tracer:
+            self.top.after_cancel(self._trace_overlay_id)
+        self.scheduler.cancel()
+        if self.autosave:
+            self.autosave.close()
+        self.attributes_panel_manager.destroy()
+        self.top.destroy()
+
     #create add widget menu
     def _add_widget_menu(self):
         self.menu = tk.Menu(self.top, bg=TOOLBAR_COLOR, fg=TEXT_COLOR, tearoff=0)
@@ -193,10 +373,15 @@ class Designer:
             label="Add Button",
             command=lambda: self.widget_manager.add_widget("button", *_pos())
         )
+        self.menu.add_separator()
+        self.menu.add_command(
+            label="Paste here",
+            command=lambda: self.widget_manager.paste(*_pos())
+        )
 
     #post context menu
     def _show_menu(self, event):
-        self.click_x, self.click_y = event.x, event.y
+        self.click_x, self.click_y = self.viewport.to_design(event.x, event.y)
         self.menu.post(event.x_root, event.y_root)
 
     #move selected widgets
@@ -204,44 +389,59 @@ class Designer:
         if not self.selection_manager:
             return
         dx, dy = self._group_clamped_delta(dx, dy)
-        for item_id in self.selection_manager.selected_ids():
-            #move widget in canvas
-            self.canvas.move(item_id, dx, dy)
-
-            #update model data
-            model = self.widget_manager.widget_map.get(item_id)["model"]
-            if model:
-                model.x += dx
-                model.y += dy
-                self.attributes_panel_manager.update_variable_from_model(model, attributes=["x", "y"])
-
-            #update highlight
-            self.selection_manager.refresh(item_id)
+        self.selection_manager.move_selected(dx, dy, self.widget_manager.widget_map, self.widget_manager.panel_update)
 
     #compute clamped delta, so that widget cannot be moved outside the GUI window
     def _group_clamped_delta(self, dx: int, dy: int) -> tuple[int, int]:
-        canvas_width, canvas_height = self.canvas.winfo_width(), self.canvas.winfo_height()
-        dx_clamped, dy_clamped = dx, dy
-
-        for item_id in self.selection_manager.selected_ids():
-            bbox = self.canvas.bbox(item_id)
-            if not bbox:
-                continue
-            x0, y0, x1, y1 = bbox
-            min_dx = -x0
-            max_dx = canvas_width - x1
-            min_dy = -y0
-            max_dy = canvas_height - y1
-            dx_clamped = max(min_dx, min(max_dx, dx_clamped))
-            dy_clamped = max(min_dy, min(max_dy, dy_clamped))
-
-        return dx_clamped, dy_clamped
+        return self.selection_manager.clamped_delta(dx, dy, self.canvas_width, self.canvas_height)
+
+    #after a pan or zoom: outlines keep their screen padding, widgets entering the view are drawn or materialized
+    def _on_view_changed(self):
+        self.selection_manager.schedule_refresh()
+        self.widget_manager.materializer.schedule()
 
     def _on_selection_changed(self):
+        #selected widgets are promoted from proxies to real widgets
+        self.widget_manager.materializer.schedule()
         selected_ids = self.selection_manager.selected_ids()
         if len(selected_ids) == 1:
             item_id = next(iter(selected_ids))
-            model = self.widget_manager.widget_map.get(item_id)["model"]
-            self.attributes_panel_manager.show(model)
+            model = self.widget_manager.widget_map.model(item_id)
+            self.attributes_panel_manager.show(model, item_id)
+        elif selected_ids:
+            #edits in the panel apply to every selected widget
+            item_ids = sorted(selected_ids)
+            self.attributes_panel_manager.show_many([self.widget_manager.widget_map.model(i) for i in item_ids], item_ids)
         else:
-            self.attributes_panel_manager.hide()
\ No newline at end of file
+            self.attributes_panel_manager.hide()
+
+#open a project file in a new designer window using the settings and theme stored in the file
+def open_project_window(parent: tk.Tk, path: str, icon: tk.PhotoImage):
+    try:
+        header = read_project_header(path)
+        settings = header["settings"]
+        designer = Designer(parent, settings["title"], settings["width"], settings["height"], TITLE_BAR_HEIGHT, TOOLBAR_HEIGHT, header["theme"], icon)
+        designer.grid_size = settings.get("grid_size", GRID_SIZE)
+        designer.load_project(path)
+        return designer
+    except (OSError, ValueError, KeyError, ProjectFileError) as e:
+        messagebox.showerror("File error", f"Could not open project: {e}")
+        return None
+
+#recover an autosaved session (see Autosave.find_sessions) in a new designer window; the recovered design
+#becomes the first snapshot of the new session and the old session is removed
+def open_recovered_session(parent: tk.Tk, path: str, icon: tk.PhotoImage):
+    try:
+        header = read_session_header(path)
+        settings = header["settings"]
+        designer = Designer(parent, settings["title"], settings["width"], settings["height"], TITLE_BAR_HEIGHT, TOOLBAR_HEIGHT, header["theme"], icon)
+        designer.grid_size = settings.get("grid_size", GRID_SIZE)
+        recover_session(path, designer.widget_manager)
+        designer.history.clear()
+        if designer.autosave:
+            designer.autosave.snapshot()
+        discard_session(path)
+        return designer
+    except (OSError, ValueError, KeyError, ProjectFileError) as e:
+        messagebox.showerror("Recovery error", f"Could not recover the session: {e}")
+        return None
\ No newline at end of file
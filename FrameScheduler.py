@@ -0,0 +1,52 @@
+from Tracing import traced
+
+#dirty key that stands for "everything of this channel" (e.g. all outlines, all panel fields)
+ALL = "*"
+
+#collects what became dirty during event handling and brings it up to date once per frame (one after_idle callback)
+#managers register a channel with a flush function and mark keys (window_ids, attribute names) dirty; however many
+#events arrive before the next idle cycle, every channel is flushed at most once, in priority order (lower first).
+#a flush may mark channels with a later priority, they are still flushed in the same frame
+class FrameScheduler:
+    def __init__(self, top, tracer=None):
+        self.top = top                  #widget whose after_idle runs the flush
+        self._channels = []             #[(priority, name, flush)] in flush order
+        self._dirty = {}                #{channel name: set of dirty keys}
+        self._flush_id = None
+        self._traced_flush = traced(tracer, "FrameScheduler.flush", self.flush)
+
+    #flush(keys) is called with the set of keys marked since the last frame
+    def register(self, name: str, flush, priority: int = 0):
+        if any(channel_name == name for _, channel_name, _ in self._channels):
+            raise ValueError(f"channel already registered: {name}")
+        self._channels.append((priority, name, flush))
+        self._channels.sort(key=lambda channel: channel[0])
+
+    #mark keys of a channel dirty (no keys → the whole channel)
+    def mark(self, name: str, *keys):
+        dirty = self._dirty.get(name)
+        if dirty is None:
+            dirty = self._dirty[name] = set()
+        dirty.update(keys or (ALL,))
+        if self._flush_id is None:
+            self._flush_id = self.top.after_idle(self._traced_flush)
+
+    def is_dirty(self, name: str) -> bool:
+        return name in self._dirty
+
+    #bring every dirty channel up to date now (also used when a result is needed before the next idle cycle)
+    def flush(self):
+        if self._flush_id is not None:
+            self.top.after_cancel(self._flush_id)
+            self._flush_id = None
+        for _, name, flush in self._channels:
+            keys = self._dirty.pop(name, None)
+            if keys is not None:
+                flush(keys)
+
+    #drop pending work, e.g. before the window is destroyed
+    def cancel(self):
+        if self._flush_id is not None:
+            self.top.after_cancel(self._flush_id)
+            self._flush_id = None
+        self._dirty.clear()
\ No newline at end of file
@@ -0,0 +1,453 @@
+import itertools
+from collections import Counter
+from functools import wraps
+from types import SimpleNamespace
+from DataModels import compute_bbox
+
+#in-process stand-in for tk.Canvas (and the widgets placed on it) for benchmarks and scripted checks without a display
+#implements the subset of the canvas API used by CanvasManager, SelectionManager and WidgetManager and counts every call
+
+#approximate size of a text widget with the default font
+CHARACTER_WIDTH = 7
+TEXT_PADDING = 10
+TEXT_HEIGHT = 21
+LINE_HEIGHT = 15
+ENTRY_WIDTH = 150
+
+#count calls of a public method in self.calls
+def _counted(method):
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        self.calls[method.__name__] += 1
+        return method(self, *args, **kwargs)
+    return wrapper
+
+#event bindings shared by canvas and widgets, event_generate calls the bound functions directly
+class _Bindings:
+    def _init_bindings(self):
+        self._bindings = {}     #sequence -> function
+
+    def bind(self, sequence: str, function=None, add=None):
+        self._bindings[sequence] = function
+
+    #binding tables in bindtag order (only the own bindings by default)
+    def _binding_tables(self):
+        return [self._bindings]
+
+    def event_generate(self, sequence: str, x: int = 0, y: int = 0, x_root: int = None, y_root: int = None, state: int = 0, width: int = 0, height: int = 0):
+        event = SimpleNamespace(
+            widget=self, x=x, y=y, state=state, width=width, height=height,
+            x_root=x if x_root is None else x_root, y_root=y if y_root is None else y_root
+        )
+        result = None
+        for bindings in self._binding_tables():
+            function = bindings.get(sequence)
+            if function is not None:
+                result = function(event)
+                if result == "break":
+                    break
+        return result
+
+class HeadlessWidget(_Bindings):
+    _numbers = itertools.count(1)
+
+    def __init__(self, widget_type: str, master, **options):
+        self._init_bindings()
+        self.widget_type = widget_type
+        self.master = master
+        self.options = options
+        self.destroyed = False
+        self._w = f"{master._w}.{widget_type}{next(self._numbers)}"
+        self._bindtags = (self._w, widget_type.capitalize(), ".", "all")
+
+    def bindtags(self, tags=None):
+        if tags is None:
+            return self._bindtags
+        self._bindtags = tuple(tags)
+
+    #own bindings for the widget path, class bindings of the canvas (see HeadlessCanvas.bind_class) for the other tags
+    def _binding_tables(self):
+        class_bindings = self.master._class_bindings
+        return [self._bindings if tag == self._w else class_bindings.get(tag, {}) for tag in self._bindtags]
+
+    def config(self, **options):
+        self.options.update(options)
+
+    configure = config
+
+    def cget(self, option: str):
+        return self.options.get(option)
+
+    def winfo_reqwidth(self) -> int:
+        if self.widget_type == "entry":
+            return ENTRY_WIDTH
+        return len(str(self.options.get("text", ""))) * CHARACTER_WIDTH + TEXT_PADDING
+
+    def winfo_reqheight(self) -> int:
+        return TEXT_HEIGHT
+
+    #headless widgets are always laid out at their requested size
+    winfo_width = winfo_reqwidth
+    winfo_height = winfo_reqheight
+
+    def destroy(self):
+        self.destroyed = True
+
+#widget_factory for WidgetManager
+def headless_widget_factory(widget_type: str, master, **options) -> HeadlessWidget:
+    return HeadlessWidget(widget_type, master, **options)
+
+#stand-in for canvas.tk: eval() runs the batch scripts of CanvasBatch.run_batch
+class _HeadlessTcl:
+    def __init__(self, canvas: "HeadlessCanvas"):
+        self.canvas = canvas
+
+    def eval(self, script: str):
+        self.canvas.calls["eval"] += 1
+        for line in script.split("\n"):
+            words = _split_words(line)
+            if len(words) < 2:
+                continue
+            self.canvas.batched_commands[words[1]] += 1
+            self.canvas._run_command(words[1], words[2:])
+
+    #the font commands used to estimate proxy sizes
+    def call(self, *args):
+        self.canvas.calls["call"] += 1
+        if args[:2] == ("font", "measure"):
+            return len(args[-1]) * CHARACTER_WIDTH
+        if args[:2] == ("font", "metrics"):
+            return LINE_HEIGHT
+        raise ValueError(f"Unsupported Tcl command: {args[0]}")
+
+class HeadlessCanvas(_Bindings):
+    def __init__(self, master=None, width: int = 0, height: int = 0, **options):
+        self._init_bindings()
+        self._w = ".headless"
+        self.master = master
+        self.options = dict(options, width=width, height=height)
+        self.tk = _HeadlessTcl(self)
+
+        self.calls = Counter()              #method name -> number of calls (eval counts one call per batch)
+        self.batched_commands = Counter()   #canvas subcommand -> number of times it ran inside an eval batch
+
+        self._items = {}                    #item_id -> {"type", "coords", "options", "tags"}
+        self._stacking = {}                 #item_id -> stacking key (higher is drawn on top)
+        self._tags = {}                     #tag -> set of item_ids
+        self._ids = itertools.count(1)
+        self._top = itertools.count(1)
+        self._bottom = itertools.count(-1, -1)
+
+        #idle callbacks, run by update_idletasks() / run_idle() instead of an event loop
+        self._idle = {}
+        self._after_ids = itertools.count(1)
+
+        #bind_class bindings of all headless widgets: bindtag -> {sequence: function}
+        self._class_bindings = {}
+
+        #canvas position of the top left corner of the window (changed by xview_moveto / yview_moveto)
+        self._view_x = 0
+        self._view_y = 0
+
+    def reset_counts(self):
+        self.calls.clear()
+        self.batched_commands.clear()
+
+    #----- item creation -----
+    def _create(self, item_type: str, coords, options: dict) -> int:
+        item_id = next(self._ids)
+        tags = options.pop("tags", ())
+        if isinstance(tags, str):
+            tags = (tags,)
+        self._items[item_id] = {"type": item_type, "coords": [float(c) for c in coords], "options": options, "tags": []}
+        self._stacking[item_id] = next(self._top)
+        for tag in tags:
+            self._add_tag(item_id, tag)
+        return item_id
+
+    @_counted
+    def create_window(self, x, y, **options) -> int:
+        return self._create("window", (x, y), options)
+
+    @_counted
+    def create_rectangle(self, *coords, **options) -> int:
+        return self._create("rectangle", _flatten(coords), options)
+
+    @_counted
+    def create_line(self, *coords, **options) -> int:
+        return self._create("line", _flatten(coords), options)
+
+    @_counted
+    def create_text(self, x, y, **options) -> int:
+        return self._create("text", (x, y), options)
+
+    @_counted
+    def create_image(self, x, y, **options) -> int:
+        return self._create("image", (x, y), options)
+
+    #----- item queries and changes -----
+    def _find(self, tag_or_id):
+        if isinstance(tag_or_id, int) or (isinstance(tag_or_id, str) and tag_or_id.isdigit()):
+            item_id = int(tag_or_id)
+            return [item_id] if item_id in self._items else []
+        if tag_or_id == "all":
+            return list(self._items)
+        return list(self._tags.get(tag_or_id, ()))
+
+    @_counted
+    def type(self, tag_or_id):
+        items = self._find(tag_or_id)
+        return self._items[items[0]]["type"] if items else None
+
+    @_counted
+    def coords(self, tag_or_id, *coords):
+        items = self._find(tag_or_id)
+        if not items:
+            return []
+        if coords:
+            self._items[items[0]]["coords"] = [float(c) for c in _flatten(coords)]
+            return None
+        return list(self._items[items[0]]["coords"])
+
+    @_counted
+    def move(self, tag_or_id, dx, dy):
+        for item_id in self._find(tag_or_id):
+            item_coords = self._items[item_id]["coords"]
+            for index in range(0, len(item_coords), 2):
+                item_coords[index] += dx
+                item_coords[index + 1] += dy
+
+    @_counted
+    def scale(self, tag_or_id, x_origin, y_origin, x_factor, y_factor):
+        for item_id in self._find(tag_or_id):
+            item_coords = self._items[item_id]["coords"]
+            for index in range(0, len(item_coords), 2):
+                item_coords[index] = x_origin + (item_coords[index] - x_origin) * x_factor
+                item_coords[index + 1] = y_origin + (item_coords[index + 1] - y_origin) * y_factor
+
+    @_counted
+    def bbox(self, *tags_or_ids):
+        boxes = [self._item_bbox(i) for tag in tags_or_ids for i in self._find(tag)]
+        boxes = [b for b in boxes if b is not None]
+        if not boxes:
+            return None
+        return min(b[0] for b in boxes), min(b[1] for b in boxes), max(b[2] for b in boxes), max(b[3] for b in boxes)
+
+    def _item_bbox(self, item_id: int):
+        item = self._items[item_id]
+        options = item["options"]
+        if options.get("state") == "hidden":
+            return None
+        item_coords = item["coords"]
+        if item["type"] == "window":
+            widget = options.get("window")
+            width = options.get("width") or (widget.winfo_reqwidth() if widget is not None else 0)
+            height = options.get("height") or (widget.winfo_reqheight() if widget is not None else 0)
+            return compute_bbox(int(item_coords[0]), int(item_coords[1]), int(width), int(height), options.get("anchor", "center"))
+        xs, ys = item_coords[0::2], item_coords[1::2]
+        return int(min(xs)), int(min(ys)), int(max(xs)), int(max(ys))
+
+    @_counted
+    def find_all(self):
+        return tuple(sorted(self._items, key=self._stacking.__getitem__))
+
+    @_counted
+    def find_enclosed(self, x0, y0, x1, y1):
+        return self._find_matching(lambda b: x0 <= b[0] and y0 <= b[1] and b[2] <= x1 and b[3] <= y1)
+
+    @_counted
+    def find_overlapping(self, x0, y0, x1, y1):
+        return self._find_matching(lambda b: b[0] <= x1 and x0 <= b[2] and b[1] <= y1 and y0 <= b[3])
+
+    #linear scan in stacking order, like the real canvas
+    def _find_matching(self, predicate):
+        matches = []
+        for item_id in self._items:
+            bbox = self._item_bbox(item_id)
+            if bbox is not None and predicate(bbox):
+                matches.append(item_id)
+        return tuple(sorted(matches, key=self._stacking.__getitem__))
+
+    @_counted
+    def itemconfig(self, tag_or_id, **options):
+        for item_id in self._find(tag_or_id):
+            self._items[item_id]["options"].update(options)
+
+    itemconfigure = itemconfig
+
+    @_counted
+    def itemcget(self, tag_or_id, option: str):
+        items = self._find(tag_or_id)
+        return self._items[items[0]]["options"].get(option) if items else None
+
+    @_counted
+    def tag_raise(self, tag_or_id, above=None):
+        for item_id in sorted(self._find(tag_or_id), key=self._stacking.__getitem__):
+            self._stacking[item_id] = next(self._top)
+
+    @_counted
+    def tag_lower(self, tag_or_id, below=None):
+        for item_id in sorted(self._find(tag_or_id), key=self._stacking.__getitem__, reverse=True):
+            self._stacking[item_id] = next(self._bottom)
+
+    @_counted
+    def delete(self, *tags_or_ids):
+        for tag_or_id in tags_or_ids:
+            for item_id in self._find(tag_or_id):
+                item = self._items.pop(item_id)
+                del self._stacking[item_id]
+                for tag in item["tags"]:
+                    self._discard_tag(item_id, tag)
+
+    #----- tags -----
+    def _add_tag(self, item_id: int, tag: str):
+        item = self._items[item_id]
+        if tag not in item["tags"]:
+            item["tags"].append(tag)
+            self._tags.setdefault(tag, set()).add(item_id)
+
+    def _discard_tag(self, item_id: int, tag: str):
+        bucket = self._tags.get(tag)
+        if bucket is not None:
+            bucket.discard(item_id)
+            if not bucket:
+                del self._tags[tag]
+
+    @_counted
+    def addtag_withtag(self, new_tag: str, tag_or_id):
+        for item_id in self._find(tag_or_id):
+            self._add_tag(item_id, new_tag)
+
+    @_counted
+    def dtag(self, tag_or_id, tag_to_delete=None):
+        tag_to_delete = tag_or_id if tag_to_delete is None else tag_to_delete
+        for item_id in self._find(tag_or_id):
+            tags = self._items[item_id]["tags"]
+            if tag_to_delete in tags:
+                tags.remove(tag_to_delete)
+                self._discard_tag(item_id, tag_to_delete)
+
+    @_counted
+    def gettags(self, tag_or_id):
+        items = self._find(tag_or_id)
+        return tuple(self._items[items[0]]["tags"]) if items else ()
+
+    #----- batch scripts (see CanvasBatch) -----
+    def _run_command(self, command: str, arguments):
+        if command == "coords":
+            HeadlessCanvas.coords.__wrapped__(self, _item_ref(arguments[0]), *[float(a) for a in arguments[1:]])
+        elif command == "move":
+            HeadlessCanvas.move.__wrapped__(self, _item_ref(arguments[0]), float(arguments[1]), float(arguments[2]))
+        elif command in ("itemconfigure", "itemconfig"):
+            options = {arguments[i].lstrip("-"): arguments[i + 1] for i in range(1, len(arguments) - 1, 2)}
+            HeadlessCanvas.itemconfig.__wrapped__(self, _item_ref(arguments[0]), **options)
+        elif command == "addtag":
+            HeadlessCanvas.addtag_withtag.__wrapped__(self, arguments[0], _item_ref(arguments[2]))
+        elif command == "raise":
+            HeadlessCanvas.tag_raise.__wrapped__(self, _item_ref(arguments[0]))
+        elif command == "lower":
+            HeadlessCanvas.tag_lower.__wrapped__(self, _item_ref(arguments[0]))
+        elif command == "delete":
+            HeadlessCanvas.delete.__wrapped__(self, *[_item_ref(a) for a in arguments])
+        else:
+            raise ValueError(f"Unsupported canvas command in batch: {command}")
+
+    #----- scrolling (the view origin is kept in canvas coordinates) -----
+    @_counted
+    def configure(self, **options):
+        self.options.update(options)
+
+    config = configure
+
+    def canvasx(self, screen_x, gridspacing=None):
+        return self._view_x + screen_x
+
+    def canvasy(self, screen_y, gridspacing=None):
+        return self._view_y + screen_y
+
+    @_counted
+    def xview_moveto(self, fraction: float):
+        self._view_x = self._confine(fraction, 0, self.winfo_width())
+
+    @_counted
+    def yview_moveto(self, fraction: float):
+        self._view_y = self._confine(fraction, 1, self.winfo_height())
+
+    #view origin for a fraction of the scroll region, confined like the real canvas
+    def _confine(self, fraction: float, axis: int, window_size: int) -> float:
+        region = self.options.get("scrollregion")
+        if region is None:
+            return 0
+        start, end = region[axis], region[axis + 2]
+        return max(start, min(start + fraction * (end - start), end - window_size))
+
+    #----- widget and event loop stand-ins -----
+    def cget(self, option: str):
+        return self.options.get(option)
+
+    def winfo_width(self) -> int:
+        return self.options.get("width", 0)
+
+    def winfo_height(self) -> int:
+        return self.options.get("height", 0)
+
+    def focus_set(self):
+        pass
+
+    @_counted
+    def bind_class(self, class_name: str, sequence: str, function=None, add=None):
+        self._class_bindings.setdefault(class_name, {})[sequence] = function
+
+    def pack(self, **options):
+        pass
+
+    def after_idle(self, function, *args):
+        after_id = f"after#{next(self._after_ids)}"
+        self._idle[after_id] = (function, args)
+        return after_id
+
+    def after(self, delay: int, function=None, *args):
+        return self.after_idle(function, *args)
+
+    def after_cancel(self, after_id):
+        self._idle.pop(after_id, None)
+
+    #run all pending idle callbacks (including ones scheduled by them), like one turn of the event loop
+    def update_idletasks(self):
+        self.run_idle()
+
+    def run_idle(self):
+        while self._idle:
+            after_id = next(iter(self._idle))
+            function, args = self._idle.pop(after_id)
+            function(*args)
+
+def _flatten(coords):
+    if len(coords) == 1 and isinstance(coords[0], (list, tuple)):
+        return list(coords[0])
+    return list(coords)
+
+def _item_ref(word: str):
+    return int(word) if word.isdigit() else word
+
+#split one Tcl command line into words (plain words and double-quoted words with backslash escapes)
+def _split_words(line: str):
+    words, word, quoted, in_word = [], [], False, False
+    characters = iter(line)
+    for character in characters:
+        if character == "\\":
+            word.append(next(characters, ""))
+            in_word = True
+        elif character == '"':
+            quoted = not quoted
+            in_word = True
+        elif character.isspace() and not quoted:
+            if in_word:
+                words.append("".join(word))
+                word, in_word = [], False
+        else:
+            word.append(character)
+            in_word = True
+    if in_word:
+        words.append("".join(word))
+    return words
\ No newline at end of file
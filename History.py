@@ -0,0 +1,229 @@
+import sys
+from array import array
+from collections import deque
+from Theme import HISTORY_BYTE_BUDGET
+
+#undo/redo log of compact deltas
+#entries are plain tuples:
+#   ("move", window_ids, dx, dy)          dx/dy are ints for uniform group moves or array("i") columns
+#   ("attributes", [(window_id, attribute, old, new), ...])
+#   ("add", window_ids, specs)            specs as used by WidgetManager.add_widgets
+#   ("delete", window_ids, specs)
+#   ("batch", [entry, ...])               everything recorded inside one transaction
+class CommandHistory:
+    def __init__(self, byte_budget: int = HISTORY_BYTE_BUDGET):
+        self.byte_budget = byte_budget
+        self._undo = deque()        #(entry, size in bytes), oldest first
+        self._redo = []
+        self._bytes = 0
+        self._transaction = None    #entries recorded since begin()
+        self._depth = 0
+        self._applying = False      #no recording while undo/redo replays entries
+        self._aliases = {}          #old window_id -> window_id of the re-created widget
+        self._listeners = []        #called with every committed entry, also while undo/redo replays entries (see add_listener)
+
+    def can_undo(self) -> bool:
+        return bool(self._undo)
+
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    #listener(entry) sees every model change (never a "batch"), including the changes made by undo and redo,
+    #e.g. to journal them (see Autosave); the changes of a transaction are reported merged when it commits
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+        self._bytes = 0
+        self._aliases.clear()
+
+    #group everything recorded until the matching commit() into one undo step (e.g. a whole drag gesture)
+    def begin(self):
+        if self._depth == 0:
+            self._transaction = []
+        self._depth += 1
+
+    def commit(self):
+        if self._depth == 0:
+            return
+        self._depth -= 1
+        if self._depth > 0:
+            return
+        entries, self._transaction = _merge_entries(self._transaction), None
+        #listeners see the collapsed gesture (e.g. one move for a whole drag), not every step of it
+        for entry in entries:
+            self._notify(entry)
+        if self._applying:
+            return
+        if len(entries) == 1:
+            self._store(entries[0])
+        elif entries:
+            self._store(("batch", entries))
+
+    #True while a transaction is open (its changes are neither logged nor reported to the listeners yet)
+    @property
+    def in_transaction(self) -> bool:
+        return self._transaction is not None
+
+    def record_move(self, window_ids, dx, dy):
+        if not window_ids or (self._applying and not self._listeners):
+            return
+        if isinstance(dx, int) and isinstance(dy, int) and not dx and not dy:
+            return
+        if not isinstance(dx, int):
+            dx = array("i", dx)
+        if not isinstance(dy, int):
+            dy = array("i", dy)
+        self._record(("move", array("l", window_ids), dx, dy))
+
+    def record_attribute(self, window_id: int, attribute: str, old, new):
+        if old != new:
+            self._record(("attributes", [(window_id, attribute, old, new)]))
+
+    def record_add(self, window_ids, specs):
+        if window_ids:
+            self._record(("add", array("l", window_ids), list(specs)))
+
+    def record_delete(self, window_ids, specs):
+        if window_ids:
+            self._record(("delete", array("l", window_ids), list(specs)))
+
+    #inside a transaction the entry waits for commit(), otherwise the listeners are told and the entry is
+    #logged for undo (unless undo/redo is replaying entries)
+    def _record(self, entry):
+        if self._transaction is not None:
+            self._transaction.append(entry)
+            return
+        self._notify(entry)
+        if not self._applying:
+            self._store(entry)
+
+    def _notify(self, entry):
+        for listener in self._listeners:
+            listener(entry)
+
+    def undo(self, widget_manager) -> bool:
+        if not self._undo:
+            return False
+        entry, size = self._undo.pop()
+        self._bytes -= size
+        self._apply(entry, widget_manager, reverse=True)
+        self._redo.append((entry, size))
+        return True
+
+    def redo(self, widget_manager) -> bool:
+        if not self._redo:
+            return False
+        entry, size = self._redo.pop()
+        self._apply(entry, widget_manager, reverse=False)
+        self._undo.append((entry, size))
+        self._bytes += size
+        return True
+
+    def _store(self, entry):
+        #consecutive edits of the same attribute (e.g. typing a text) collapse into one step
+        if entry[0] == "attributes" and len(entry[1]) == 1 and self._undo and not self._redo:
+            previous, previous_size = self._undo[-1]
+            if previous[0] == "attributes" and len(previous[1]) == 1 and previous[1][0][:2] == entry[1][0][:2]:
+                window_id, attribute, old, _ = previous[1][0]
+                entry = ("attributes", [(window_id, attribute, old, entry[1][0][3])])
+                self._undo.pop()
+                self._bytes -= previous_size
+
+        size = _entry_size(entry)
+        self._undo.append((entry, size))
+        self._bytes += size
+        self._redo.clear()
+
+        #evict the oldest entries once the byte budget is exceeded (the newest entry is always kept)
+        while self._bytes > self.byte_budget and len(self._undo) > 1:
+            _, evicted_size = self._undo.popleft()
+            self._bytes -= evicted_size
+
+    def _resolve(self, window_id: int) -> int:
+        while window_id in self._aliases:
+            window_id = self._aliases[window_id]
+        return window_id
+
+    def _apply(self, entry, widget_manager, reverse: bool):
+        self._applying = True
+        try:
+            kind = entry[0]
+            if kind == "batch":
+                for sub_entry in (reversed(entry[1]) if reverse else entry[1]):
+                    self._apply(sub_entry, widget_manager, reverse)
+            elif kind == "move":
+                _, window_ids, dx, dy = entry
+                sign = -1 if reverse else 1
+                widget_manager.move_widgets([self._resolve(i) for i in window_ids], _scale(dx, sign), _scale(dy, sign))
+            elif kind == "attributes":
+                #one batched apply for the whole list; undo goes backwards, so the oldest value of an attribute wins
+                changes = [(self._resolve(i), attribute, old if reverse else new) for i, attribute, old, new in (reversed(entry[1]) if reverse else entry[1])]
+                widget_manager.set_attributes(changes)
+            elif kind in ("add", "delete"):
+                _, window_ids, specs = entry
+                if (kind == "add") == reverse:
+                    widget_manager.delete_widgets([self._resolve(i) for i in window_ids])
+                else:
+                    #re-created widgets get new canvas ids, older entries are redirected to them
+                    new_ids = widget_manager.add_widgets(specs)
+                    for old_id, new_id in zip(window_ids, new_ids):
+                        self._aliases[self._resolve(old_id)] = new_id
+        finally:
+            self._applying = False
+
+def _scale(delta, sign: int):
+    if isinstance(delta, int):
+        return delta * sign
+    return array("i", (d * sign for d in delta)) if sign < 0 else delta
+
+#merge adjacent entries of a transaction: moves into one (columnar) move, attribute changes into one list
+#(e.g. a multi-selection edit becomes a single entry that undo applies with one batch)
+def _merge_entries(entries):
+    merged = []
+    for entry in entries:
+        if merged and entry[0] == merged[-1][0] == "move":
+            merged[-1] = _combine_moves(merged[-1], entry)
+        elif merged and entry[0] == merged[-1][0] == "attributes":
+            merged[-1][1].extend(entry[1])
+        else:
+            merged.append(entry)
+    return merged
+
+def _combine_moves(first, second):
+    _, ids_first, dx_first, dy_first = first
+    _, ids_second, dx_second, dy_second = second
+
+    #same uniform group move → just add the deltas
+    if all(isinstance(d, int) for d in (dx_first, dy_first, dx_second, dy_second)) and ids_first == ids_second:
+        return ("move", ids_first, dx_first + dx_second, dy_first + dy_second)
+
+    deltas = {}
+    for window_ids, dx, dy in ((ids_first, dx_first, dy_first), (ids_second, dx_second, dy_second)):
+        for index, window_id in enumerate(window_ids):
+            old_dx, old_dy = deltas.get(window_id, (0, 0))
+            deltas[window_id] = (
+                old_dx + (dx if isinstance(dx, int) else dx[index]),
+                old_dy + (dy if isinstance(dy, int) else dy[index])
+            )
+    window_ids = array("l", deltas)
+    return ("move", window_ids, array("i", (d[0] for d in deltas.values())), array("i", (d[1] for d in deltas.values())))
+
+#approximate memory footprint of an entry
+def _entry_size(entry) -> int:
+    kind = entry[0]
+    if kind == "batch":
+        return sum(_entry_size(sub_entry) for sub_entry in entry[1])
+    if kind == "move":
+        _, window_ids, dx, dy = entry
+        size = 64 + window_ids.itemsize * len(window_ids)
+        for delta in (dx, dy):
+            if not isinstance(delta, int):
+                size += delta.itemsize * len(delta)
+        return size
+    if kind == "attributes":
+        return 64 + sum(72 + sys.getsizeof(old) + sys.getsizeof(new) for _, _, old, new in entry[1])
+    _, window_ids, specs = entry
+    return 64 + window_ids.itemsize * len(window_ids) + sum(sys.getsizeof(spec) + 40 * len(spec) for spec in specs)
\ No newline at end of file
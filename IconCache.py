@@ -0,0 +1,94 @@
+import base64
+import io
+import os
+import zlib
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import messagebox
+from Theme import ICON_POLL_INTERVAL
+
+#icon.ico pre-resized to ICON_SIZE, loads without Pillow
+DEFAULT_ICON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "icon_20.png")
+
+#resized custom icons are kept as PNG files, so choosing the same image again skips decoding and resizing
+ICON_CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "gui_builder", "icons")
+
+def load_default_icon():
+    try:
+        return tk.PhotoImage(file=DEFAULT_ICON_PATH)
+    except tk.TclError:
+        return None
+
+#decodes and resizes custom icons in a worker thread, so large images do not block the Tk main loop.
+#the worker returns PNG data that is turned into a PhotoImage on the Tk thread (polled with after()).
+#images are memoized per file version and size, so switching back to an icon costs nothing
+class IconLoader:
+    def __init__(self, root, poll_interval: int = ICON_POLL_INTERVAL):
+        self.root = root
+        self.poll_interval = poll_interval
+        self._images = {}           #cache file path (file version + size) -> PhotoImage
+        self._executor = None       #created on the first icon that has to be rendered
+        self._generation = 0        #only the latest request calls back, older results are just memoized
+
+    #load an image file as a PhotoImage of the given size; callback(image) runs on the Tk thread
+    def request(self, path: str, size, callback):
+        self._generation += 1
+        try:
+            cached_path = _cached_icon_path(path, size)
+            image = self._images.get(cached_path)
+            if image is None and os.path.exists(cached_path):
+                image = self._images[cached_path] = tk.PhotoImage(master=self.root, file=cached_path)
+        except (OSError, tk.TclError) as e:
+            messagebox.showerror("File error", f"File not supported: {e}")
+            return
+        if image is not None:
+            callback(image)
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="IconLoader")
+        future = self._executor.submit(_render_icon, path, size, cached_path)
+        self._poll(future, cached_path, self._generation, callback)
+
+    def _poll(self, future, cached_path: str, generation: int, callback):
+        if not future.done():
+            self.root.after(self.poll_interval, self._poll, future, cached_path, generation, callback)
+            return
+        try:
+            image = tk.PhotoImage(master=self.root, data=base64.b64encode(future.result()).decode("ascii"))
+        except Exception as e:
+            if generation == self._generation:
+                messagebox.showerror("File error", f"File not supported: {e}")
+            return
+        self._images[cached_path] = image
+        if generation == self._generation:
+            callback(image)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+#cache file name from the source path, its modification time and file size and the target size
+def _cached_icon_path(path: str, size) -> str:
+    stat = os.stat(path)
+    path_hash = zlib.crc32(os.path.abspath(path).encode("utf-8"))
+    return os.path.join(ICON_CACHE_DIR, f"{path_hash:08x}-{stat.st_mtime_ns}-{stat.st_size}-{size[0]}x{size[1]}.png")
+
+#runs in the worker thread: decode and resize with Pillow (only imported for custom icons),
+#store the result in the cache and return it as PNG data
+def _render_icon(path: str, size, cached_path: str) -> bytes:
+    from PIL import Image
+    icon = Image.open(path).convert("RGBA")
+    icon = icon.resize(size, Image.Resampling.LANCZOS)
+    buffer = io.BytesIO()
+    icon.save(buffer, format="PNG")
+    data = buffer.getvalue()
+    try:
+        os.makedirs(ICON_CACHE_DIR, exist_ok=True)
+        #write under a temporary name, so an interrupted write never leaves a broken cache entry
+        temporary_path = f"{cached_path}.{os.getpid()}.tmp"
+        with open(temporary_path, "wb") as file:
+            file.write(data)
+        os.replace(temporary_path, cached_path)
+    except OSError:
+        pass    #cache not writable → the image is only memoized in memory
+    return data
\ No newline at end of file
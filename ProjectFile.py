@@ -0,0 +1,208 @@
+import json
+import struct
+from DataModels import ANCHORS, IdCounters
+
+#project files are versioned, loaders reject files written by a newer version
+PROJECT_FORMAT = "tkinter-gui-builder"
+PROJECT_VERSION = 3     #2: user tags (binary records have an additional tags string), 3: 32-bit string lengths in binary records
+
+#readable form: JSON lines (header object on the first line, then one widget object per line)
+#compact form: magic + version + length-prefixed JSON header, then one length-prefixed record per widget
+BINARY_MAGIC = b"TKGB"
+BINARY_EXTENSION = ".gbp"
+PROJECT_FILETYPES = [("Project (JSON)", "*.json"), ("Project (binary)", f"*{BINARY_EXTENSION}")]
+
+#widgets are handed to the bulk-insert path in chunks while the file is read
+LOAD_CHUNK_SIZE = 1000
+
+WIDGET_TYPES = ("label", "entry", "button")
+
+_MAGIC_HEADER = struct.Struct("<4sHI")     #magic, version, header length
+_RECORD_LENGTH = struct.Struct("<I")
+_RECORD_FIXED = struct.Struct("<BBiiHH")   #type, anchor, x, y, width, height
+_STRING_LENGTH = struct.Struct("<I")
+_STRING_LENGTH_V2 = struct.Struct("<H")     #files written before version 3
+_SIZE_MAX = 0xFFFF
+_POSITION_RANGE = (-0x80000000, 0x7FFFFFFF)
+
+class ProjectFileError(Exception):
+    pass
+
+#spec dict of a model in the form WidgetManager.add_widgets expects
+#only explicitly set sizes are stored, measured sizes follow the text when the widget is created again
+def widget_spec(model) -> dict:
+    spec = {
+        "type": model.type.lower(),
+        "id": model.id,
+        "x": model.x,
+        "y": model.y,
+        "anchor": model.anchor,
+        "bg": model.bg,
+        "fg": model.fg
+    }
+    for attribute in model.sized:
+        spec[attribute] = getattr(model, attribute)
+    if model.type != "Entry":
+        spec["text"] = model.text
+    if model.tags:
+        spec["tags"] = list(model.tags)
+    return spec
+
+def _build_header(settings: dict, theme: dict, widget_count: int) -> dict:
+    return {
+        "format": PROJECT_FORMAT,
+        "version": PROJECT_VERSION,
+        "settings": settings,
+        "theme": theme,
+        "counters": {"label": IdCounters.label, "entry": IdCounters.entry, "button": IdCounters.button},
+        "widget_count": widget_count
+    }
+
+def _check_header(header: dict):
+    if header.get("format") != PROJECT_FORMAT:
+        raise ProjectFileError("Not a GUI Builder project")
+    if header.get("version", 0) > PROJECT_VERSION:
+        raise ProjectFileError(f"Project version {header['version']} is not supported (max. {PROJECT_VERSION})")
+
+#save settings (title, width, height, grid_size), theme and all models; binary form is picked by file extension
+def save_project(path: str, settings: dict, theme: dict, models, binary=None):
+    save_project_specs(path, settings, theme, [widget_spec(model) for model in models], binary)
+
+#save widget specs collected before (e.g. on the Tk thread for a save in another thread)
+#extra_header: additional header fields, loaders ignore fields they do not know
+def save_project_specs(path: str, settings: dict, theme: dict, specs, binary=None, extra_header: dict = None):
+    if binary is None:
+        binary = path.lower().endswith(BINARY_EXTENSION)
+    header = _build_header(settings, theme, len(specs))
+    header.update(extra_header or {})
+    if binary:
+        _save_binary(path, header, specs)
+    else:
+        _save_json(path, header, specs)
+
+def _save_json(path: str, header: dict, specs):
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(json.dumps(header) + "\n")
+        for spec in specs:
+            file.write(json.dumps(spec) + "\n")
+
+def _save_binary(path: str, header: dict, specs):
+    header_bytes = json.dumps(header).encode("utf-8")
+    with open(path, "wb") as file:
+        file.write(_MAGIC_HEADER.pack(BINARY_MAGIC, PROJECT_VERSION, len(header_bytes)))
+        file.write(header_bytes)
+        for spec in specs:
+            record = _pack_record(spec)
+            file.write(_RECORD_LENGTH.pack(len(record)))
+            file.write(record)
+
+def _pack_record(spec: dict) -> bytes:
+    _check_record(spec)
+    parts = [_RECORD_FIXED.pack(
+        WIDGET_TYPES.index(spec["type"]),
+        ANCHORS.index(spec["anchor"]),
+        spec["x"], spec["y"],
+        spec.get("width") or 0, spec.get("height") or 0    #0: not set explicitly
+    )]
+    for key in ("id", "bg", "fg", "text"):
+        value = (spec.get(key) or "").encode("utf-8")
+        parts.append(_STRING_LENGTH.pack(len(value)))
+        parts.append(value)
+    #tags never contain whitespace (see AttributesPanelManager), so they are stored as one space separated string
+    tags = " ".join(spec.get("tags", ())).encode("utf-8")
+    parts.append(_STRING_LENGTH.pack(len(tags)))
+    parts.append(tags)
+    return b"".join(parts)
+
+#values that do not fit the fixed record fields are reported like other project file problems
+def _check_record(spec: dict):
+    for key in ("width", "height"):
+        if not 0 <= (spec.get(key) or 0) <= _SIZE_MAX:
+            raise ProjectFileError(f"{spec.get('id')}: {key} {spec[key]} does not fit in a binary project (max. {_SIZE_MAX})")
+    for key in ("x", "y"):
+        if not _POSITION_RANGE[0] <= spec[key] <= _POSITION_RANGE[1]:
+            raise ProjectFileError(f"{spec.get('id')}: {key} {spec[key]} does not fit in a binary project")
+
+def _unpack_record(record: bytes, version: int = PROJECT_VERSION) -> dict:
+    string_length = _STRING_LENGTH if version >= 3 else _STRING_LENGTH_V2
+    type_index, anchor_index, x, y, width, height = _RECORD_FIXED.unpack_from(record)
+    spec = {
+        "type": WIDGET_TYPES[type_index],
+        "anchor": ANCHORS[anchor_index],
+        "x": x, "y": y, "width": width, "height": height
+    }
+    offset = _RECORD_FIXED.size
+    for key in ("id", "bg", "fg", "text"):
+        (length,) = string_length.unpack_from(record, offset)
+        offset += string_length.size
+        spec[key] = record[offset:offset + length].decode("utf-8")
+        offset += length
+    if spec["type"] == "entry":
+        del spec["text"]
+    if version >= 2:
+        (length,) = string_length.unpack_from(record, offset)
+        offset += string_length.size
+        tags = record[offset:offset + length].decode("utf-8").split()
+        if tags:
+            spec["tags"] = tags
+    return spec
+
+def _is_binary(file) -> bool:
+    return file.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+
+#read only the header (settings, theme, counters) of a project file
+def read_project_header(path: str) -> dict:
+    with open(path, "rb") as file:
+        if _is_binary(file):
+            file.seek(0)
+            _, _, header_length = _MAGIC_HEADER.unpack(file.read(_MAGIC_HEADER.size))
+            header = json.loads(file.read(header_length).decode("utf-8"))
+        else:
+            file.seek(0)
+            header = json.loads(file.readline().decode("utf-8"))
+    _check_header(header)
+    return header
+
+#yield the widget specs of a project file one by one without reading the whole file into memory
+def iter_project_widgets(path: str):
+    with open(path, "rb") as file:
+        if _is_binary(file):
+            file.seek(0)
+            _, version, header_length = _MAGIC_HEADER.unpack(file.read(_MAGIC_HEADER.size))
+            _check_header(json.loads(file.read(header_length).decode("utf-8")))
+            while True:
+                length_bytes = file.read(_RECORD_LENGTH.size)
+                if not length_bytes:
+                    break
+                if len(length_bytes) < _RECORD_LENGTH.size:
+                    raise ProjectFileError("Truncated project file")
+                (length,) = _RECORD_LENGTH.unpack(length_bytes)
+                record = file.read(length)
+                if len(record) < length:
+                    raise ProjectFileError("Truncated project file")
+                yield _unpack_record(record, version)
+        else:
+            file.seek(0)
+            _check_header(json.loads(file.readline().decode("utf-8")))
+            for line in file:
+                if line.strip():
+                    yield json.loads(line.decode("utf-8"))
+
+#stream the widgets of a project file into the bulk-insert path of a WidgetManager
+def load_project(path: str, widget_manager, chunk_size: int = LOAD_CHUNK_SIZE) -> list[int]:
+    header = read_project_header(path)
+    window_ids = []
+    chunk = []
+    for spec in iter_project_widgets(path):
+        chunk.append(spec)
+        if len(chunk) >= chunk_size:
+            window_ids.extend(widget_manager.add_widgets(chunk))
+            chunk = []
+    if chunk:
+        window_ids.extend(widget_manager.add_widgets(chunk))
+
+    #continue numbering after the loaded ids
+    for name, value in header.get("counters", {}).items():
+        if hasattr(IdCounters, name):
+            setattr(IdCounters, name, max(getattr(IdCounters, name), value))
+    return window_ids
\ No newline at end of file
@@ -1,17 +1,40 @@
 import tkinter as tk
 from Theme import *
 from typing import Dict, Optional, Set
+from SpatialIndex import SpatialIndex, BBox
+from History import CommandHistory
+from CanvasBatch import run_batch
+from Tracing import traced
+from Viewport import Viewport
+from FrameScheduler import FrameScheduler, ALL
 
 class SelectionManager:
-    def __init__(self, canvas: tk.Canvas):
+    def __init__(self, canvas: tk.Canvas, spatial_index: SpatialIndex, history: Optional[CommandHistory] = None, tracer=None, viewport: Optional[Viewport] = None, outline_threshold: int = GROUP_OUTLINE_THRESHOLD, scheduler: Optional[FrameScheduler] = None):
         self.canvas = canvas
+        self.spatial_index = spatial_index          #model-side index for hit-testing (kept up to date by WidgetManager)
+        self.history = history                      #records moves for undo/redo
+        self.tracer = tracer                        #EventTracer or None
+        self.viewport = viewport or Viewport(canvas)    #selection state is in design coordinates, outlines are drawn in view coordinates
         self._selected: Set[int] = set()          #selected canvas item IDs (window items)
-        self._rects: Dict[int, int] = {}          #window_id -> rectangle_id
+        self._rects: Dict[int, int] = {}          #window_id -> rectangle_id (per-widget outlines of small selections)
+        self.outline_threshold = outline_threshold
+        self._group_rect: Optional[int] = None    #union outline of a large selection
+        self._marker_rect: Optional[int] = None   #outline of the last selected widget in a large selection
         self._last_selected = None
+        self.companion_items = lambda item_id: ()    #other canvas items drawn for a widget (proxies), tagged along with it
+        self.proxy_drag_context = None              #(widget_map, clamped_delta, panel_update) for drags that start on a proxy
 
-        #rectangle selection state
+        #outlines are brought up to date once per frame (see schedule_refresh)
+        self.scheduler = scheduler or FrameScheduler(canvas, tracer)
+        self.scheduler.register("outlines", self._flush_outlines, FRAME_PRIORITY_OUTLINES)
+
+        #union bounding box of the selection, maintained incrementally from the spatial index
+        self._group_bbox: Optional[BBox] = None
+        self._group_bbox_valid = True
+
+        #rectangle selection state (the start is kept in canvas coordinates)
         self._rectangle_selection_id:  Optional[int] = None
-        self._rectangle_selection_start: Optional[tuple[int, int]] = None
+        self._rectangle_selection_start: Optional[tuple[float, float]] = None
         self._rectangle_selection_dragging: bool = False
         self._rectangle_selection_additive: bool = False
 
@@ -20,20 +43,39 @@ class SelectionManager:
         self._widget_drag_end = None
         self._dragging_widgets = False
 
+        #motion deltas collected since the last frame, applied once per idle cycle
+        self._pending_drag_dx = 0
+        self._pending_drag_dy = 0
+        self._drag_flush_id = None
+        self._drag_context = None       #(widget_map, clamped_delta, panel_update) of the running drag
+
     def clear(self):
-        for item_id in list(self._selected):
-            self._remove_highlight(item_id)
+        #every outline carries OUTLINE_TAG, so they all go with one call
+        self.canvas.delete(OUTLINE_TAG)
+        self._rects.clear()
+        self._group_rect = self._marker_rect = None
         self._selected.clear()
+        self.canvas.dtag(SELECTED_TAG, SELECTED_TAG)
+        self._group_bbox, self._group_bbox_valid = None, True
 
     def select_only(self, item_id: Optional[int]):
         if item_id is None:
             self.clear()
             return
-        for other in list(self._selected):
-            if other != item_id:
-                self._remove_highlight(other)
+        self._remove_group_outline()
+        #outlines of the other widgets go with one delete call, the selected tag with one dtag call
+        kept_rect = self._rects.pop(item_id, None)
+        if self._rects:
+            self.canvas.delete(*self._rects.values())
+        self._rects = {item_id: kept_rect} if kept_rect else {}
+        self.canvas.dtag(SELECTED_TAG, SELECTED_TAG)
         self._selected = {item_id}
+        self._tag_selected(item_id)
+        if kept_rect:
+            #the outline moves with the widget during a drag
+            self.canvas.addtag_withtag(SELECTED_TAG, kept_rect)
         self._last_selected = item_id
+        self._group_bbox, self._group_bbox_valid = self.spatial_index.bbox(item_id), True
 
     def toggle(self, item_id: Optional[int]):
         if item_id is None:
@@ -41,9 +83,47 @@ class SelectionManager:
         if item_id in self._selected:
             self._remove_highlight(item_id)
             self._selected.remove(item_id)
+            self._untag_selected(item_id)
+            self._shrink_group_bbox(item_id)
         else:
             self._selected.add(item_id)
+            self._tag_selected(item_id)
+            self._last_selected = item_id
+            self._grow_group_bbox(item_id)
+
+    #replace the selection with the given items (e.g. the result of a widget query)
+    def select_items(self, item_ids):
+        self.clear()
+        commands = []   #the selected tag is added to all window items (and proxy items) with one Tcl script
+        for item_id in item_ids:
+            if item_id in self._selected:
+                continue
+            self._selected.add(item_id)
             self._last_selected = item_id
+            for tagged_id in (item_id, *self.companion_items(item_id)):
+                commands.append(("addtag", SELECTED_TAG, "withtag", tagged_id))
+        run_batch(self.canvas, commands)
+        self._group_bbox_valid = False      #recomputed from the index when it is needed
+        self.schedule_refresh()
+
+    #remove several items from the selection (e.g. before they are deleted)
+    def deselect(self, item_ids):
+        for item_id in item_ids:
+            if item_id in self._selected:
+                self.toggle(item_id)
+
+    def _tag_selected(self, item_id: int):
+        self.canvas.addtag_withtag(SELECTED_TAG, item_id)
+        for companion_id in self.companion_items(item_id):
+            self.canvas.addtag_withtag(SELECTED_TAG, companion_id)
+
+    def _untag_selected(self, item_id: int):
+        self.canvas.dtag(item_id, SELECTED_TAG)
+        for companion_id in self.companion_items(item_id):
+            self.canvas.dtag(companion_id, SELECTED_TAG)
+
+    def is_selected(self, item_id) -> bool:
+        return item_id in self._selected
 
     def selected_ids(self) -> frozenset[int]:
         return frozenset(self._selected)    #frozenset so external code can't mutate the collection
@@ -51,39 +131,175 @@ class SelectionManager:
     def last_selected_id(self):
         return self._last_selected
 
+    #union bounding box (x0, y0, x1, y1) of all selected widgets in model coordinates, None if nothing is selected
+    def group_bbox(self) -> Optional[BBox]:
+        if not self._group_bbox_valid:
+            self._group_bbox = None
+            for item_id in self._selected:
+                self._union_group_bbox(self.spatial_index.bbox(item_id))
+            self._group_bbox_valid = True
+        return self._group_bbox
+
+    #called when the geometry of a widget changed (resize, anchor change, snap, align, ...)
+    def item_geometry_changed(self, item_id: int):
+        if item_id in self._selected:
+            self._group_bbox_valid = False
+
+    #compute clamped delta, so that the selection cannot be moved outside a canvas of the given size
+    def clamped_delta(self, dx: int, dy: int, canvas_width: int, canvas_height: int) -> tuple[int, int]:
+        bbox = self.group_bbox()
+        if not bbox:
+            return dx, dy
+        x0, y0, x1, y1 = bbox
+        dx = max(-x0, min(canvas_width - x1, dx))
+        dy = max(-y0, min(canvas_height - y1, dy))
+        return dx, dy
+
+    def _grow_group_bbox(self, item_id: int):
+        if self._group_bbox_valid:
+            self._union_group_bbox(self.spatial_index.bbox(item_id))
+
+    def _shrink_group_bbox(self, item_id: int):
+        if not self._selected:
+            self._group_bbox, self._group_bbox_valid = None, True
+            return
+        bbox = self.spatial_index.bbox(item_id)
+        group = self._group_bbox
+        #the box only shrinks if the removed widget touched one of its edges → recompute lazily
+        if not self._group_bbox_valid or not bbox or not group or any(bbox[i] == group[i] for i in range(4)):
+            self._group_bbox_valid = False
+
+    def _union_group_bbox(self, bbox: Optional[BBox]):
+        if bbox is None:
+            return
+        if self._group_bbox is None:
+            self._group_bbox = bbox
+            return
+        x0, y0, x1, y1 = self._group_bbox
+        self._group_bbox = (min(x0, bbox[0]), min(y0, bbox[1]), max(x1, bbox[2]), max(y1, bbox[3]))
+
     def refresh(self, item_id: int):
         self._ensure_highlight(item_id)
 
+    #mark the outline of an item (or all outlines) dirty, they are redrawn once in the next frame
+    def schedule_refresh(self, item_id=ALL):
+        self.scheduler.mark("outlines", item_id)
+
+    def _flush_outlines(self, item_ids):
+        if ALL in item_ids or self._uses_group_outline():
+            self.refresh_all()
+            return
+        for item_id in item_ids:
+            self._ensure_highlight(item_id)
+
+    #large selections are shown with a union outline instead of one dashed outline per widget
+    def _uses_group_outline(self) -> bool:
+        return len(self._selected) > self.outline_threshold
+
+    #refresh all outlines; existing outline rectangles are updated from the model boxes with one Tcl script
+    #(also after a zoom, the padding of the outlines stays the same in screen pixels)
     def refresh_all(self):
+        if self._uses_group_outline():
+            self._draw_group_outline()
+            return
+        self._remove_group_outline()
+        commands = []
         for item_id in self._selected:
-            self._ensure_highlight(item_id)
+            bbox = self.spatial_index.bbox(item_id)
+            rect_id = self._rects.get(item_id)
+            if bbox is None or rect_id is None:
+                self._ensure_highlight(item_id)
+                continue
+            x1, y1, x2, y2 = self.viewport.bbox_to_canvas(bbox)
+            outline_color = LAST_SELECTED_COLOR if self._last_selected == item_id else SELECTION_COLOR
+            commands.append(("coords", rect_id, x1 - SELECTION_PADDING, y1 - SELECTION_PADDING, x2 + SELECTION_PADDING, y2 + SELECTION_PADDING))
+            commands.append(("itemconfigure", rect_id, "-outline", outline_color))
+        commands.append(("raise", OUTLINE_TAG))
+        run_batch(self.canvas, commands)
+
+    #union outline of the selection plus a solid marker on the last selected widget; replaces the per-widget outlines
+    def _draw_group_outline(self):
+        if self._rects:
+            self.canvas.delete(*self._rects.values())
+            self._rects.clear()
+        bbox = self.group_bbox()
+        if bbox is None:
+            self._remove_group_outline()
+            return
+        tags = (SELECTED_TAG, OUTLINE_TAG)
+        commands = []
+        x1, y1, x2, y2 = self._padded(bbox)
+        if self._group_rect is None:
+            self._group_rect = self.canvas.create_rectangle(
+                x1, y1, x2, y2, outline=SELECTION_COLOR, width=SELECTION_WIDTH, dash=SELECTION_DASH, fill="", tags=tags
+            )
+        else:
+            commands.append(("coords", self._group_rect, x1, y1, x2, y2))
 
-    #create selection rectangle
-    def handle_canvas_press(self, event):
-        #record start coordinates and whether ctrl is held
-        self._rectangle_selection_start = (event.x, event.y)
+        marker_bbox = self.spatial_index.bbox(self._last_selected) if self._last_selected in self._selected else None
+        if marker_bbox is None:
+            if self._marker_rect is not None:
+                commands.append(("delete", self._marker_rect))
+                self._marker_rect = None
+        else:
+            x1, y1, x2, y2 = self._padded(marker_bbox)
+            if self._marker_rect is None:
+                self._marker_rect = self.canvas.create_rectangle(x1, y1, x2, y2, outline=LAST_SELECTED_COLOR, width=1, fill="", tags=tags)
+            else:
+                commands.append(("coords", self._marker_rect, x1, y1, x2, y2))
+        commands.append(("raise", OUTLINE_TAG))
+        run_batch(self.canvas, commands)
+
+    def _remove_group_outline(self):
+        for rect_id in (self._group_rect, self._marker_rect):
+            if rect_id is not None:
+                self.canvas.delete(rect_id)
+        self._group_rect = self._marker_rect = None
+
+    #outline rectangle in canvas coordinates around a model bounding box
+    def _padded(self, bbox):
+        x1, y1, x2, y2 = self.viewport.bbox_to_canvas(bbox)
+        return x1 - SELECTION_PADDING, y1 - SELECTION_PADDING, x2 + SELECTION_PADDING, y2 + SELECTION_PADDING
+
+    #drag the widget under the mouse or create selection rectangle
+    def handle_canvas_press(self, event, sync_callback=None):
+        #proxies have no bindings of their own, a press on one starts the same drag as a press on a real widget
+        if self.proxy_drag_context:
+            item_id = self._find_topmost_window_at(*self.viewport.to_design(event.x, event.y))
+            if item_id is not None:
+                self.start_widget_drag(event)
+                result = self.handle_widget_click(event, item_id)
+                if sync_callback:
+                    sync_callback()
+                return result
+
+        #record start coordinates (canvas coordinates, the view may be scrolled) and whether ctrl is held
+        x, y = self.canvas.canvasx(event.x), self.canvas.canvasy(event.y)
+        self._rectangle_selection_start = (x, y)
         self._rectangle_selection_dragging = False
         self._rectangle_selection_additive = bool(event.state & CTRL_KEY)
 
         #create rectangle outline
         if self._rectangle_selection_id is None:
             self._rectangle_selection_id = self.canvas.create_rectangle(
-                event.x, event.y, event.x, event.y,
+                x, y, x, y,
                 outline=SELECTION_COLOR, width=SELECTION_WIDTH, dash=SELECTION_DASH, fill=""
             )
         else:
-            self.canvas.coords(self._rectangle_selection_id, event.x, event.y, event.x, event.y)
+            self.canvas.coords(self._rectangle_selection_id, x, y, x, y)
 
         #make sure outline is on top
         self.canvas.tag_raise(self._rectangle_selection_id)
 
     #resize selection rectangle based on mouse movement
     def handle_canvas_drag(self, event):
+        if self._widget_drag_start:
+            return self.handle_widget_drag(event, *self.proxy_drag_context)
         if not self._rectangle_selection_start:
             return
         self._rectangle_selection_dragging = True
         x0, y0 = self._rectangle_selection_start
-        x1, y1 = event.x, event.y
+        x1, y1 = self.canvas.canvasx(event.x), self.canvas.canvasy(event.y)
 
         #update rectangle
         self.canvas.coords(self._rectangle_selection_id, x0, y0, x1, y1)
@@ -91,12 +307,15 @@ class SelectionManager:
 
     #select all widgets that are fully enclosed in the selection rectangle
     def handle_canvas_release(self, event, sync_callback):
+        if self._widget_drag_start:
+            return self.end_widget_drag()
         try:
             if not self._rectangle_selection_start:
                 return
 
-            x0, y0 = self._rectangle_selection_start
-            x1, y1 = event.x, event.y
+            #corners in design coordinates
+            x0, y0 = self.viewport.canvas_to_design(*self._rectangle_selection_start)
+            x1, y1 = self.viewport.to_design(event.x, event.y)
             self._rectangle_selection_start = None
 
             #normalize corners
@@ -105,7 +324,7 @@ class SelectionManager:
 
             #when dragging is false → treat as normal click
             if not self._rectangle_selection_dragging:
-                item_id = self._find_topmost_window_at(event.x, event.y)
+                item_id = self._find_topmost_window_at(x1, y1)
                 if item_id is None:
                     self.clear()
                 else:
@@ -117,13 +336,12 @@ class SelectionManager:
                     sync_callback()
             #when dragging is true → select all items fully enclosed by rectangle selection
             else:
-                enclosed_widgets = self.canvas.find_enclosed(x0n, y0n, x1n, y1n)
-                #filter out everything that's not a window item
-                enclosed_windows = [i for i in enclosed_widgets if self.canvas.type(i) == "window"]
+                #the spatial index only contains window items, so grid lines and outlines never show up here
+                enclosed_windows = self.spatial_index.find_enclosed(x0n, y0n, x1n, y1n)
 
                 if self._rectangle_selection_additive:
                     for window_id in enclosed_windows:
-                        if window_id not in self.selected_ids():
+                        if window_id not in self._selected:
                             self.toggle(window_id)    #only toggle widgets that are not yet selected
                 else:
                     self.clear()
@@ -134,7 +352,7 @@ class SelectionManager:
                     sync_callback()
         finally:
             #refresh outlines
-            self.refresh_all()
+            self.schedule_refresh()
             #remove rectangle selection
             if self._rectangle_selection_id:
                 self.canvas.delete(self._rectangle_selection_id)
@@ -150,69 +368,104 @@ class SelectionManager:
             if item_id not in self.selected_ids():
                 self.select_only(item_id)
 
-        self.refresh_all()
+        self.schedule_refresh()
         return "break"  #prevent canvas from clearing selection
 
     def start_widget_drag(self, event):
+        #the whole drag gesture becomes a single undo step
+        if self.history and self._widget_drag_start is None:
+            self.history.begin()
         self._widget_drag_start = (event.x_root, event.y_root)
         self._widget_drag_end = (event.x_root, event.y_root)
         self._dragging_widgets = False
 
+    #collect motion deltas and apply them once per frame instead of once per motion event
     def handle_widget_drag(self, event, widget_map, clamped_delta, panel_update=None):
         if not self._widget_drag_start:
             return "break"
 
-        dx, dy = event.x_root - self._widget_drag_end[0], event.y_root - self._widget_drag_end[1]
-        dx, dy = clamped_delta(dx, dy)
-
         #check drag threshold before moving widgets
         if not self._dragging_widgets:
             self._dragging_widgets = True
 
-        #move selected widgets
-        for item_id in self.selected_ids():
-            self.canvas.move(item_id, dx, dy)
-            model = widget_map.get(item_id)["model"]
-            if model:
-                model.x += dx
-                model.y += dy
-                if panel_update and len(self.selected_ids()) == 1:
-                    panel_update(model)
-
-            self.refresh(item_id)
-
+        self._pending_drag_dx += event.x_root - self._widget_drag_end[0]
+        self._pending_drag_dy += event.y_root - self._widget_drag_end[1]
         self._widget_drag_end = (event.x_root, event.y_root)
+        self._drag_context = (widget_map, clamped_delta, panel_update)
+
+        if self._drag_flush_id is None:
+            self._drag_flush_id = self.canvas.after_idle(traced(self.tracer, "SelectionManager._flush_widget_drag", self._flush_widget_drag))
         return "break"
 
     def end_widget_drag(self):
+        #apply motion that arrived after the last frame
+        if self._drag_flush_id is not None:
+            self.canvas.after_cancel(self._drag_flush_id)
+            self._flush_widget_drag()
+        if self.history and self._widget_drag_start is not None:
+            self.history.commit()
         self._widget_drag_start = None
         self._widget_drag_end = None
         self._dragging_widgets = False
+        self._drag_context = None
         return "break"
 
+    def _flush_widget_drag(self):
+        self._drag_flush_id = None
+        dx, dy = self._pending_drag_dx, self._pending_drag_dy
+        self._pending_drag_dx = self._pending_drag_dy = 0
+        if self._drag_context is None:
+            return
+        widget_map, clamped_delta, panel_update = self._drag_context
+        dx, dy = clamped_delta(*self.viewport.delta_to_design(dx, dy))
+        self.move_selected(dx, dy, widget_map, panel_update)
+
+    #move all selected widgets and their outlines with a single canvas call, then write the models back in one batch
+    #dx and dy are in design coordinates
+    def move_selected(self, dx: int, dy: int, widget_map, panel_update=None):
+        if not dx and not dy:
+            return
+        self.canvas.move(SELECTED_TAG, dx * self.viewport.scale, dy * self.viewport.scale)
+
+        #positions are written to the store columns directly (no view per widget)
+        xs, ys = widget_map.xs, widget_map.ys
+        for item_id in self._selected:
+            slot = widget_map.slot(item_id)
+            xs[slot] += dx
+            ys[slot] += dy
+            widget_map.touch(slot)
+            self.spatial_index.update(item_id, widget_map.bbox(item_id))
+
+        if self.history:
+            self.history.record_move(self._selected, dx, dy)
+
+        #a group move only translates the union box
+        if self._group_bbox_valid and self._group_bbox:
+            x0, y0, x1, y1 = self._group_bbox
+            self._group_bbox = (x0 + dx, y0 + dy, x1 + dx, y1 + dy)
+
+        if panel_update and len(self._selected) == 1:
+            panel_update(widget_map.model(item_id))
+
     #find clicked widget
     def _find_topmost_window_at(self, x: int, y: int):
-        items = self.canvas.find_overlapping(x, y, x, y)
-        for item in reversed(items):  #last is top-most
-            if self.canvas.type(item) == "window":
-                return item
-        return None
+        return self.spatial_index.find_at(x, y)
 
     def _ensure_highlight(self, item_id: int):
         #only draw outline if item is selected:
         if item_id not in self._selected:
             self._remove_highlight(item_id)
             return
+        if self._uses_group_outline():
+            self._draw_group_outline()
+            return
 
-        bbox = self.canvas.bbox(item_id)
+        #model bounding box (proxies have no widget the canvas could measure)
+        bbox = self.spatial_index.bbox(item_id)
         if not bbox:
-            return  #item is outside view
+            return
 
-        x1, y1, x2, y2 = bbox
-        x1 -= SELECTION_PADDING
-        y1 -= SELECTION_PADDING
-        x2 += SELECTION_PADDING
-        y2 += SELECTION_PADDING
+        x1, y1, x2, y2 = self._padded(bbox)
 
         outline_color = LAST_SELECTED_COLOR if self._last_selected == item_id else SELECTION_COLOR
         rect_id = self._rects.get(item_id)
@@ -227,6 +480,7 @@ class SelectionManager:
                 width=SELECTION_WIDTH,
                 dash=SELECTION_DASH,
                 fill="",
+                tags=(SELECTED_TAG, OUTLINE_TAG)
             )
             self._rects[item_id] = rect_id
         self.canvas.tag_raise(rect_id)
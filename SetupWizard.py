@@ -1,19 +1,10 @@
-import os
+import time
 import tkinter as tk
 from tkinter import colorchooser, messagebox, filedialog
 from Theme import *
-from Designer import Designer
-from PIL import Image, ImageTk
-
-def load_icon(path, size):
-    try:
-        if path and os.path.exists(path):
-            icon = Image.open(path).convert("RGBA")
-            icon = icon.resize(size, Image.Resampling.LANCZOS)
-            return ImageTk.PhotoImage(icon)
-    except Exception as e:
-        messagebox.showerror("File error", f"File not supported: {e}")
-        return None
+from IconCache import IconLoader, load_default_icon
+
+#the Designer, its managers and Pillow are imported on first use, so the wizard appears without loading them
 
 class SetupWizard:
     def __init__(self, root: tk.Tk):
@@ -30,9 +21,17 @@ class SetupWizard:
             "toolbar": {"bg": TOOLBAR_COLOR}
         }
 
+        #one PhotoImage for the title bar and the preview (replaced when a custom icon is selected)
+        self.icon = load_default_icon()
+        #custom icons are decoded and resized off the Tk thread
+        self.icon_loader = IconLoader(self.root)
+
         self._create_title_bar()
         self._build_setup_ui()
 
+        #designs of sessions that ended without closing the designer are offered once the wizard is shown
+        self.root.after_idle(self._offer_recovery)
+
     #create title bar
     def _create_title_bar(self):
         def start_move(event):
@@ -54,8 +53,7 @@ class SetupWizard:
         title_bar.bind("<B1-Motion>", do_move)
 
         #add icon
-        icon_path = os.path.join(os.path.dirname(__file__), "icon.ico")
-        self.icon_setup = load_icon(icon_path, (20, 20))
+        self.icon_setup = self.icon
         if self.icon_setup:
             icon_label = tk.Label(title_bar, image=self.icon_setup, bg=TITLE_BAR_COLOR)
             icon_label.pack(side="left", padx=2, pady=2)
@@ -69,9 +67,14 @@ class SetupWizard:
         title_label.bind("<B1-Motion>", do_move)
 
         #add close button
-        close_button = tk.Button(title_bar, text=" X ", bg=TITLE_BAR_COLOR, fg=TITLE_BAR_TEXT_COLOR, relief="flat", command=lambda: self.root.destroy())
+        close_button = tk.Button(title_bar, text=" X ", bg=TITLE_BAR_COLOR, fg=TITLE_BAR_TEXT_COLOR, relief="flat", command=self._close)
         close_button.pack(side="right")
 
+    #stop the icon worker (an unfinished decode is dropped) and close the application
+    def _close(self):
+        self.icon_loader.shutdown()
+        self.root.destroy()
+
     #build setup UI
     def _build_setup_ui(self):
         #window title
@@ -144,8 +147,6 @@ class SetupWizard:
         label_icon = tk.Label(self.root, text="Icon:", bg=BACKGROUND_COLOR, fg=TEXT_COLOR)
         label_icon.grid(row=7, column=0, sticky="E")
 
-        icon_path = os.path.join(os.path.dirname(__file__), "icon.ico")
-        self.icon = load_icon(icon_path, (20, 20))
         if self.icon:
             self.label_icon_preview = tk.Label(self.root, image=self.icon, bg=BACKGROUND_COLOR)
             self.label_icon_preview.grid(row=7, column=1, sticky="W")
@@ -160,6 +161,10 @@ class SetupWizard:
         button_create_gui_window = tk.Button(self.root, text="Launch designer", bg=BUTTON_COLOR, fg=TEXT_COLOR, command=self.launch_designer)
         button_create_gui_window.grid(row=8, column=0, padx=5, pady=10, sticky="W")
 
+        #open project
+        button_open_project = tk.Button(self.root, text="Open project", bg=BUTTON_COLOR, fg=TEXT_COLOR, command=self.open_project)
+        button_open_project.grid(row=8, column=3, padx=5, pady=10, sticky="EW")
+
     #actions
     def choose_color(self, element_type: str, attribute: str):
         color = colorchooser.askcolor()[1]
@@ -170,10 +175,32 @@ class SetupWizard:
     def select_icon(self):
         file_path = filedialog.askopenfilename(filetypes=[("Image files", "*.png *.jpg *.jpeg *.ico")])
         if file_path:
-            icon = load_icon(file_path, (20, 20))
-            if icon is not None:
-                self.icon = icon
-                self.label_icon_preview.config(image=self.icon)
+            self.icon_loader.request(file_path, ICON_SIZE, self._set_icon)
+
+    def _set_icon(self, icon: tk.PhotoImage):
+        self.icon = icon
+        self.label_icon_preview.config(image=self.icon)
+
+    #offer the autosaved sessions (newest first); a declined session is deleted
+    def _offer_recovery(self):
+        from Autosave import find_sessions, read_session_header, session_time, discard_session
+        from ProjectFile import ProjectFileError
+        for path in find_sessions():
+            try:
+                header = read_session_header(path)
+            except (OSError, ValueError, ProjectFileError):
+                discard_session(path)
+                continue
+            title = header["settings"].get("title") or "Untitled"
+            saved = time.strftime("%Y-%m-%d %H:%M", time.localtime(session_time(path)))
+            message = f"The designer \"{title}\" was not closed (last autosave {saved}).\n\nRecover the design?"
+            if not messagebox.askyesno("Recover session", message, parent=self.root):
+                discard_session(path)
+                continue
+            from Designer import open_recovered_session
+            self.root.withdraw()
+            if open_recovered_session(self.root, path, self.icon) is None:
+                self.root.deiconify()
 
     def launch_designer(self):
         width_str = self.entry_window_width.get()
@@ -192,5 +219,17 @@ class SetupWizard:
         canvas_height = int(height_str)
 
         #hide setup window and launch Designer
+        from Designer import Designer
+        self.root.withdraw()
+        Designer(self.root, title, canvas_width, canvas_height, TITLE_BAR_HEIGHT, TOOLBAR_HEIGHT, self.theme, self.icon)
+
+    def open_project(self):
+        from ProjectFile import PROJECT_FILETYPES
+        file_path = filedialog.askopenfilename(filetypes=PROJECT_FILETYPES)
+        if not file_path:
+            return
+        #hide setup window and launch Designer with the settings stored in the project
+        from Designer import open_project_window
         self.root.withdraw()
-        Designer(self.root, title, canvas_width, canvas_height, TITLE_BAR_HEIGHT, TOOLBAR_HEIGHT, self.theme, self.icon)
\ No newline at end of file
+        if open_project_window(self.root, file_path, self.icon) is None:
+            self.root.deiconify()
\ No newline at end of file
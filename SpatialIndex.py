@@ -0,0 +1,122 @@
+from typing import Dict, List, Optional, Set, Tuple
+from Theme import SPATIAL_INDEX_CELL_SIZE
+
+BBox = Tuple[int, int, int, int]
+
+#uniform grid that maps canvas cells to the window items overlapping them
+#bounding boxes come from the data models, so queries never have to ask Tcl
+#window items are stacked in creation order, so a higher window_id is drawn on top
+class SpatialIndex:
+    def __init__(self, cell_size: int = SPATIAL_INDEX_CELL_SIZE):
+        self.cell_size = cell_size
+        self._cells: Dict[Tuple[int, int], Set[int]] = {}   #(column, row) -> window_ids
+        self._bboxes: Dict[int, BBox] = {}                  #window_id -> (x0, y0, x1, y1)
+
+    def __len__(self):
+        return len(self._bboxes)
+
+    def __contains__(self, window_id: int):
+        return window_id in self._bboxes
+
+    def bbox(self, window_id: int) -> Optional[BBox]:
+        return self._bboxes.get(window_id)
+
+    def clear(self):
+        self._cells.clear()
+        self._bboxes.clear()
+
+    def insert(self, window_id: int, bbox: BBox):
+        if window_id in self._bboxes:
+            self.update(window_id, bbox)
+            return
+        self._bboxes[window_id] = bbox
+        for cell in self._cell_keys(bbox):
+            self._cells.setdefault(cell, set()).add(window_id)
+
+    def update(self, window_id: int, bbox: BBox):
+        old_bbox = self._bboxes.get(window_id)
+        if old_bbox is None:
+            self.insert(window_id, bbox)
+            return
+        self._bboxes[window_id] = bbox
+
+        #only touch the cell buckets when the covered cell range changed
+        if self._cell_range(old_bbox) == self._cell_range(bbox):
+            return
+        for cell in self._cell_keys(old_bbox):
+            self._discard(cell, window_id)
+        for cell in self._cell_keys(bbox):
+            self._cells.setdefault(cell, set()).add(window_id)
+
+    def remove(self, window_id: int):
+        bbox = self._bboxes.pop(window_id, None)
+        if bbox is None:
+            return
+        for cell in self._cell_keys(bbox):
+            self._discard(cell, window_id)
+
+    #topmost window item containing the point (x, y)
+    def find_at(self, x: int, y: int) -> Optional[int]:
+        bucket = self._cells.get((x // self.cell_size, y // self.cell_size))
+        if not bucket:
+            return None
+        topmost = None
+        for window_id in bucket:
+            x0, y0, x1, y1 = self._bboxes[window_id]
+            if x0 <= x <= x1 and y0 <= y <= y1 and (topmost is None or window_id > topmost):
+                topmost = window_id
+        return topmost
+
+    #window items fully enclosed by the rectangle, in stacking order (same semantics as canvas.find_enclosed)
+    def find_enclosed(self, x0: int, y0: int, x1: int, y1: int) -> List[int]:
+        return sorted(
+            window_id for window_id in self._candidates((x0, y0, x1, y1))
+            if self._is_enclosed(self._bboxes[window_id], x0, y0, x1, y1)
+        )
+
+    #window items that overlap the rectangle, in stacking order (same semantics as canvas.find_overlapping)
+    def find_overlapping(self, x0: int, y0: int, x1: int, y1: int) -> List[int]:
+        return sorted(
+            window_id for window_id in self._candidates((x0, y0, x1, y1))
+            if self._is_overlapping(self._bboxes[window_id], x0, y0, x1, y1)
+        )
+
+    def _candidates(self, bbox: BBox) -> Set[int]:
+        column0, row0, column1, row1 = self._cell_range(bbox)
+        #a huge query rectangle covers more cells than there are items → scan the items directly
+        if (column1 - column0 + 1) * (row1 - row0 + 1) > len(self._bboxes):
+            return set(self._bboxes)
+        candidates = set()
+        for column in range(column0, column1 + 1):
+            for row in range(row0, row1 + 1):
+                bucket = self._cells.get((column, row))
+                if bucket:
+                    candidates |= bucket
+        return candidates
+
+    def _cell_range(self, bbox: BBox) -> Tuple[int, int, int, int]:
+        x0, y0, x1, y1 = bbox
+        size = self.cell_size
+        return x0 // size, y0 // size, x1 // size, y1 // size
+
+    def _cell_keys(self, bbox: BBox):
+        column0, row0, column1, row1 = self._cell_range(bbox)
+        for column in range(column0, column1 + 1):
+            for row in range(row0, row1 + 1):
+                yield column, row
+
+    def _discard(self, cell: Tuple[int, int], window_id: int):
+        bucket = self._cells.get(cell)
+        if bucket is None:
+            return
+        bucket.discard(window_id)
+        if not bucket:
+            del self._cells[cell]
+
+    @staticmethod
+    def _is_enclosed(bbox: BBox, x0: int, y0: int, x1: int, y1: int) -> bool:
+        return x0 <= bbox[0] and y0 <= bbox[1] and bbox[2] <= x1 and bbox[3] <= y1
+
+    @staticmethod
+    def _is_overlapping(bbox: BBox, x0: int, y0: int, x1: int, y1: int) -> bool:
+        return bbox[0] <= x1 and x0 <= bbox[2] and bbox[1] <= y1 and y0 <= bbox[3]
\ No newline at end of file
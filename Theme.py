@@ -2,6 +2,8 @@
 TITLE_BAR_COLOR = "#202020"
 TITLE_BAR_TEXT_COLOR = "#FFFFFF"
 TITLE_BAR_HEIGHT = 25
+ICON_SIZE = (20, 20)    #title bar and preview icon
+ICON_POLL_INTERVAL = 20 #ms between checks for an icon that is decoded in the background
 
 #background
 BACKGROUND_COLOR = "#404040"
@@ -11,6 +13,7 @@ BUTTON_COLOR = "#505050"
 
 #entry
 ENTRY_COLOR = "#606060"
+INVALID_ENTRY_COLOR = "#8B3A3A"     #entry with a value that cannot be applied (e.g. a widget name that is taken)
 
 #text
 TEXT_COLOR = "#FFFFFF"
@@ -26,19 +29,68 @@ LAST_SELECTED_COLOR = "#FF0000"
 SELECTION_WIDTH = 2
 SELECTION_DASH = (3, 2)
 SELECTION_PADDING = 3
+SELECTED_TAG = "selected"   #canvas tag shared by selected window items and their outlines
+OUTLINE_TAG = "outline"     #canvas tag shared by all selection outlines (raised and deleted with one call)
+GROUP_OUTLINE_THRESHOLD = 50    #larger selections get one union outline and a marker instead of one outline per widget
+
+#flush order of the frame scheduler channels (lower first): outlines, then panel fields, then the
+#panel position limits (they depend on the group bounding box)
+FRAME_PRIORITY_OUTLINES = 0
+FRAME_PRIORITY_PANEL = 1
+FRAME_PRIORITY_LIMITS = 2
 
 #nudge steps
 NUDGE_SMALL = 1
 NUDGE_BIG = 10
+PASTE_OFFSET = 10    #pasted and duplicated widgets are shifted by this much (per paste of the same copy)
+
+#undo/redo history (oldest entries are evicted once the recorded deltas exceed this size)
+HISTORY_BYTE_BUDGET = 4 * 1024 * 1024
+
+#autosave (every model change is journaled by a background thread, the journal is compacted into a snapshot)
+AUTOSAVE = True
+AUTOSAVE_CHECK_INTERVAL = 5000          #ms between compaction checks (also the heartbeat of a running session)
+AUTOSAVE_SNAPSHOT_INTERVAL = 60000      #ms, a journal with entries is compacted at least this often
+AUTOSAVE_JOURNAL_LIMIT = 4 * 1024 * 1024    #bytes, larger journals are compacted at the next check
+
+#virtualization (widgets beyond the budget or outside the visible area are drawn as rectangle+text proxies)
+MATERIALIZE_BUDGET = 1000       #max. number of real Tk widgets per designer (None = no proxies)
+PROXY_TAG = "proxy"
+PROXY_OUTLINE_COLOR = "#A0A0A0"
+
+#bindtag (prefix) shared by all real design widgets, their events are dispatched by one class binding each
+DESIGN_WIDGET_BINDTAG = "DesignWidget"
+
+#design viewport (pan and zoom; at any zoom other than 100% every widget is drawn as a proxy)
+ZOOM_LEVELS = (0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 4.0)
+SCROLL_STEP = 40                #pixels per mouse wheel step
+VIEWPORT_SCREEN_MARGIN = 80     #space kept free around the designer window when the design is larger than the screen
+
+#event tracing (opt-in, can also be enabled with the environment variable GUI_BUILDER_TRACE=1)
+EVENT_TRACING = False
+TRACE_EVENT_LIMIT = 100000      #events kept for the Chrome trace export
+TRACE_SAMPLE_LIMIT = 10000      #latest durations per handler used for the percentiles
+TRACE_OVERLAY_INTERVAL = 500    #refresh interval of the toolbar overlay in ms
+STARTUP_REPORT = False          #print the startup phases and the time to the first window (or GUI_BUILDER_STARTUP_REPORT=1)
 
 #grid
 GRID_COLOR = "#888888"
 GRID_SIZE = 10
+GRID_TAG = "grid"
+GRID_MIN_SPACING = 4    #the grid is hidden when zoomed out further than this many pixels per grid cell
+GRID_MAX_TILE_CELLS = 16    #at fractional spacing the grid image repeats after this many cells at most (else it is hidden)
+
+#spatial index (size of one cell of the uniform grid used for hit-testing)
+SPATIAL_INDEX_CELL_SIZE = 64
 
 #attributes panel
 ATTRIBUTES_PANEL_COLOR = "#666666"
 ATTRIBUTES_PANEL_WIDTH = 200
 ATTRIBUTES_PANEL_HEIGHT = 500
+ATTRIBUTE_WRITE_DELAY = 0   #debounce for panel edits in ms (0 = apply once per idle cycle)
+
+#not shown when several widgets are selected: names are unique, and one position for all would stack them
+MULTI_SELECTION_EXCLUDED = ("id", "x", "y")
 
 #attributes that can be shown in the attributes panel including the type of widget to display the value with (text field, numeric input, color picker, dropwodn etc.)
 ATTRIBUTE_CONFIG = {
@@ -52,7 +104,8 @@ ATTRIBUTE_CONFIG = {
         "text": "entry",
         "bg": "colorpicker",
         "fg": "colorpicker",
-        "anchor": "combobox"
+        "anchor": "combobox",
+        "tags": "entry"
     },
     "Entry": {
         "type": "label",
@@ -63,7 +116,8 @@ ATTRIBUTE_CONFIG = {
         "height": "spinbox",
         "bg": "colorpicker",
         "fg": "colorpicker",
-        "anchor": "combobox"
+        "anchor": "combobox",
+        "tags": "entry"
     },
     "Button": {
         "type": "label",
@@ -75,7 +129,8 @@ ATTRIBUTE_CONFIG = {
         "text": "entry",
         "bg": "colorpicker",
         "fg": "colorpicker",
-        "anchor": "combobox"
+        "anchor": "combobox",
+        "tags": "entry"
     }
 }
 
@@ -90,7 +145,8 @@ DISPLAY_NAMES = {
     "text": "Text:",
     "bg": "BG Color:",
     "fg": "FG Color:",
-    "anchor": "Anchor:"
+    "anchor": "Anchor:",
+    "tags": "Tags:"
 }
 
 #CTRL-Key
@@ -12,13 +12,42 @@ class ToolbarManager:
         self.theme = theme
         self.callbacks = callbacks
         self.toolbar = None
+        self.trace_label = None
 
     def create_toolbar(self):
         self.toolbar = tk.Frame(self.parent, height=self.height, bg=self.theme.get("toolbar_color"))
         self.toolbar.pack(side="top", fill="x")
         self.toolbar.pack_propagate(False)
+        self._add_file_menu()
+        self._add_edit_menu()
         self._add_widget_menu()
+        self._add_select_menu()
         self._add_grid_menu()
+        #trace menu and latency overlay only exist while event tracing is enabled
+        if "export_trace" in self.callbacks:
+            self._add_trace_menu()
+
+    def _add_file_menu(self):
+        file_menu_button = tk.Menubutton(self.toolbar, text="File", bg=self.theme.get("button_color"), fg=self.theme.get("text_color"), relief="raised", width=10)
+        file_menu = tk.Menu(file_menu_button, bg=self.theme.get("menu_color"), fg=self.theme.get("text_color"), tearoff=0)
+        file_menu_button.config(menu=file_menu)
+        file_menu_button.pack(side="left")
+        file_menu.add_command(label="Open project...", command=self.callbacks["open_project"])
+        file_menu.add_command(label="Save project...", command=self.callbacks["save_project"])
+        file_menu.add_separator()
+        file_menu.add_command(label="Export Python code...", command=self.callbacks["export_code"])
+
+    def _add_edit_menu(self):
+        edit_menu_button = tk.Menubutton(self.toolbar, text="Edit", bg=self.theme.get("button_color"), fg=self.theme.get("text_color"), relief="raised", width=10)
+        edit_menu = tk.Menu(edit_menu_button, bg=self.theme.get("menu_color"), fg=self.theme.get("text_color"), tearoff=0)
+        edit_menu_button.config(menu=edit_menu)
+        edit_menu_button.pack(side="left")
+        edit_menu.add_command(label="Undo", accelerator="Ctrl+Z", command=self.callbacks["undo"])
+        edit_menu.add_command(label="Redo", accelerator="Ctrl+Y", command=self.callbacks["redo"])
+        edit_menu.add_separator()
+        edit_menu.add_command(label="Copy", accelerator="Ctrl+C", command=self.callbacks["copy"])
+        edit_menu.add_command(label="Paste", accelerator="Ctrl+V", command=self.callbacks["paste"])
+        edit_menu.add_command(label="Duplicate", accelerator="Ctrl+D", command=self.callbacks["duplicate"])
 
     def _add_widget_menu(self):
         widget_menu_button = tk.Menubutton(self.toolbar, text="Widgets", bg=self.theme.get("button_color"), fg=self.theme.get("text_color"), relief="raised", width=10)
@@ -33,9 +62,41 @@ class ToolbarManager:
         widget_menu.add_command(label="Align top", command=self.callbacks["align_top"])
         widget_menu.add_command(label="Align bottom", command=self.callbacks["align_bottom"])
 
+    def _add_select_menu(self):
+        select_menu_button = tk.Menubutton(self.toolbar, text="Select", bg=self.theme.get("button_color"), fg=self.theme.get("text_color"), relief="raised", width=10)
+        select_menu = tk.Menu(select_menu_button, bg=self.theme.get("menu_color"), fg=self.theme.get("text_color"), tearoff=0)
+        select_menu_button.config(menu=select_menu)
+        select_menu_button.pack(side="left")
+        select_menu.add_command(label="All", command=self.callbacks["select_all"])
+        select_menu.add_command(label="All labels", command=lambda: self.callbacks["select_type"]("label"))
+        select_menu.add_command(label="All entries", command=lambda: self.callbacks["select_type"]("entry"))
+        select_menu.add_command(label="All buttons", command=lambda: self.callbacks["select_type"]("button"))
+        select_menu.add_separator()
+        select_menu.add_command(label="By name...", command=self.callbacks["select_by_name"])
+        select_menu.add_command(label="By tag...", command=self.callbacks["select_by_tag"])
+
     def _add_grid_menu(self):
         grid_menu_button = tk.Menubutton(self.toolbar, text="Grid", bg=self.theme.get("button_color"), fg=self.theme.get("text_color"), relief="raised", width=10)
         grid_menu = tk.Menu(grid_menu_button, bg=self.theme.get("menu_color"), fg=self.theme.get("text_color"), tearoff=0)
         grid_menu_button.config(menu=grid_menu)
         grid_menu_button.pack(side="left")
-        grid_menu.add_checkbutton(label="Visualize grid", command=self.callbacks["toggle_grid"])
\ No newline at end of file
+        grid_menu.add_checkbutton(label="Visualize grid", command=self.callbacks["toggle_grid"])
+
+    def _add_trace_menu(self):
+        trace_menu_button = tk.Menubutton(self.toolbar, text="Trace", bg=self.theme.get("button_color"), fg=self.theme.get("text_color"), relief="raised", width=10)
+        trace_menu = tk.Menu(trace_menu_button, bg=self.theme.get("menu_color"), fg=self.theme.get("text_color"), tearoff=0)
+        trace_menu_button.config(menu=trace_menu)
+        trace_menu_button.pack(side="left")
+        recording = tk.BooleanVar(self.toolbar, value=True)
+        trace_menu.add_checkbutton(label="Record events", variable=recording, command=lambda: self.callbacks["toggle_trace"](recording.get()))
+        trace_menu.add_command(label="Reset", command=self.callbacks["reset_trace"])
+        trace_menu.add_separator()
+        trace_menu.add_command(label="Export Chrome trace...", command=self.callbacks["export_trace"])
+
+        #latency overlay (p50/p95/p99 of the slowest handler)
+        self.trace_label = tk.Label(self.toolbar, bg=self.theme.get("toolbar_color"), fg=self.theme.get("text_color"))
+        self.trace_label.pack(side="right", padx=5)
+
+    def set_trace_text(self, text: str):
+        if self.trace_label is not None:
+            self.trace_label.config(text=text)
\ No newline at end of file
@@ -0,0 +1,130 @@
+import json
+import os
+import time
+from collections import deque
+from Theme import TRACE_EVENT_LIMIT, TRACE_SAMPLE_LIMIT
+
+#opt-in latency tracing for Tk event handlers
+#handlers are wrapped with traced(); without a tracer the handler is bound as it is, so disabled tracing costs nothing.
+#per event the tracer records wall time, Tcl calls made through the traced canvas and the canvas items they touched.
+class EventTracer:
+    def __init__(self, event_limit: int = TRACE_EVENT_LIMIT, sample_limit: int = TRACE_SAMPLE_LIMIT):
+        self.enabled = True
+        self._events = deque(maxlen=event_limit)    #(name, start_us, duration_us, tcl_calls, items) for the Chrome trace
+        self._samples = {}                          #name -> deque of durations in ms (latest sample_limit events)
+        self._counts = {}                           #name -> number of traced events
+        self._sample_limit = sample_limit
+        self._stack = []                            #[tcl_calls, touched item set] of the running (nested) handlers
+        self._origin = time.perf_counter()
+
+    #route the Tcl calls of a canvas (and of the widgets created on it later) through a counting proxy
+    def attach(self, canvas):
+        if not isinstance(canvas.tk, _CountingTcl):
+            canvas.tk = _CountingTcl(canvas.tk, canvas._w, self)
+
+    def wrap(self, name: str, handler):
+        def _traced(*args, **kwargs):
+            if not self.enabled:
+                return handler(*args, **kwargs)
+            self._stack.append([0, set()])
+            start = time.perf_counter()
+            try:
+                return handler(*args, **kwargs)
+            finally:
+                end = time.perf_counter()
+                tcl_calls, items = self._stack.pop()
+                if self._stack:
+                    #nested handlers also count for the handler that called them
+                    self._stack[-1][0] += tcl_calls
+                    self._stack[-1][1] |= items
+                self._record(name, start, end, tcl_calls, len(items))
+        return _traced
+
+    def _record(self, name: str, start: float, end: float, tcl_calls: int, items: int):
+        samples = self._samples.get(name)
+        if samples is None:
+            samples = self._samples[name] = deque(maxlen=self._sample_limit)
+        samples.append((end - start) * 1000)
+        self._counts[name] = self._counts.get(name, 0) + 1
+        self._events.append((name, (start - self._origin) * 1e6, (end - start) * 1e6, tcl_calls, items))
+
+    #called by the Tcl proxy
+    def _count_tcl(self, items):
+        if self._stack:
+            frame = self._stack[-1]
+            frame[0] += 1
+            frame[1].update(items)
+
+    def reset(self):
+        self._events.clear()
+        self._samples.clear()
+        self._counts.clear()
+
+    #{name: {"count", "p50_ms", "p95_ms", "p99_ms", "max_ms"}} over the latest samples of each handler
+    def statistics(self) -> dict:
+        statistics = {}
+        for name, samples in self._samples.items():
+            ordered = sorted(samples)
+            statistics[name] = {
+                "count": self._counts[name],
+                "p50_ms": _percentile(ordered, 50),
+                "p95_ms": _percentile(ordered, 95),
+                "p99_ms": _percentile(ordered, 99),
+                "max_ms": ordered[-1]
+            }
+        return statistics
+
+    #one line for the toolbar overlay: the handler with the worst p95
+    def summary(self) -> str:
+        statistics = self.statistics()
+        if not statistics:
+            return "no events traced"
+        name, values = max(statistics.items(), key=lambda item: item[1]["p95_ms"])
+        return f"{name}: p50 {values['p50_ms']:.1f} / p95 {values['p95_ms']:.1f} / p99 {values['p99_ms']:.1f} ms"
+
+    #write the recorded events as a Chrome trace_event file (open in chrome://tracing or Perfetto)
+    def export_chrome_trace(self, path: str):
+        trace_events = [
+            {
+                "name": name, "cat": "tk", "ph": "X", "ts": round(start, 1), "dur": round(duration, 1),
+                "pid": os.getpid(), "tid": 0, "args": {"tcl_calls": tcl_calls, "items": items}
+            }
+            for name, start, duration, tcl_calls, items in self._events
+        ]
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms", "otherData": {"statistics": self.statistics()}}, file)
+
+#bind-time helper: the handler itself when tracing is off, the traced wrapper otherwise
+def traced(tracer, name: str, handler):
+    return handler if tracer is None else tracer.wrap(name, handler)
+
+def _percentile(ordered, percent: int) -> float:
+    index = min(len(ordered) - 1, max(0, round(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+#proxy for the tkapp of a canvas that counts calls and the canvas items they address
+class _CountingTcl:
+    def __init__(self, tk, path: str, tracer: EventTracer):
+        self._tk = tk
+        self._path = path
+        self._tracer = tracer
+
+    def call(self, *args):
+        #canvas subcommands address an item (or tag) as their third word: .canvas coords 17 ...
+        items = (args[2],) if len(args) > 2 and args[0] == self._path else ()
+        self._tracer._count_tcl(items)
+        return self._tk.call(*args)
+
+    def eval(self, script: str):
+        #batch scripts (see CanvasBatch) touch one item per line
+        items = [_batch_item(line) for line in script.split("\n") if line.count(" ") >= 2]
+        self._tracer._count_tcl(items)
+        return self._tk.eval(script)
+
+    def __getattr__(self, name):
+        return getattr(self._tk, name)
+
+#canvas item (or tag) a batch line addresses; addtag names the new tag first: .canvas addtag selected withtag 17
+def _batch_item(line: str) -> str:
+    words = line.split(None, 5)
+    return words[4] if words[1] == "addtag" and len(words) > 4 else words[2]
\ No newline at end of file
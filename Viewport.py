@@ -0,0 +1,97 @@
+import math
+from Theme import ZOOM_LEVELS
+
+#view transform between design coordinates (models, spatial index, attributes panel) and canvas coordinates
+#canvas coordinates are design coordinates times the zoom scale. panning scrolls the canvas (xview/yview), so
+#event positions are converted with canvasx/canvasy first and the items themselves never move when panning.
+class Viewport:
+    def __init__(self, canvas, design_width: int = None, design_height: int = None):
+        self.canvas = canvas
+        self.design_width = design_width      #size of the designed window (scroll region at 100%)
+        self.design_height = design_height
+        self.scale = 1.0
+        self._listeners = []                  #called without arguments after every pan or zoom
+        self._update_scrollregion()
+
+    #real widgets can only be shown unscaled
+    @property
+    def unscaled(self) -> bool:
+        return self.scale == 1.0
+
+    def add_listener(self, callback):
+        self._listeners.append(callback)
+
+    def to_canvas(self, x, y):
+        return x * self.scale, y * self.scale
+
+    def bbox_to_canvas(self, bbox):
+        scale = self.scale
+        x0, y0, x1, y1 = bbox
+        return x0 * scale, y0 * scale, x1 * scale, y1 * scale
+
+    #design position of a canvas position (e.g. a point of the rubber band)
+    def canvas_to_design(self, x, y) -> tuple[int, int]:
+        return round(x / self.scale), round(y / self.scale)
+
+    #design position of an event position (window coordinates of the canvas)
+    def to_design(self, event_x, event_y) -> tuple[int, int]:
+        return self.canvas_to_design(self.canvas.canvasx(event_x), self.canvas.canvasy(event_y))
+
+    #design delta of a mouse movement in screen pixels
+    def delta_to_design(self, dx, dy) -> tuple[int, int]:
+        return round(dx / self.scale), round(dy / self.scale)
+
+    #design area (x0, y0, x1, y1) shown in the canvas window
+    def visible_area(self):
+        width, height = self.window_size()
+        left, top = self.canvas.canvasx(0), self.canvas.canvasy(0)
+        scale = self.scale
+        return int(left / scale), int(top / scale), math.ceil((left + width) / scale), math.ceil((top + height) / scale)
+
+    #size of the canvas window in pixels (the configured size until the canvas is mapped)
+    def window_size(self) -> tuple[int, int]:
+        width, height = self.canvas.winfo_width(), self.canvas.winfo_height()
+        if width <= 1 or height <= 1:
+            width, height = int(self.canvas.cget("width")), int(self.canvas.cget("height"))
+        return width, height
+
+    #zoom by a number of ZOOM_LEVELS steps (positive = zoom in) around an event position
+    def zoom_step(self, steps: int, event_x: int = 0, event_y: int = 0):
+        index = min(range(len(ZOOM_LEVELS)), key=lambda i: abs(ZOOM_LEVELS[i] - self.scale))
+        index = max(0, min(len(ZOOM_LEVELS) - 1, index + steps))
+        self.zoom_to(ZOOM_LEVELS[index], event_x, event_y)
+
+    #set the zoom scale, the design point under (event_x, event_y) stays in place
+    def zoom_to(self, scale: float, event_x: int = 0, event_y: int = 0):
+        if scale == self.scale:
+            return
+        canvas_x, canvas_y = self.canvas.canvasx(event_x), self.canvas.canvasy(event_y)
+        factor = scale / self.scale
+        self.scale = scale
+        #a single canvas call rescales the coordinates of every item (window items, proxies, outlines)
+        self.canvas.scale("all", 0, 0, factor, factor)
+        self._update_scrollregion()
+        self._scroll_to(canvas_x * factor - event_x, canvas_y * factor - event_y)
+        self._notify()
+
+    #scroll the view by a number of screen pixels
+    def pan(self, dx: int, dy: int):
+        if not dx and not dy:
+            return
+        self._scroll_to(self.canvas.canvasx(0) + dx, self.canvas.canvasy(0) + dy)
+        self._notify()
+
+    def _scroll_to(self, left, top):
+        if self.design_width is None or self.design_height is None:
+            return
+        #the canvas confines the view to the scroll region
+        self.canvas.xview_moveto(max(0, left) / (self.design_width * self.scale))
+        self.canvas.yview_moveto(max(0, top) / (self.design_height * self.scale))
+
+    def _update_scrollregion(self):
+        if self.design_width is not None and self.design_height is not None:
+            self.canvas.configure(scrollregion=(0, 0, self.design_width * self.scale, self.design_height * self.scale))
+
+    def _notify(self):
+        for listener in self._listeners:
+            listener()
\ No newline at end of file
@@ -0,0 +1,243 @@
+from Theme import SELECTED_TAG, PROXY_TAG, PROXY_OUTLINE_COLOR
+from CanvasBatch import run_batch
+
+#extra size of a widget around its text (borders and padding of the default Tk widgets)
+PROXY_PADDING = {"label": (6, 6), "button": (18, 10), "entry": (8, 6)}
+ENTRY_CHARACTERS = 20   #default width of tk.Entry in characters
+
+#lightweight stand-in for a design widget: a rectangle and a text item drawn from the model
+#has the small part of the widget API that WidgetManager uses (config, winfo_*, bind, destroy).
+#the canvas items only exist while the widget is in the visible area (see Materializer.refresh)
+class ProxyWidget:
+    def __init__(self, canvas, widget_type: str, measure, text: str = "", bg: str = None, fg: str = None):
+        self.canvas = canvas
+        self.widget_type = widget_type
+        self.measure = measure      #(widget_type, text) -> estimated (width, height)
+        self.options = {"text": text, "bg": bg, "fg": fg}
+        self.rect_id = None
+        self.text_id = None
+        self._size = measure(widget_type, text)
+
+    @property
+    def drawn(self) -> bool:
+        return self.rect_id is not None
+
+    #create the canvas items on a bounding box in canvas coordinates
+    def draw(self, bbox, selected: bool):
+        if self.drawn:
+            return
+        tags = (PROXY_TAG, SELECTED_TAG) if selected else (PROXY_TAG,)
+        x0, y0, x1, y1 = bbox
+        options = self.options
+        self.rect_id = self.canvas.create_rectangle(
+            x0, y0, x1, y1,
+            fill=options["bg"], outline=PROXY_OUTLINE_COLOR if self.widget_type == "entry" else "", tags=tags
+        )
+        self.text_id = self.canvas.create_text((x0 + x1) / 2, (y0 + y1) / 2, text=options["text"], fill=options["fg"], tags=tags)
+
+    #delete the canvas items (the widget left the visible area)
+    def cull(self):
+        if self.drawn:
+            self.canvas.delete(self.rect_id, self.text_id)
+            self.rect_id = self.text_id = None
+
+    def items(self) -> tuple:
+        return (self.rect_id, self.text_id) if self.drawn else ()
+
+    def config(self, **options):
+        run_batch(self.canvas, self.config_commands(**options))
+
+    #apply text and color options and return the canvas commands (for CanvasBatch.run_batch) that show them
+    def config_commands(self, **options):
+        self.options.update(options)
+        if "text" in options:
+            self._size = self.measure(self.widget_type, options["text"])
+        if not self.drawn:
+            return []
+        commands = []
+        if "text" in options:
+            commands.append(("itemconfigure", self.text_id, "-text", options["text"]))
+        if "bg" in options:
+            commands.append(("itemconfigure", self.rect_id, "-fill", options["bg"]))
+        if "fg" in options:
+            commands.append(("itemconfigure", self.text_id, "-fill", options["fg"]))
+        return commands
+
+    configure = config
+
+    def cget(self, option: str):
+        return self.options.get(option)
+
+    #canvas commands (for CanvasBatch.run_batch) that move the proxy items onto a bounding box in canvas coordinates
+    def geometry_commands(self, bbox):
+        if not self.drawn:
+            return []
+        x0, y0, x1, y1 = bbox
+        return [("coords", self.rect_id, x0, y0, x1, y1), ("coords", self.text_id, (x0 + x1) / 2, (y0 + y1) / 2)]
+
+    #proxies have no events of their own, clicks reach the canvas bindings
+    def bind(self, sequence: str, function=None, add=None):
+        pass
+
+    #estimated size from the text width, the real size is measured once the widget is materialized
+    def winfo_reqwidth(self) -> int:
+        return self._size[0]
+
+    def winfo_reqheight(self) -> int:
+        return self._size[1]
+
+    winfo_width = winfo_reqwidth
+    winfo_height = winfo_reqheight
+
+    destroy = cull
+
+#decides which widgets are real Tk widgets and which are drawn as proxies
+#selected widgets come first, then the widgets in the visible area; at most `budget` widgets are real, and only at 100% zoom.
+#both forms live in the WidgetStore widget column under the same window item, so widget_map users do not see the difference.
+#proxies outside the visible area are culled: they keep their model but have no canvas items
+class Materializer:
+    def __init__(self, canvas, top, widget_map, spatial_index, selection_manager, budget, create_widget, bind_widget, viewport):
+        self.canvas = canvas
+        self.top = top
+        self.widget_map = widget_map
+        self.spatial_index = spatial_index
+        self.selection_manager = selection_manager
+        self.budget = budget                    #None → every widget is real (no proxies)
+        self.create_widget = create_widget      #(widget_type, master, **options) -> Tk widget
+        self.bind_widget = bind_widget          #(widget, window_id) binds the design events of a real widget
+        self.viewport = viewport                #Viewport (visible design area and view transform)
+        self._real = set()                      #window_ids with a real Tk widget
+        self._drawn = set()                     #window_ids of proxies that have canvas items
+        self._refresh_id = None
+        self._line_height = None
+        self._sizes = {}                        #(widget_type, text) -> estimated size (copies and demotions measure the same texts again)
+
+    @property
+    def enabled(self) -> bool:
+        return self.budget is not None
+
+    def is_real(self, window_id: int) -> bool:
+        return window_id in self._real
+
+    def real_count(self) -> int:
+        return len(self._real)
+
+    def drawn_count(self) -> int:
+        return len(self._drawn)
+
+    #canvas items of a proxy (empty for real widgets and culled proxies), tagged along with the window item on selection
+    def proxy_items(self, window_id: int):
+        widget = self.widget_map.widget(window_id)
+        return widget.items() if isinstance(widget, ProxyWidget) else ()
+
+    #should a new widget at (x, y) start as a real widget?
+    def admit(self, x: int, y: int) -> bool:
+        if self.budget is None:
+            return True
+        if len(self._real) >= self.budget or not self.viewport.unscaled:
+            return False
+        x0, y0, x1, y1 = self.viewport.visible_area()
+        return x0 <= x <= x1 and y0 <= y <= y1
+
+    #new proxies start culled, the next refresh draws the ones in the visible area
+    def create_proxy(self, widget_type: str, text: str, bg: str, fg: str) -> ProxyWidget:
+        return ProxyWidget(self.canvas, widget_type, self.measure, text=text, bg=bg, fg=fg)
+
+    #estimated widget size from the text width in the default font (no Tk widget has to be created for it)
+    def measure(self, widget_type: str, text: str) -> tuple[int, int]:
+        size = self._sizes.get((widget_type, text))
+        if size is not None:
+            return size
+        if self._line_height is None:
+            self._line_height = int(self.canvas.tk.call("font", "metrics", "TkDefaultFont", "-linespace"))
+        measured = text if widget_type != "entry" else "0" * ENTRY_CHARACTERS
+        width = int(self.canvas.tk.call("font", "measure", "TkDefaultFont", measured))
+        padding_x, padding_y = PROXY_PADDING[widget_type]
+        size = self._sizes[(widget_type, text)] = (width + padding_x, self._line_height + padding_y)
+        return size
+
+    def added(self, window_id: int, real: bool):
+        if real:
+            self._real.add(window_id)
+        else:
+            self.schedule()
+
+    def removed(self, window_id: int):
+        self._real.discard(window_id)
+        self._drawn.discard(window_id)
+
+    #re-evaluate after the selection, the widgets or the view changed (once per idle cycle)
+    def schedule(self):
+        if self.enabled and self._refresh_id is None:
+            self._refresh_id = self.top.after_idle(self.refresh)
+
+    def refresh(self):
+        self._refresh_id = None
+        if not self.enabled:
+            return
+        visible = self.spatial_index.find_overlapping(*self.viewport.visible_area())
+        desired = self._desired(visible)
+        for window_id in [i for i in self._real if i not in desired]:
+            self._demote(window_id)
+        for window_id in desired:
+            if window_id not in self._real:
+                self._promote(window_id)
+        if self._cull(visible) and self.selection_manager.selected_ids():
+            #newly drawn proxies would cover the selection outlines
+            self.selection_manager.schedule_refresh()
+
+    #selected widgets (last selected first), then visible widgets from the top of the stacking order, up to the budget
+    def _desired(self, visible) -> set:
+        desired = set()
+        if not self.viewport.unscaled:
+            return desired
+        budget = self.budget
+        last_selected = self.selection_manager.last_selected_id()
+        if self.selection_manager.is_selected(last_selected):
+            desired.add(last_selected)
+        for window_id in sorted(self.selection_manager.selected_ids(), reverse=True):
+            if len(desired) >= budget:
+                return desired
+            desired.add(window_id)
+        for window_id in reversed(visible):
+            if len(desired) >= budget:
+                break
+            desired.add(window_id)
+        return desired
+
+    #draw the proxies in the visible area and cull the others, returns whether proxies were drawn
+    def _cull(self, visible) -> bool:
+        visible = set(visible).difference(self._real)
+        for window_id in self._drawn.difference(visible):
+            self.widget_map.widget(window_id).cull()
+        self._drawn.intersection_update(visible)
+        new = sorted(visible.difference(self._drawn))      #in creation order, so newer widgets are drawn on top
+        for window_id in new:
+            self.widget_map.widget(window_id).draw(
+                self.viewport.bbox_to_canvas(self.widget_map.bbox(window_id)), self.selection_manager.is_selected(window_id)
+            )
+        self._drawn.update(new)
+        return bool(new)
+
+    def _promote(self, window_id: int):
+        proxy = self.widget_map.widget(window_id)
+        model = self.widget_map.model(window_id)
+        options = {"bg": model.bg, "fg": model.fg}
+        if model.type != "Entry":
+            options["text"] = model.text
+        widget = self.create_widget(model.type.lower(), self.canvas, **options)
+        self.canvas.itemconfig(window_id, window=widget)
+        self.bind_widget(widget, window_id)
+        proxy.destroy()
+        self._drawn.discard(window_id)
+        self.widget_map.set_widget(window_id, widget)
+        self._real.add(window_id)
+
+    def _demote(self, window_id: int):
+        widget = self.widget_map.widget(window_id)
+        model = self.widget_map.model(window_id)
+        self.canvas.itemconfig(window_id, window="")
+        widget.destroy()
+        proxy = self.create_proxy(model.type.lower(), getattr(model, "text", ""), model.bg, model.fg)
+        self.widget_map.set_widget(window_id, proxy)
+        self._real.discard(window_id)
\ No newline at end of file
@@ -1,138 +1,367 @@
+import itertools
 import tkinter as tk
 from tkinter import simpledialog, messagebox
 from DataModels import *
+from SpatialIndex import SpatialIndex
+from History import CommandHistory
+from ProjectFile import widget_spec
+from WidgetStore import WidgetStore
+from CanvasBatch import run_batch
+from Tracing import traced
+from Virtualization import Materializer, ProxyWidget
+from Viewport import Viewport
+from Theme import MATERIALIZE_BUDGET, DESIGN_WIDGET_BINDTAG, PASTE_OFFSET
+
+#Tkinter class of each widget type
+WIDGET_CLASSES = {"label": tk.Label, "entry": tk.Entry, "button": tk.Button}
+
+#bind_class bindings are application-wide, so every designer gets its own numbered bindtag
+_bindtag_numbers = itertools.count(1)
+
+#default widget factory, a different factory can be injected (e.g. HeadlessCanvas.headless_widget_factory)
+def create_tk_widget(widget_type: str, master, **options):
+    return WIDGET_CLASSES[widget_type](master, **options)
 
 class WidgetManager:
-    def __init__(self, top, canvas, theme, selection_manager, sync_callback, clamped_delta, panel_update=None):
+    def __init__(self, top, canvas, theme, selection_manager, spatial_index: SpatialIndex, sync_callback, clamped_delta, panel_update=None, history: CommandHistory = None, canvas_width: int = None, canvas_height: int = None, widget_factory=None, tracer=None, materialize_budget=MATERIALIZE_BUDGET, viewport=None):
         self.top = top
         self.canvas = canvas
         self.theme = theme
         self.selection_manager = selection_manager
+        self.spatial_index = spatial_index
         self.sync_callback = sync_callback
         self.clamped_delta = clamped_delta
         self.panel_update = panel_update
-        self.widget_map = {}
+        self.history = history if history is not None else CommandHistory()
+        self.widget_map = WidgetStore()    #window_id -> model view and Tk widget
+        self.canvas_width = canvas_width    #snap and align keep widgets inside this area (if given)
+        self.canvas_height = canvas_height
+        self.widget_factory = widget_factory or create_tk_widget     #(widget_type, master, **options) -> widget
+        self.tracer = tracer    #EventTracer or None (handlers are bound untraced)
+        self.viewport = viewport or Viewport(canvas)    #models are in design coordinates, canvas items in view coordinates
+
+        #widgets beyond the budget or outside the viewport are drawn as proxies (the widget column holds either form)
+        self.materializer = Materializer(
+            canvas, top, self.widget_map, spatial_index, selection_manager,
+            materialize_budget, self.widget_factory, self._attach_widget, self.viewport
+        )
+        selection_manager.companion_items = self.materializer.proxy_items
+        selection_manager.proxy_drag_context = (self.widget_map, self.clamped_delta, self.panel_update)
+
+        #widgets whose real size has to be read after the next layout pass
+        self._pending_measure = set()
+        self._measure_id = None
 
-    #create widget and model based on type
+        #design events of all real widgets are handled by one class binding per event
+        self.widget_bindtag = f"{DESIGN_WIDGET_BINDTAG}{next(_bindtag_numbers)}"
+        self._bind_widget_class()
+
+        #copied widgets as add_widgets specs without names (pasted widgets get fresh ids)
+        self.clipboard = []
+        self._clipboard_bbox = None     #union bounding box of the copied widgets
+        self._paste_count = 0   #pastes of the current clipboard, each one is shifted a bit further
+
+    #ask for the widget text (if needed) and create a single widget at the given position
     def add_widget(self, widget_type: str, x: int, y: int):
+        spec = {"type": widget_type, "x": x, "y": y}
         if widget_type == "label":
             text = simpledialog.askstring("Label Text", "Enter label text:", parent=self.top)
             if text is None:
                 return
-            bg = self.theme["label"]["bg"]
-            fg = self.theme["label"]["fg"]
-            widget = tk.Label(
-                self.canvas,
-                text=text,
-                bg=bg,
-                fg=fg
-            )
-            model = LabelWidgetData(x=x, y=y, bg=bg, fg=fg, text=text)
-        elif widget_type == "entry":
-            bg = self.theme["entry"]["bg"]
-            fg = self.theme["entry"]["fg"]
-            widget = tk.Entry(
-                self.canvas,
-                bg=bg,
-                fg=fg
-            )
-            model = EntryWidgetData(x=x, y=y, bg=bg, fg=fg)
+            spec["text"] = text
         elif widget_type == "button":
             text = simpledialog.askstring("Button Text", "Enter button text:", parent=self.top)
             if text is None:
                 return
-            bg = self.theme["button"]["bg"]
-            fg = self.theme["button"]["fg"]
-            widget = tk.Button(
-                self.canvas,
-                text=text,
-                bg=bg,
-                fg=fg
-            )
-            model = ButtonWidgetData(x=x, y=y, bg=bg, fg=fg, text=text)
-        else:
+            spec["text"] = text
+        elif widget_type != "entry":
             return
 
-        model.create_id()
+        window_ids = self.add_widgets([spec])
 
-        #insert widget into canvas
-        window_id = self.canvas.create_window(x, y, window=widget, anchor=model.anchor)
+        #set focus back to canvas
+        self.canvas.focus_set()
+        return window_ids[0]
 
-        #populate model width and height after creating window and updating widget, otherwise both values are 1
-        widget.update()
-        model.width, model.height = widget.winfo_width(), widget.winfo_height()
+    #create many widgets at once without dialogs or per-widget layout passes
+    #specs: iterable of dicts with "type" ("label", "entry", "button"), "x", "y" and optionally
+    #"id", "text", "bg", "fg", "width", "height", "anchor" and "tags"
+    def add_widgets(self, specs) -> list[int]:
+        window_ids = []
+        created_specs = []
+        commands = []   #explicit sizes of the window items, applied with one Tcl script
+        for spec in specs:
+            window_id = self._create_widget(spec, commands)
+            if window_id is not None:
+                window_ids.append(window_id)
+                #keep the generated id so redo re-creates the widget under the same name
+                created_specs.append(dict(spec, id=self.widget_map.model(window_id).id))
+        run_batch(self.canvas, commands)
+        self.history.record_add(window_ids, created_specs)
+        return window_ids
 
-        #store both the data model and the tkinter widget in the widget map with the window_id as the key
-        self.widget_map[window_id] = {"model": model, "widget": widget}
+    #create widget and model based on type, canvas commands for explicit sizes are appended to commands
+    def _create_widget(self, spec: dict, commands):
+        widget_type = spec["type"]
+        if widget_type not in ("label", "entry", "button"):
+            return None
+        x, y = spec["x"], spec["y"]
+        bg = spec.get("bg") or self.theme[widget_type]["bg"]
+        fg = spec.get("fg") or self.theme[widget_type]["fg"]
+        anchor = spec.get("anchor") or "sw"
 
-        #bind events
-        self._bind_widget_events(widget, window_id)
+        text = spec.get("text", "")
 
-        #set focus back to canvas
-        self.canvas.focus_set()
+        if widget_type == "label":
+            model = LabelWidgetData(x=x, y=y, bg=bg, fg=fg, anchor=anchor, text=text)
+        elif widget_type == "entry":
+            model = EntryWidgetData(x=x, y=y, bg=bg, fg=fg, anchor=anchor)
+        elif widget_type == "button":
+            model = ButtonWidgetData(x=x, y=y, bg=bg, fg=fg, anchor=anchor, text=text)
+
+        model.tags = tuple(spec.get("tags") or ())
+
+        #names are unique: a taken id (or a generated id that was already given to a renamed widget) gets a new one
+        if spec.get("id") and self.widget_map.find_by_name(spec["id"]) is None:
+            model.id = spec["id"]
+        else:
+            model.create_id()
+            while self.widget_map.find_by_name(model.id) is not None:
+                model.create_id()
+
+        real = self.materializer.admit(x, y)
+        if real:
+            options = {"bg": bg, "fg": fg} if widget_type == "entry" else {"text": text, "bg": bg, "fg": fg}
+            widget = self.widget_factory(widget_type, self.canvas, **options)
+            #insert widget into canvas
+            window_id = self.canvas.create_window(*self.viewport.to_canvas(x, y), window=widget, anchor=model.anchor)
+            #the requested size is known without a layout pass, the real size is read later by the measurement queue
+            model.width, model.height = widget.winfo_reqwidth(), widget.winfo_reqheight()
+        else:
+            #empty window item (keeps the window_id and stacking order), the widget is drawn as a proxy
+            window_id = self.canvas.create_window(*self.viewport.to_canvas(x, y), anchor=model.anchor)
+            model.width, model.height = self.materializer.measure(widget_type, text)
+        #only explicit sizes fix the window item size, other widgets keep following their text
+        sized = tuple(attribute for attribute in ("width", "height") if spec.get(attribute))
+        for attribute in sized:
+            commands.append(("itemconfigure", window_id, f"-{attribute}", spec[attribute]))
+            setattr(model, attribute, spec[attribute])
+        model.sized = sized
+        if not real:
+            widget = self.materializer.create_proxy(widget_type, text, bg, fg)
+
+        #store both the data model and the widget (or its proxy) in the widget map with the window_id as the key
+        model = self.widget_map.add(window_id, model, widget)
+        self.materializer.added(window_id, real)
+        self.spatial_index.insert(window_id, model.bbox())
+
+        if real:
+            self._attach_widget(widget, window_id)
         return window_id
 
-    def _bind_widget_events(self, widget, window_id):
-        def _on_click(e, i=window_id):
-            #start drag
-            self.selection_manager.start_widget_drag(e)
-            #handle widget click (toggle or select_only based on CTRL-Key)
-            result = self.selection_manager.handle_widget_click(e, i)
-            self.sync_callback()
-            return result
+    #route the design events of a real widget to the class bindings and measure it after the next layout pass
+    def _attach_widget(self, widget, window_id: int):
+        #the design bindtag comes first, so "break" keeps the default widget bindings from running
+        widget.bindtags((self.widget_bindtag,) + tuple(widget.bindtags()))
+        self._queue_measure(window_id)
 
-        widget.bind("<Button-1>", _on_click)
+    #measure widgets in one pass after the next layout instead of forcing a layout per widget
+    def _queue_measure(self, item_id):
+        self._pending_measure.add(item_id)
+        if self._measure_id is None:
+            self._measure_id = self.top.after_idle(traced(self.tracer, "WidgetManager._flush_measurements", self._flush_measurements))
 
-        #move widgets based on mouse movement
-        widget.bind("<B1-Motion>", lambda e: self.selection_manager.handle_widget_drag(e, self.widget_map, self.clamped_delta, self.panel_update))
+    def _flush_measurements(self):
+        self._measure_id = None
+        pending, self._pending_measure = self._pending_measure, set()
 
+        #one layout pass for all queued widgets
+        self.top.update_idletasks()
+        for item_id in pending:
+            widget = self.widget_map.widget(item_id)
+            if widget is None:
+                continue    #deleted in the meantime
+            width, height = widget.winfo_width(), widget.winfo_height()
+            if width <= 1 or height <= 1:
+                #not mapped (yet) → fall back to the requested size
+                width, height = widget.winfo_reqwidth(), widget.winfo_reqheight()
+            self._apply_measured_size(item_id, width, height)
+
+    #store a measured size in the model and keep index and outline in sync
+    def _apply_measured_size(self, item_id, width: int, height: int):
+        model = self.widget_map.model(item_id)
+        if model is None:
+            return
+        #explicit sizes are set on the window item and win over the measured size
+        sized = model.sized
+        if sized:
+            width = model.width if "width" in sized else width
+            height = model.height if "height" in sized else height
+        if (model.width, model.height) != (width, height):
+            model.width, model.height = width, height
+            self.sync_index(item_id)
+        if self.selection_manager.is_selected(item_id):
+            self.selection_manager.schedule_refresh(item_id)
+
+    #one Tcl binding per event for all widgets of this designer (instead of one per event and widget);
+    #the handlers find the window item of the widget through the reverse map of the widget store
+    def _bind_widget_class(self):
+        tracer = self.tracer
+
+        def _bind(sequence: str, handler):
+            self.canvas.bind_class(self.widget_bindtag, sequence, traced(tracer, f"widget {sequence}", handler))
+
+        _bind("<Button-1>", self._on_widget_press)
+        #move widgets based on mouse movement
+        _bind("<B1-Motion>", lambda e: self.selection_manager.handle_widget_drag(e, self.widget_map, self.clamped_delta, self.panel_update))
         #reset drag state
-        widget.bind("<ButtonRelease-1>", lambda e: self.selection_manager.end_widget_drag())
+        _bind("<ButtonRelease-1>", lambda e: self.selection_manager.end_widget_drag())
+        #keep model size and outlines in sync when widget resizes
+        _bind("<Configure>", self._on_widget_configure)
 
-        #keep outlines in sync when widget resizes
-        widget.bind("<Configure>", lambda e, i=window_id: self.selection_manager and self.selection_manager.refresh(i))
+    def _on_widget_press(self, event):
+        window_id = self.widget_map.window_id_of(event.widget)
+        if window_id is None:
+            return None
+        #start drag
+        self.selection_manager.start_widget_drag(event)
+        #handle widget click (toggle or select_only based on CTRL-Key)
+        result = self.selection_manager.handle_widget_click(event, window_id)
+        self.sync_callback()
+        return result
+
+    def _on_widget_configure(self, event):
+        window_id = self.widget_map.window_id_of(event.widget)
+        if window_id is not None:
+            self._apply_measured_size(window_id, event.width, event.height)
 
-    #snap selected widgets to grid
+    #snap selected widgets to grid (all positions are computed over the store columns in one pass)
     def snap_to_grid(self, grid_size: int):
-        for item_id in self.selection_manager.selected_ids():
-            model = self.widget_map.get(item_id)["model"]
-            new_x, new_y = round(model.x / grid_size) * grid_size, round(model.y / grid_size) * grid_size
-            dx, dy = new_x - model.x, new_y - model.y
-            self.canvas.move(item_id, dx, dy)           #move widget in canvas
-            model.x, model.y = new_x, new_y             #update model data
-            self.selection_manager.refresh(item_id)     #update highlight
+        item_ids = sorted(self.selection_manager.selected_ids())
+        slots = [self.widget_map.slot(i) for i in item_ids]
+        xs, ys = self.widget_map.xs, self.widget_map.ys
+        dxs = [round(xs[s] / grid_size) * grid_size - xs[s] for s in slots]
+        dys = [round(ys[s] / grid_size) * grid_size - ys[s] for s in slots]
+        self._clamp_deltas(slots, dxs, dys)
+        self.move_widgets(item_ids, dxs, dys)
         self.sync_callback()
 
-    #align selected widgets based on last selected widget
+    #align selected widgets based on last selected widget (edges are taken from the bounding boxes, so anchors are respected)
     def align(self, direction: str):
-        selected_widgets = self.selection_manager.selected_ids()
+        edge = {"left": 0, "top": 1, "right": 2, "bottom": 3}.get(direction)
         last_selected_widget = self.selection_manager.last_selected_id()
-        reference_model = self.widget_map.get(last_selected_widget)["model"]
-
-        for item_id in selected_widgets:
-            if not item_id == last_selected_widget:
-                model = self.widget_map.get(item_id)["model"]
-                if direction == "left":
-                    dx = reference_model.x - model.x            #compute delta x
-                    self.canvas.move(item_id, dx, 0)            #move widget in canvas
-                    model.x += dx                               #update model data
-                elif direction == "right":
-                    dx = (reference_model.x + reference_model.width) - (model.x + model.width)
-                    self.canvas.move(item_id, dx, 0)
-                    model.x += dx
-                elif direction == "top":
-                    dy = (reference_model.y - reference_model.height) - (model.y - model.height)
-                    self.canvas.move(item_id, 0, dy)
-                    model.y += dy
-                elif direction == "bottom":
-                    dy = reference_model.y - model.y
-                    self.canvas.move(item_id, 0, dy)
-                    model.y += dy
-                else:
-                    return
-                self.selection_manager.refresh(item_id) #update highlight
+        if edge is None or last_selected_widget not in self.widget_map:
+            return
+        item_ids = sorted(i for i in self.selection_manager.selected_ids() if i != last_selected_widget)
+        slots = [self.widget_map.slot(i) for i in item_ids]
+
+        #broadcast the reference edge against the same edge of every other widget
+        reference = self.widget_map.bbox(last_selected_widget)[edge]
+        edges = self._bbox_columns(slots)[edge]
+        deltas = [reference - value for value in edges]
+        zeros = [0] * len(slots)
+        dxs, dys = (deltas, zeros) if edge in (0, 2) else (zeros, deltas)
+        self._clamp_deltas(slots, dxs, dys)
+        self.move_widgets(item_ids, dxs, dys)
         self.sync_callback()
 
+    #bounding box columns (x0s, y0s, x1s, y1s) of the given store slots
+    def _bbox_columns(self, slots):
+        store = self.widget_map
+        xs, ys, widths, heights, anchors = store.xs, store.ys, store.widths, store.heights, store.anchors
+        x0s = [xs[s] - (widths[s] * ANCHOR_CODE_OFFSETS[anchors[s]][0]) // 2 for s in slots]
+        y0s = [ys[s] - (heights[s] * ANCHOR_CODE_OFFSETS[anchors[s]][1]) // 2 for s in slots]
+        x1s = [x0 + widths[s] for x0, s in zip(x0s, slots)]
+        y1s = [y0 + heights[s] for y0, s in zip(y0s, slots)]
+        return x0s, y0s, x1s, y1s
+
+    #limit per-widget deltas (in place) so that no widget ends up outside the canvas
+    def _clamp_deltas(self, slots, dxs, dys):
+        if self.canvas_width is None or self.canvas_height is None:
+            return
+        x0s, y0s, x1s, y1s = self._bbox_columns(slots)
+        width, height = self.canvas_width, self.canvas_height
+        dxs[:] = [max(-x0, min(width - x1, dx)) for x0, x1, dx in zip(x0s, x1s, dxs)]
+        dys[:] = [max(-y0, min(height - y1, dy)) for y0, y1, dy in zip(y0s, y1s, dys)]
+
+    #move widgets by a common delta (ints) or by one delta per widget (sequences) in one batch:
+    #models are updated column-wise and all canvas items are repositioned with a single Tcl script
+    def move_widgets(self, item_ids, dx, dy):
+        if not item_ids:
+            return
+        dxs = [dx] * len(item_ids) if isinstance(dx, int) else dx
+        dys = [dy] * len(item_ids) if isinstance(dy, int) else dy
+        xs, ys = self.widget_map.xs, self.widget_map.ys
+        scale = self.viewport.scale
+        commands = []
+        for item_id, item_dx, item_dy in zip(item_ids, dxs, dys):
+            if not item_dx and not item_dy:
+                continue
+            slot = self.widget_map.slot(item_id)
+            xs[slot] += item_dx                             #update model data
+            ys[slot] += item_dy
+            self.widget_map.touch(slot)
+            commands.append(("coords", item_id, xs[slot] * scale, ys[slot] * scale))
+            self._sync_geometry(item_id, commands)          #update hit-testing index (and proxy items)
+        run_batch(self.canvas, commands)                    #move widgets in canvas
+        self.history.record_move(item_ids, dx, dy)
+        self.selection_manager.schedule_refresh()           #update highlights once (next frame)
+
+    #copy the selected widgets, returns the number of copied widgets
+    def copy_selected(self) -> int:
+        self.clipboard = self._selection_specs()
+        self._clipboard_bbox = self._selection_bbox()
+        self._paste_count = 0
+        return len(self.clipboard)
+
+    #paste the copied widgets as one undo step and select them. at (x, y) the top left corner of the group
+    #is placed there, otherwise every paste is shifted by PASTE_OFFSET further from the copied widgets
+    def paste(self, x: int = None, y: int = None) -> list[int]:
+        if not self.clipboard:
+            return []
+        if x is None or y is None:
+            self._paste_count += 1
+            dx = dy = PASTE_OFFSET * self._paste_count
+        else:
+            x0, y0, _, _ = self._clipboard_bbox
+            dx, dy = x - x0, y - y0
+        return self._add_clones(self.clipboard, self._clipboard_bbox, dx, dy)
+
+    #copy and paste the selection in one step (the clipboard is kept)
+    def duplicate_selected(self) -> list[int]:
+        return self._add_clones(self._selection_specs(), self._selection_bbox(), PASTE_OFFSET, PASTE_OFFSET)
+
+    #specs of the selected widgets in stacking order, without their names
+    def _selection_specs(self) -> list[dict]:
+        specs = []
+        for item_id in sorted(self.selection_manager.selected_ids()):
+            spec = widget_spec(self.widget_map.model(item_id))
+            del spec["id"]
+            specs.append(spec)
+        return specs
+
+    #union bounding box of the selected widgets (specs only keep explicit sizes, so it is taken from the models)
+    def _selection_bbox(self):
+        boxes = [self.widget_map.bbox(item_id) for item_id in self.selection_manager.selected_ids()]
+        if not boxes:
+            return None
+        return min(b[0] for b in boxes), min(b[1] for b in boxes), max(b[2] for b in boxes), max(b[3] for b in boxes)
+
+    #create shifted copies through the bulk path (keeping their relative offsets) and select them
+    def _add_clones(self, specs, bbox, dx: int, dy: int) -> list[int]:
+        if not specs:
+            return []
+        #keep the group inside the design
+        x0, y0, x1, y1 = bbox
+        if self.canvas_width is not None:
+            dx = max(-x0, min(dx, self.canvas_width - x1))
+        if self.canvas_height is not None:
+            dy = max(-y0, min(dy, self.canvas_height - y1))
+        window_ids = self.add_widgets([dict(spec, x=spec["x"] + dx, y=spec["y"] + dy) for spec in specs])
+        self.selection_manager.select_items(window_ids)
+        self.sync_callback()
+        return window_ids
+
     def delete_selected_widgets(self):
         count_selected_widgets = len(self.selection_manager.selected_ids())
         if count_selected_widgets == 0:
@@ -145,49 +374,120 @@ class WidgetManager:
         if not messagebox.askyesno("Delete", messagebox_text):
             return
 
-        for item_id in [i for i in self.selection_manager.selected_ids() if self.canvas.type(i) == "window"]:
+        self.delete_widgets([i for i in self.selection_manager.selected_ids() if self.canvas.type(i) == "window"])
+        #clear selection
+        self.selection_manager.clear()
+        self.sync_callback()
+
+    #delete widgets without asking (the deletion can be undone)
+    def delete_widgets(self, item_ids):
+        item_ids = [i for i in item_ids if i in self.widget_map]
+        self.history.record_delete(item_ids, [widget_spec(self.widget_map.model(i)) for i in item_ids])
+        self.selection_manager.deselect(item_ids)
+        for item_id in item_ids:
             #delete widget
             self.canvas.delete(item_id)
             #delete model
-            self.widget_map.pop(item_id, None)
-            #clear selection
-        self.selection_manager.clear()
+            self.widget_map.remove(item_id).destroy()
+            self.materializer.removed(item_id)
+            self.spatial_index.remove(item_id)
+
+    #apply several (item_id, attribute, value) changes as one undo step
+    def set_attributes(self, changes):
+        self.history.begin()
+        try:
+            self._apply_changes(changes)
+        finally:
+            self.history.commit()
+
+    #apply the same attribute values to many widgets (multi-selection edits in the AttributesPanel) as one undo step
+    def apply_attributes(self, item_ids, values: dict):
+        self.set_attributes([(item_id, attribute, value) for item_id in item_ids for attribute, value in values.items()])
+
+    def undo(self):
+        if self.history.undo(self):
+            self._after_history_change()
+
+    def redo(self):
+        if self.history.redo(self):
+            self._after_history_change()
+
+    def _after_history_change(self):
+        self.selection_manager.schedule_refresh()
         self.sync_callback()
 
-    #apply an attribute change from the AttributesPanel to the widget
+    #can a widget be renamed to this name (not empty and not used by another widget)?
+    def name_available(self, name: str, item_id=None) -> bool:
+        owner = self.widget_map.find_by_name(name)
+        return bool(name) and (owner is None or owner == item_id)
+
+    #apply an attribute change from the AttributesPanel to the model and the widget
     def update_widget_attribute(self, item_id, attribute, value):
-        model = self.widget_map.get(item_id)["model"]
-        widget = self.widget_map.get(item_id)["widget"]
-        if not widget:
-            return
+        self._apply_changes([(item_id, attribute, value)])
 
-        if attribute in ("x", "y"):
-            if attribute == "x":
-                x, y = value, model.y
-            elif attribute == "y":
-                x, y = model.x, value
+    #update models and widgets per change, then reconfigure all canvas items with one Tcl script,
+    #re-measure changed texts in one pass and refresh the outlines once
+    def _apply_changes(self, changes):
+        commands = []
+        moved = set()       #window_ids with a new position
+        changed = set()     #window_ids whose bounding box may have changed
+        for item_id, attribute, value in changes:
+            if item_id not in self.widget_map:
+                continue
+            model = self.widget_map.model(item_id)
+            widget = self.widget_map.widget(item_id)
+            if not widget or not hasattr(model, attribute):
+                continue    #e.g. text of an entry in a mixed batch
+            if attribute == "id" and not self.name_available(value, item_id):
+                continue
+            if attribute == "anchor" and value not in ANCHORS:
+                continue    #an invalid option would abort the whole batch script
+
+            #update model
+            self.history.record_attribute(item_id, attribute, getattr(model, attribute), value)
+            setattr(model, attribute, value)
+
+            if attribute in ("x", "y"):
+                moved.add(item_id)
+            elif attribute in ("width", "height", "anchor"):
+                commands.append(("itemconfigure", item_id, f"-{attribute}", value))
+                if attribute != "anchor" and attribute not in model.sized:
+                    model.sized += (attribute,)
+            elif attribute in ("text", "bg", "fg"):
+                if isinstance(widget, ProxyWidget):
+                    commands.extend(widget.config_commands(**{attribute: value}))
+                else:
+                    widget.config(**{attribute: value})
+                if attribute != "text":
+                    continue    #colors cannot change the size → no re-measure
+                self._queue_measure(item_id)    #new size is picked up after the next layout pass
             else:
-                return
-            self.canvas.coords(item_id, x, y)
-            self.selection_manager.refresh(item_id) #update selection outline
-        elif attribute in ("width", "height"):
-            self.canvas.itemconfig(item_id, **{attribute: value})
-            self.selection_manager.refresh(item_id)
-        elif attribute == "text":
-            widget.config(text=value)
-            widget.update()
-            model.width, model.height = widget.winfo_width(), widget.winfo_height()
-            self.selection_manager.refresh(item_id)
-        elif attribute in ("bg", "fg"):
-            widget.config(**{attribute: value})
-            widget.update()
-            model.width, model.height = widget.winfo_width(), widget.winfo_height()
-            self.selection_manager.refresh(item_id)
-        elif attribute == "anchor":
-            try:
-                self.canvas.itemconfig(item_id, anchor=value)
-            except Exception:
-                widget.config(anchor=value)
-            self.selection_manager.refresh(item_id)
-        else:
-            return
\ No newline at end of file
+                continue
+            changed.add(item_id)
+
+        for item_id in moved:
+            model = self.widget_map.model(item_id)
+            commands.append(("coords", item_id, *self.viewport.to_canvas(model.x, model.y)))
+        for item_id in changed:
+            self._sync_geometry(item_id, commands)  #update hit-testing index (and proxy items)
+        run_batch(self.canvas, commands)
+        if len(changed) == 1:
+            self.selection_manager.schedule_refresh(next(iter(changed)))
+        elif changed:
+            self.selection_manager.schedule_refresh()
+
+    #recompute the bounding box of a widget in the hit-testing index from its model
+    def sync_index(self, item_id):
+        if item_id in self.widget_map:
+            commands = []
+            self._sync_geometry(item_id, commands)
+            run_batch(self.canvas, commands)
+
+    #update the index entry of a widget and collect the canvas commands that move its proxy items (if any)
+    def _sync_geometry(self, item_id, commands):
+        bbox = self.widget_map.bbox(item_id)
+        self.spatial_index.update(item_id, bbox)
+        self.selection_manager.item_geometry_changed(item_id)
+        widget = self.widget_map.widget(item_id)
+        if isinstance(widget, ProxyWidget):
+            commands.extend(widget.geometry_commands(self.viewport.bbox_to_canvas(bbox)))
\ No newline at end of file
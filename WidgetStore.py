@@ -0,0 +1,387 @@
+import re
+import sys
+from array import array
+from fnmatch import translate
+from DataModels import ANCHORS, IdCounters, compute_bbox
+
+#widget types in the order of their type code in the store
+WIDGET_TYPE_NAMES = ("Label", "Entry", "Button")
+
+#explicitly sized dimensions in the order of their bit in the sized column
+SIZE_ATTRIBUTES = ("width", "height")
+
+#columnar storage for all widgets of a design
+#geometry lives in array columns indexed by a dense slot, strings and Tk widgets in parallel lists;
+#WidgetView objects give the models their usual attribute API (model.x, model.text, model.bbox(), ...).
+#views are created on demand and not kept, so a widget costs its column entries and index entries only.
+#secondary indexes by name, type and user tag answer lookups and queries without scanning the models
+class WidgetStore:
+    def __init__(self):
+        #geometry columns
+        self.xs = array("i")
+        self.ys = array("i")
+        self.widths = array("i")
+        self.heights = array("i")
+        self.anchors = array("B")      #index into ANCHORS
+        self.types = array("B")        #index into WIDGET_TYPE_NAMES
+        self.sized = array("B")        #bit mask of the explicitly sized SIZE_ATTRIBUTES
+
+        #string / object columns
+        self.ids = []
+        self.bgs = []
+        self.fgs = []
+        self.texts = []
+        self.tags = []                 #slot -> tuple of user tags
+        self.widgets = []
+        self.window_ids = array("l")   #slot -> window_id (0 for free slots)
+        self.revisions = array("Q")    #slot -> store revision of the last change (see touch)
+        self._revision = 0
+
+        self._slots = {}               #window_id -> slot
+
+        #secondary indexes, kept up to date by add/remove and by the id and tags setters of the views
+        self._by_name = {}                                  #widget id -> window_id (names are unique, see WidgetManager)
+        self._by_type = tuple(set() for _ in WIDGET_TYPE_NAMES)    #type code -> window_ids
+        self._by_tag = {}                                   #user tag -> window_ids
+        self._free = []                #slots of deleted widgets, reused by add()
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __contains__(self, window_id):
+        return window_id in self._slots
+
+    def __iter__(self):
+        return iter(self._slots)
+
+    def slot(self, window_id: int) -> int:
+        return self._slots[window_id]
+
+    #mark a slot as changed; the view setters call it, code that writes the columns directly has to call it too.
+    #revisions are unique within the store (also across reused slots), so caches can key on them (see CodeExporter)
+    def touch(self, slot: int):
+        self._revision += 1
+        self.revisions[slot] = self._revision
+
+    #revision of the last change of a widget
+    def revision(self, window_id: int) -> int:
+        return self.revisions[self._slots[window_id]]
+
+    #store a model (any object with the BaseWidgetData attributes) and its Tk widget, returns the view
+    def add(self, window_id: int, model, widget) -> "WidgetView":
+        values = (
+            model.x or 0, model.y or 0, model.width or 0, model.height or 0,
+            ANCHORS.index(model.anchor), WIDGET_TYPE_NAMES.index(model.type), _size_mask(getattr(model, "sized", ())),
+            model.id, _intern(model.bg), _intern(model.fg), getattr(model, "text", ""), tuple(getattr(model, "tags", ())),
+            widget, window_id, 0
+        )
+        if self._free:
+            slot = self._free.pop()
+            (self.xs[slot], self.ys[slot], self.widths[slot], self.heights[slot], self.anchors[slot], self.types[slot], self.sized[slot],
+             self.ids[slot], self.bgs[slot], self.fgs[slot], self.texts[slot], self.tags[slot], self.widgets[slot], self.window_ids[slot],
+             self.revisions[slot]) = values
+        else:
+            slot = len(self.xs)
+            for column, value in zip(self._columns(), values):
+                column.append(value)
+        self._slots[window_id] = slot
+        self.touch(slot)
+        _link_widget(widget, window_id)
+        self._by_name[self.ids[slot]] = window_id
+        self._by_type[self.types[slot]].add(window_id)
+        for tag in self.tags[slot]:
+            self._by_tag.setdefault(tag, set()).add(window_id)
+        return self.model(window_id)
+
+    #remove a widget, returns its Tk widget
+    def remove(self, window_id: int):
+        slot = self._slots.pop(window_id)
+        widget = self.widgets[slot]
+        self._unindex_name(slot)
+        self._by_type[self.types[slot]].discard(window_id)
+        self._unindex_tags(slot)
+        self.widgets[slot] = None
+        self.ids[slot] = self.bgs[slot] = self.fgs[slot] = self.texts[slot] = None
+        self.tags[slot] = ()
+        self.window_ids[slot] = 0
+        self._free.append(slot)
+        return widget
+
+    #views of the same widget compare equal (a new view is returned on every call)
+    def model(self, window_id: int):
+        return WidgetView(self, window_id) if window_id in self._slots else None
+
+    def widget(self, window_id: int):
+        slot = self._slots.get(window_id)
+        return None if slot is None else self.widgets[slot]
+
+    def set_widget(self, window_id: int, widget):
+        slot = self._slots[window_id]
+        self.widgets[slot] = widget
+        _link_widget(widget, window_id)
+
+    #window_id of a stored widget (e.g. event.widget), None for widgets that are not in the store
+    #the window_id is kept on the widget itself, so this needs no reverse map
+    def window_id_of(self, widget):
+        window_id = getattr(widget, WINDOW_ID_ATTRIBUTE, None)
+        slot = self._slots.get(window_id)
+        return window_id if slot is not None and self.widgets[slot] is widget else None
+
+    def models(self):
+        for window_id in self._slots:
+            yield self.model(window_id)
+
+    def items(self):
+        for window_id in self._slots:
+            yield window_id, self.model(window_id)
+
+    def bbox(self, window_id: int):
+        slot = self._slots[window_id]
+        return compute_bbox(self.xs[slot], self.ys[slot], self.widths[slot], self.heights[slot], ANCHORS[self.anchors[slot]])
+
+    #----- secondary indexes -----
+    def find_by_name(self, name: str):
+        return self._by_name.get(name)
+
+    def of_type(self, widget_type: str) -> frozenset:
+        return frozenset(self._by_type[WIDGET_TYPE_NAMES.index(widget_type.capitalize())])
+
+    def tagged(self, tag: str) -> frozenset:
+        return frozenset(self._by_tag.get(tag, ()))
+
+    def all_tags(self) -> list[str]:
+        return sorted(self._by_tag)
+
+    #window_ids (in creation order) of the widgets that match all given criteria:
+    #type ("label", "entry", "button") and tag come from the indexes, name is an exact name or a glob pattern
+    #and name_regex a regular expression, both matched against the name index. predicate(model) -> bool is
+    #only evaluated for the widgets that are left after the indexed criteria
+    def query(self, type: str = None, name: str = None, name_regex: str = None, tag: str = None, predicate=None) -> list[int]:
+        candidates = None
+
+        def _narrow(window_ids):
+            nonlocal candidates
+            candidates = set(window_ids) if candidates is None else candidates.intersection(window_ids)
+
+        if type is not None:
+            _narrow(self._by_type[WIDGET_TYPE_NAMES.index(type.capitalize())])
+        if tag is not None:
+            _narrow(self._by_tag.get(tag, ()))
+        if name is not None:
+            if any(character in name for character in "*?["):
+                pattern = re.compile(translate(name))
+                _narrow(window_id for widget_name, window_id in self._by_name.items() if pattern.match(widget_name))
+            else:
+                window_id = self._by_name.get(name)
+                _narrow(() if window_id is None else (window_id,))
+        if name_regex is not None:
+            pattern = re.compile(name_regex)
+            _narrow(window_id for widget_name, window_id in self._by_name.items() if pattern.search(widget_name))
+        if candidates is None:
+            candidates = self._slots.keys()
+        if predicate is not None:
+            candidates = [window_id for window_id in candidates if predicate(self.model(window_id))]
+        return sorted(candidates)
+
+    def _unindex_name(self, slot: int):
+        name = self.ids[slot]
+        if self._by_name.get(name) == self.window_ids[slot]:
+            del self._by_name[name]
+
+    def _unindex_tags(self, slot: int):
+        window_id = self.window_ids[slot]
+        for tag in self.tags[slot]:
+            window_ids = self._by_tag.get(tag)
+            if window_ids is not None:
+                window_ids.discard(window_id)
+                if not window_ids:
+                    del self._by_tag[tag]
+
+    #called by the view setters
+    def _rename(self, slot: int, name: str):
+        if self.window_ids[slot]:
+            self._unindex_name(slot)
+            self._by_name[name] = self.window_ids[slot]
+        self.ids[slot] = name
+
+    def _retag(self, slot: int, tags):
+        tags = tuple(dict.fromkeys(tags))    #unique, in the given order
+        if self.window_ids[slot]:
+            self._unindex_tags(slot)
+            for tag in tags:
+                self._by_tag.setdefault(tag, set()).add(self.window_ids[slot])
+        self.tags[slot] = tags
+
+    def _columns(self):
+        return (self.xs, self.ys, self.widths, self.heights, self.anchors, self.types, self.sized,
+                self.ids, self.bgs, self.fgs, self.texts, self.tags, self.widgets, self.window_ids, self.revisions)
+
+def _size_mask(sized) -> int:
+    return sum(1 << index for index, attribute in enumerate(SIZE_ATTRIBUTES) if attribute in sized)
+
+#attribute on Tk widgets (and proxies) that holds the window_id of their window item
+WINDOW_ID_ATTRIBUTE = "_design_window_id"
+
+def _link_widget(widget, window_id: int):
+    if widget is not None:
+        setattr(widget, WINDOW_ID_ATTRIBUTE, window_id)
+
+#colors repeat across many widgets, so they share one string object
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+#thin view on one widget of a WidgetStore with the attribute API of the BaseWidgetData dataclasses
+#the slot is looked up on every access, so a view of a removed widget raises KeyError instead of
+#aliasing the next widget stored in the same slot
+class WidgetView:
+    __slots__ = ("_store", "_window_id")
+
+    def __init__(self, store: WidgetStore, window_id: int):
+        self._store = store
+        self._window_id = window_id
+
+    @property
+    def _slot(self) -> int:
+        return self._store._slots[self._window_id]
+
+    def __eq__(self, other):
+        if not isinstance(other, WidgetView):
+            return NotImplemented
+        return self._store is other._store and self._window_id == other._window_id
+
+    def __hash__(self):
+        return hash(self._window_id)
+
+    @property
+    def x(self):
+        return self._store.xs[self._slot]
+
+    @x.setter
+    def x(self, value):
+        slot = self._slot
+        self._store.xs[slot] = value
+        self._store.touch(slot)
+
+    @property
+    def y(self):
+        return self._store.ys[self._slot]
+
+    @y.setter
+    def y(self, value):
+        slot = self._slot
+        self._store.ys[slot] = value
+        self._store.touch(slot)
+
+    @property
+    def width(self):
+        return self._store.widths[self._slot]
+
+    @width.setter
+    def width(self, value):
+        slot = self._slot
+        self._store.widths[slot] = value
+        self._store.touch(slot)
+
+    @property
+    def height(self):
+        return self._store.heights[self._slot]
+
+    @height.setter
+    def height(self, value):
+        slot = self._slot
+        self._store.heights[slot] = value
+        self._store.touch(slot)
+
+    #dimensions that were set explicitly (like BaseWidgetData.sized)
+    @property
+    def sized(self):
+        mask = self._store.sized[self._slot]
+        return tuple(attribute for index, attribute in enumerate(SIZE_ATTRIBUTES) if mask >> index & 1)
+
+    @sized.setter
+    def sized(self, value):
+        slot = self._slot
+        self._store.sized[slot] = _size_mask(value)
+        self._store.touch(slot)
+
+    @property
+    def anchor(self):
+        return ANCHORS[self._store.anchors[self._slot]]
+
+    @anchor.setter
+    def anchor(self, value):
+        slot = self._slot
+        self._store.anchors[slot] = ANCHORS.index(value)
+        self._store.touch(slot)
+
+    @property
+    def type(self):
+        return WIDGET_TYPE_NAMES[self._store.types[self._slot]]
+
+    @property
+    def id(self):
+        return self._store.ids[self._slot]
+
+    @id.setter
+    def id(self, value):
+        slot = self._slot
+        self._store._rename(slot, value)
+        self._store.touch(slot)
+
+    @property
+    def bg(self):
+        return self._store.bgs[self._slot]
+
+    @bg.setter
+    def bg(self, value):
+        slot = self._slot
+        self._store.bgs[slot] = _intern(value)
+        self._store.touch(slot)
+
+    @property
+    def fg(self):
+        return self._store.fgs[self._slot]
+
+    @fg.setter
+    def fg(self, value):
+        slot = self._slot
+        self._store.fgs[slot] = _intern(value)
+        self._store.touch(slot)
+
+    #entries have no text, like EntryWidgetData
+    @property
+    def text(self):
+        if self.type == "Entry":
+            raise AttributeError("text")
+        return self._store.texts[self._slot]
+
+    @text.setter
+    def text(self, value):
+        if self.type == "Entry":
+            raise AttributeError("text")
+        slot = self._slot
+        self._store.texts[slot] = value
+        self._store.touch(slot)
+
+    #user tags (tuple of strings) for query-based selection
+    @property
+    def tags(self):
+        return self._store.tags[self._slot]
+
+    @tags.setter
+    def tags(self, value):
+        slot = self._slot
+        self._store._retag(slot, value)
+        self._store.touch(slot)
+
+    def bbox(self) -> tuple[int, int, int, int]:
+        store, slot = self._store, self._slot
+        return compute_bbox(store.xs[slot], store.ys[slot], store.widths[slot], store.heights[slot], ANCHORS[store.anchors[slot]])
+
+    def create_id(self):
+        counter = self.type.lower()
+        self.id = f"{counter}{getattr(IdCounters, counter)}"
+        setattr(IdCounters, counter, getattr(IdCounters, counter) + 1)
+
+    def __repr__(self):
+        return f"WidgetView(id={self.id!r}, type={self.type!r}, x={self.x}, y={self.y}, width={self.width}, height={self.height}, anchor={self.anchor!r})"
\ No newline at end of file
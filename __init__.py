@@ -24,9 +24,25 @@ Module map
     Tracks attributes like x/y position, width, height, colors, and anchor.
     Includes ID counters for unique widget naming.
 
+"WidgetStore.py":
+    Columnar storage for all widgets of a design. Geometry is kept in array
+    columns indexed by a dense slot; thin __slots__ views, created on demand,
+    provide the usual model attribute API (model.x, model.text, model.bbox(),
+    ...). Secondary
+    indexes by name, type and user tag answer lookups and query-based
+    selection (type, name glob or regex, tag, predicate) without a scan.
+
 "SetupWizard.py":
     Provides a configuration wizard for setting window title, size, colors,
-    and icon before launching the Designer.
+    and icon before launching the Designer. The Designer and its managers
+    are imported when a designer is launched. Offers to recover autosaved
+    sessions of designers that were not closed.
+
+"IconCache.py":
+    Loads the default icon from the pre-rendered icon_20.png without Pillow.
+    Custom icons are decoded and resized with Pillow in a worker thread,
+    memoized per size and cached on disk as PNG (keyed by path, modification
+    time, file size and icon size).
 
 "Designer.py":
     The main orchestrator. Creates and wires managers:
@@ -36,28 +52,104 @@ Module map
 
 "CanvasManager.py":
     Creates and packs the main Canvas, toggles grid visualization,
-    and binds global canvas events (context menu, selection, keyboard moves).
+    and binds global canvas events (context menu, selection, keyboard moves,
+    clipboard shortcuts, pan and zoom).
 
 "SelectionManager.py":
     Manages widget selection, draws outlines, handles rectangle selection,
     and supports drag operations. Updates model positions and refreshes
-    the attributes panel during moves.
+    the attributes panel during moves. Large selections get one group
+    outline instead of one outline per widget.
+
+"FrameScheduler.py":
+    Designer-wide scheduler for derived UI state. Managers mark outlines,
+    panel fields and panel limits dirty; each channel is flushed once per
+    idle cycle in priority order, however many events arrived.
 
 "WidgetManager.py":
     Adds widgets (Label, Entry, Button) to the canvas as window items.
-    Maintains a widget map linking canvas IDs to models and Tk widgets.
-    Applies attribute changes and supports snapping and deletion.
+    Maintains a widget map (WidgetStore) linking canvas IDs to models and Tk widgets.
+    Applies attribute changes in batches (one canvas script, one measurement
+    pass and one outline refresh) and supports snapping and deletion.
+    Copy, paste and duplicate keep the relative offsets of the widgets,
+    give the copies fresh names and add them as one undo step. Design events
+    of all widgets go through one shared bindtag (DesignWidget<n>) with a
+    single class binding per event.
 
 "AttributesPanelManager.py":
     Builds the attributes panel dynamically based on widget type.
     Implements two-way binding: panel changes update the model and widget,
-    and widget moves update the panel silently.
+    and widget moves update the panel silently (once per frame). For a
+    multi-selection it shows the shared attributes (mixed values blank) and
+    applies an edit to every selected widget in one batch.
+
+"SpatialIndex.py":
+    Uniform grid index of widget bounding boxes computed from the models.
+    Answers point and rectangle queries for hit-testing without Tcl round trips.
+
+"CanvasBatch.py":
+    Sends many canvas commands (coords, itemconfigure, raise, ...) to Tcl as
+    one script, so batch edits cost one round trip instead of one per item.
+
+"Virtualization.py":
+    Keeps large designs responsive: at most MATERIALIZE_BUDGET widgets are real
+    Tk widgets (selected first, then visible ones); the others are drawn as
+    rectangle+text proxies under the same window item and WidgetStore slot.
+    Proxies outside the visible area are culled, and when zoomed every widget
+    is a proxy.
+
+"Viewport.py":
+    View transform between design and canvas coordinates. Pans by scrolling
+    the canvas and zooms with one canvas scale call; models, the spatial index
+    and the attributes panel stay in design coordinates.
+
+"ProjectFile.py":
+    Versioned project format with a readable JSON lines form and a compact
+    binary form. Stores window settings, theme, id counters and all widgets,
+    and streams widgets into the bulk-insert path of the WidgetManager on load.
+
+"CodeExporter.py":
+    Exports the design as a runnable Tkinter module using place().
+    Generated fragments are cached per widget (keyed on the WidgetStore
+    revision of the widget), so re-exporting only regenerates the widgets
+    that changed, and an unchanged design is not written again.
+
+"History.py":
+    Undo/redo log of compact deltas (columnar moves, attribute changes,
+    added/deleted widget specs). Transactions collapse a whole gesture into
+    one entry and the log is capped by a byte budget. Listeners see every
+    model change, including the ones made by undo and redo.
+
+"Autosave.py":
+    Crash recovery. Every model change is appended to a journal by a
+    background thread; the journal is compacted into a snapshot (a binary
+    project file) periodically or once it exceeds a size. A session left
+    behind by a designer that was not closed is recovered by loading the
+    snapshot and replaying the journal.
+
+"Tracing.py":
+    Opt-in latency tracing of Tk event handlers (EVENT_TRACING in Theme.py or
+    GUI_BUILDER_TRACE=1). Records wall time, Tcl calls and touched canvas items
+    per event, keeps p50/p95/p99 per handler and exports Chrome trace files.
 
 "ToolbarManager.py":
-    Creates a toolbar with menus for widget actions and grid toggling.
+    Creates a toolbar with menus for widget actions, query-based selection
+    and grid toggling.
 
 "App.py":
     Entry point. Launches the SetupWizard and starts the Tkinter main loop.
+    Set GUI_BUILDER_STARTUP_REPORT=1 to print the startup phases and the
+    time to the first window.
+
+"Benchmark.py":
+    Standalone benchmarks for the data structures and the core managers
+    (the managers run on a HeadlessCanvas). Run "python Benchmark.py" to print
+    the timings, add "--json results.json" to record timings and call counts.
+
+"HeadlessCanvas.py":
+    In-process stand-in for tk.Canvas and the widgets placed on it. Implements
+    the canvas subset used by the managers, counts every call and runs the
+    batch scripts of CanvasBatch, so the managers work without a display.
 
 "__init__.py":
     Provides package-level documentation and re-exports main classes for convenience.